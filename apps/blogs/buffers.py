@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.dispatch import Signal
+
+from apps.blogs.models import Post
+from core.buffers import WriteBehindBuffer
+
+# Sent with `views`, a {post id: count} dict, after a batch reaches the table.
+post_views_written = Signal()
+
+
+class PostViewBuffer(WriteBehindBuffer):
+    """Per-post view counts, added to `Post.views` in one UPDATE per chunk."""
+    name = 'post_views'
+    chunk_size = 500
+
+    def write(self, batch):
+        items = sorted(batch.items())
+        # All chunks or none: a failed write is requeued whole, so chunks
+        # committed before it would be counted twice.
+        with transaction.atomic():
+            for start in range(0, len(items), self.chunk_size):
+                chunk = items[start:start + self.chunk_size]
+                increments = Case(
+                    *(When(pk=pk, then=Value(count)) for pk, count in chunk),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+                Post.objects.filter(pk__in=[pk for pk, _ in chunk]).update(views=F('views') + increments)
+        post_views_written.send_robust(sender=self.__class__, views=batch)
+
+
+post_views = PostViewBuffer()
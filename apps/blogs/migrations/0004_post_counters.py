@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:25
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('blogs', 'Post')
+    PostLike = apps.get_model('blogs', 'PostLike')
+    Comment = apps.get_model('blogs', 'Comment')
+
+    def count(model):
+        rows = model.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(value=Count('pk'))
+        return Coalesce(Subquery(rows.values('value'), output_field=IntegerField()), 0)
+
+    Post.objects.update(likes_count=count(PostLike), comments_count=count(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0003_alter_category_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
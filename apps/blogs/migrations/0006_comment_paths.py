@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:27
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+SEGMENT_LENGTH = 7
+
+
+def segment(pk):
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+    return digits.rjust(SEGMENT_LENGTH, '0')
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model('blogs', 'Comment')
+
+    parents = dict(Comment.objects.values_list('pk', 'parent_id'))
+    paths = {}
+
+    def resolve(pk):
+        # Walk up iteratively to avoid recursion limits on deep threads.
+        chain = []
+        while pk not in paths:
+            chain.append(pk)
+            pk = parents[pk]
+            if pk is None:
+                break
+        prefix, depth = paths[pk] if pk is not None else ('', -1)
+        for node in reversed(chain):
+            prefix, depth = prefix + segment(node), depth + 1
+            paths[node] = (prefix, depth)
+
+    for pk in parents:
+        resolve(pk)
+
+    batch = []
+    for comment in Comment.objects.only('pk').iterator(chunk_size=1000):
+        comment.path, comment.depth = paths[comment.pk]
+        batch.append(comment)
+        if len(batch) >= 1000:
+            Comment.objects.bulk_update(batch, ['path', 'depth'])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ['path', 'depth'])
+
+    replies = Comment.objects.filter(parent=OuterRef('pk')).order_by().values('parent').annotate(value=Count('pk'))
+    Comment.objects.update(
+        reply_count=Coalesce(Subquery(replies.values('value'), output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0005_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='blogs_comme_post_id_bdf25c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'parent', 'created_at', 'id'], name='blogs_comme_post_id_f17c73_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:37
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_updated_at(apps, schema_editor):
+    apps.get_model('blogs', 'Post').objects.update(changed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0007_trending_event_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,16 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connection, models, transaction, IntegrityError
+from django.db.models import F, Q, Value, Window
+from django.db.models.functions import Concat, RowNumber, Substr
+from django.db.models.signals import post_delete
+from django.db.models.expressions import RawSQL
 from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from core.counters import CounterSourceMixin
+
 
 
 class User(AbstractUser):
@@ -21,6 +27,7 @@ class Category(models.Model):
     slug = models.SlugField(max_length=120, unique=True, blank=True)
     description = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -54,11 +61,31 @@ class AuthorProfile(models.Model):
     website = models.URLField(blank=True, null=True)
     avatar = models.ImageField(upload_to='authors/avatars/', blank=True, null=True)
     twitter = models.CharField(max_length=100, blank=True, null=True)
+    # Also bumped by changes to the user's names and by deleting one of their posts.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username} profile"
 
 
+class PostQuerySet(models.QuerySet):
+    def search(self, query):
+        from apps.search.backends import get_backend
+
+        sql, params = get_backend().matching_ids_sql(query, 'post')
+        return self.filter(pk__in=RawSQL(sql, params))
+
+    def adjust_counters(self, likes=0, comments=0):
+        """Apply deltas to `likes_count` and `comments_count` in a single UPDATE, bumping `changed_at`."""
+        updates = {}
+        if likes:
+            updates['likes_count'] = F('likes_count') + likes
+        if comments:
+            updates['comments_count'] = F('comments_count') + comments
+        if updates:
+            self.update(changed_at=timezone.now(), **updates)
+
+
 class Post(models.Model):
     STATUS_DRAFT = 'draft'
     STATUS_PUBLISHED = 'published'
@@ -80,14 +107,21 @@ class Post(models.Model):
     published_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Like `updated_at`, but also bumped by the counters, tag and image changes.
+    changed_at = models.DateTimeField(auto_now=True, db_index=True)
     views = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
     reading_time_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ['-published_at', '-created_at']
         indexes = [
             models.Index(fields=['-published_at']),
             models.Index(fields=['slug']),
+            models.Index(fields=['status', 'published_at', 'id']),
         ]
 
     def __str__(self):
@@ -125,29 +159,154 @@ class PostImage(models.Model):
         return f"Image for {self.post.title} ({self.caption or 'no caption'})"
 
 
-class Comment(models.Model):
+class CommentQuerySet(models.QuerySet):
+    def subtree(self, comment):
+        """Descendants of `comment` as an index range over `path`."""
+        return self.filter(post_id=comment.post_id, path__gt=comment.path, path__lt=comment.path + Comment.PATH_END)
+
+    def threads(self, roots, per_thread=None):
+        """
+        Descendants of the root comments `roots` in thread order, read with
+        one query over their path ranges. `per_thread` caps the replies
+        taken from each root, so the oldest threads can't use up the page.
+        """
+        if not roots:
+            return self.none()
+        ranges = Q()
+        for root in roots:
+            ranges |= Q(path__gt=root.path, path__lt=root.path + Comment.PATH_END)
+        threads = self.filter(ranges, post_id=roots[0].post_id)
+        if per_thread is not None:
+            threads = threads.annotate(thread_position=Window(
+                RowNumber(), partition_by=Substr('path', 1, Comment.PATH_SEGMENT_LENGTH), order_by='path',
+            )).filter(thread_position__lte=per_thread)
+        return threads.order_by('path')
+
+
+class Comment(CounterSourceMixin, models.Model):
+    """
+    Replies form a tree stored as a materialized path: `path` is the
+    fixed-width base-36 ids of the comment's ancestors and itself, so
+    sorting by path yields threads in depth-first order and a subtree is
+    the range `[path, path + PATH_END)`.
+    """
+    PATH_SEGMENT_LENGTH = 7
+    PATH_END = '~'
+    MAX_DEPTH = 16
+
+    tracked_fields = ('post_id', 'parent_id')
+
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     content = models.TextField()
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
     is_public = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'path']),
+            models.Index(fields=['post', 'parent', 'created_at', 'id']),
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"Comment on {self.post.title} by {self.user or 'Anonymous'}"
 
+    @classmethod
+    def path_segment(cls, pk):
+        digits = ''
+        while pk:
+            pk, digit = divmod(pk, 36)
+            digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+        return digits.rjust(cls.PATH_SEGMENT_LENGTH, '0')
+
+    def save(self, *args, **kwargs):
+        moved = not self._state.adding and 'parent_id' in self.tracked_changes()
+        old_path, old_depth = self.path, self.depth
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.path and not moved:
+                return
+            parent = Comment.objects.filter(pk=self.parent_id).values_list('path', 'depth').first()
+            if moved and parent is not None and parent[0].startswith(old_path):
+                raise ValueError('A comment cannot be moved under its own reply.')
+            self.path = (parent[0] if parent else '') + self.path_segment(self.pk)
+            self.depth = parent[1] + 1 if parent else 0
+            if not moved:
+                Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+                return
+            # Re-root the whole subtree under the new parent.
+            Comment.objects.filter(post_id=self.post_id, path__gte=old_path, path__lt=old_path + self.PATH_END).update(
+                path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (self.depth - old_depth),
+            )
+
+
+class PostLikeQuerySet(models.QuerySet):
+    def liked_ids(self, user, post_ids):
+        """The subset of `post_ids` `user` has liked, in one query."""
+        if not user.is_authenticated or not post_ids:
+            return set()
+        return set(self.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+
+    def toggle(self, post_id, user):
+        """
+        Like the post, or take the like back if there is one. Returns the
+        new like, or None when the post was unliked.
+
+        There is no single statement that deletes a row or else inserts it,
+        so the nearest is used: a conditional DELETE ... RETURNING decides,
+        and only when it removed nothing does an INSERT follow, both in one
+        transaction. On SQLite the DELETE takes the write lock, so
+        concurrent toggles by the same user run one after the other;
+        elsewhere the unique constraint stops a second like and the loser
+        returns the winner's. The deleted row goes through post_delete like
+        any other, so the counters and caches follow.
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM {} WHERE post_id = %s AND user_id = %s RETURNING id, post_id, user_id'.format(
+                        connection.ops.quote_name(self.model._meta.db_table)
+                    ),
+                    [post_id, user.pk],
+                )
+                deleted = [self.model.from_db(self.db, ['id', 'post_id', 'user_id'], row) for row in cursor.fetchall()]
+            for like in deleted:
+                post_delete.send(sender=self.model, instance=like, using=self.db, origin=like)
+            if deleted:
+                return None
+            try:
+                return self.create(post_id=post_id, user=user)
+            except IntegrityError:
+                like = self.filter(post_id=post_id, user=user).first()
+                if like is None:
+                    raise
+                return like
+
+
+class PostLike(CounterSourceMixin, models.Model):
+    tracked_fields = ('post_id',)
 
-class PostLike(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PostLikeQuerySet.as_manager()
+
     class Meta:
         unique_together = ('post', 'user')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user} liked {self.post.title}"
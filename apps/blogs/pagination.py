@@ -0,0 +1,23 @@
+from core.pagination import KeysetPagination
+
+
+class PostCursorPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    ordering_fields = ('-published_at', 'published_at')
+    default_ordering = '-published_at'
+
+
+class CommentThreadPagination(KeysetPagination):
+    """Pages of top-level comments; their replies come along in one range query."""
+    page_size = 10
+    max_page_size = 50
+    ordering_fields = ('-created_at', 'created_at')
+    default_ordering = '-created_at'
+
+
+class CommentSubtreePagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+    ordering_fields = ('path', )
+    default_ordering = 'path'
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Max
 from rest_framework import serializers
 from rest_framework.relations import PrimaryKeyRelatedField
 
@@ -56,13 +57,21 @@ class InlineProfileSerializer(serializers.ModelSerializer):
         return value
 
 
+class InlineAuthorSerializer(serializers.ModelSerializer):
+    profile = InlineProfileSerializer(source='author', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name', 'profile')
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     author = InlineProfileSerializer()
     posts = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'first_name', 'last_name', 'email', 'author')
+        fields = ('id', 'username', 'first_name', 'last_name', 'email', 'author', 'posts')
 
     def validate_username(self, value):
         if User.objects.filter(username=value).exists():
@@ -89,7 +98,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         return value
 
     def get_posts(self, user):
-        return Post.objects.filter(author=user)
+        return list(Post.objects.filter(author=user).values('id', 'title', 'slug', 'status', 'published_at'))
 
 
     def update(self, instance, validated_data):
@@ -128,18 +137,18 @@ class InlineImagesSerializer(serializers.ModelSerializer):
 class PostListCreateSerializer(serializers.ModelSerializer):
     tags = InlineTagsModelSerializer(many=True, read_only=True)
     category = InlineCategorySerializer(read_only=True)
-    author = InlineProfileSerializer(read_only=True)
+    author = InlineAuthorSerializer(read_only=True)
     images = InlineImagesSerializer(many=True, read_only=True)
     images_id = PrimaryKeyRelatedField(queryset=Post.objects.all(), write_only=True, many=True)
     category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), write_only=True)
     tags_id = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True, write_only=True)
-    likes_count = serializers.SerializerMethodField(read_only=True)
-    comments_count = serializers.SerializerMethodField(read_only=True)
+    is_liked = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Post
         fields = ['id', 'title', 'slug', 'excerpt', 'content', 'category',
-                  'tags', 'author', 'status', 'category_id', 'tags_id']
+                  'tags', 'author', 'status', 'category_id', 'tags_id',
+                  'images', 'images_id', 'likes_count', 'comments_count', 'is_liked']
         extra_kwargs = {
             'id': {'read_only': True},
             'slug': {'read_only': True},
@@ -168,24 +177,27 @@ class PostListCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Category is required.")
         return value
 
-    def get_likes_count(self, post):
-        return post.likes.count()
-
-    def get_comments_count(self, post):
-        return post.comments.count()
+    def get_is_liked(self, post):
+        # List views resolve the whole page at once into `liked_ids`.
+        liked_ids = self.context.get('liked_ids')
+        if liked_ids is not None:
+            return post.pk in liked_ids
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return post.likes.filter(user=request.user).exists()
 
 
 class PostRetrieveUpdateDestroySerializer(serializers.ModelSerializer):
     tags = InlineTagsModelSerializer(many=True, read_only=True)
     category = InlineCategorySerializer(read_only=True)
-    author = InlineProfileSerializer(read_only=True)
-    likes_count = serializers.SerializerMethodField(read_only=True)
-    comments_count = serializers.SerializerMethodField(read_only=True)
+    author = InlineAuthorSerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), write_only=True)
     tags_id = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True, write_only=True)
     class Meta:
         model = Post
-        fields = ('id', 'title', 'slug', 'excerpt', 'content', 'category', 'author', 'tags', 'category_id', 'tags_id')
+        fields = ('id', 'title', 'slug', 'excerpt', 'content', 'category', 'author', 'tags', 'category_id', 'tags_id',
+                  'likes_count', 'comments_count')
         extra_kwargs = {
             'id': {'read_only': True},
             'slug': {'read_only': True},
@@ -214,12 +226,6 @@ class PostRetrieveUpdateDestroySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Category is required.")
         return value
 
-    def get_likes_count(self, post):
-        return post.likes.count()
-
-    def get_comments_count(self, post):
-        return post.comments.count()
-
 
 class InlineUserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -235,6 +241,25 @@ class InlineCommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'content', 'user')
 
 
+class ThreadCommentSerializer(serializers.ModelSerializer):
+    user = InlineUserSerializer(read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ('id', 'content', 'user', 'parent_id', 'depth', 'reply_count', 'created_at')
+
+
+class CommentThreadSerializer(ThreadCommentSerializer):
+    replies = serializers.SerializerMethodField()
+
+    class Meta(ThreadCommentSerializer.Meta):
+        fields = ThreadCommentSerializer.Meta.fields + ('replies', )
+
+    def get_replies(self, comment):
+        # Descendants in thread order, collected by the view from one range query.
+        return ThreadCommentSerializer(self.context['replies'].get(comment.pk, []), many=True).data
+
+
 class CommentListCreateSerializer(serializers.ModelSerializer):
     user = InlineUserSerializer(read_only=True)
     parent = InlineCommentSerializer(read_only=True)
@@ -282,7 +307,16 @@ class CommentRetrieveUpdateDestroySerializer(serializers.ModelSerializer):
     def validate_parent_id(self, parent):
         if parent and not Comment.objects.filter(id=parent.id).exists():
             raise serializers.ValidationError("Parent must be exists.")
-        return parent.id
+        if parent and self.instance is not None:
+            comment = self.instance
+            if parent.post_id != comment.post_id:
+                raise serializers.ValidationError("Parent must belong to the same post.")
+            if parent.path.startswith(comment.path):
+                raise serializers.ValidationError("A comment cannot be moved under its own reply.")
+            deepest = Comment.objects.subtree(comment).aggregate(depth=Max('depth'))['depth'] or comment.depth
+            if parent.depth + 1 + deepest - comment.depth >= Comment.MAX_DEPTH:
+                raise serializers.ValidationError(f"Replies can be nested at most {Comment.MAX_DEPTH} levels deep.")
+        return parent.id if parent else None
 
 
 class LikeCreateSerializer(serializers.ModelSerializer):
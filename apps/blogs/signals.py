@@ -1,9 +1,181 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.db.models import F
 from django.dispatch import receiver
 from django.conf import settings
-from .models import AuthorProfile
+from django.utils import timezone
+from .models import AuthorProfile, Category, Comment, Post, PostImage, PostLike, Tag, User
+from core.cache import post_detail_cache, profile_cache
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_author_profile(sender, instance, created, **kwargs):
     if created:
-        AuthorProfile.objects.create(user=instance)
\ No newline at end of file
+        AuthorProfile.objects.create(user=instance)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None, **kwargs):
+    if instance.pk and not raw and (update_fields is None or 'username' in update_fields):
+        instance._old_username = User.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    profile_cache.invalidate(instance.username, getattr(instance, '_old_username', None))
+
+
+@receiver(post_save, sender=AuthorProfile)
+@receiver(post_delete, sender=AuthorProfile)
+def invalidate_author_profile(sender, instance, **kwargs):
+    profile_cache.invalidate(*User.objects.filter(pk=instance.user_id).values_list('username', flat=True))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    post_detail_cache.invalidate(instance.pk)
+    profile_cache.invalidate(*User.objects.filter(pk=instance.author_id).values_list('username', flat=True))
+
+
+def touch_posts(pks, tags=False):
+    """
+    Bump `changed_at` on posts whose rendering changed through another row,
+    and drop their details. A change to the set of `tags` also bumps
+    `updated_at`, so the related-content index folds the posts in again.
+    """
+    pks = list(pks)
+    if pks:
+        now = timezone.now()
+        Post.objects.filter(pk__in=pks).update(changed_at=now, **({'updated_at': now} if tags else {}))
+        post_detail_cache.invalidate(*pks)
+
+
+@receiver(post_delete, sender=Post)
+def touch_deleted_post_author(sender, instance, **kwargs):
+    # The post leaves the feed without leaving a row to carry the change.
+    AuthorProfile.objects.filter(user=instance.author_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_posts(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Posts render the author's names; a deleted user takes their posts along.
+    rendered = {'username', 'first_name', 'last_name'}
+    if raw or created or (update_fields is not None and not rendered & set(update_fields)):
+        return
+    AuthorProfile.objects.filter(user=instance).update(updated_at=timezone.now())
+    post_detail_cache.invalidate(*Post.objects.filter(author=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=AuthorProfile)
+def invalidate_author_posts(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    post_detail_cache.invalidate(*Post.objects.filter(author=instance.user_id).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_posts(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    post_detail_cache.invalidate(*instance.posts.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+def touch_classified_posts(sender, instance, created=False, raw=False, **kwargs):
+    # A deleted category is handled before the row goes, as it is nulled
+    # out of its posts without signals.
+    if raw or created:
+        return
+    touch_posts(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_untagged_posts(sender, instance, **kwargs):
+    # The tag links are removed without signals once the tag goes.
+    touch_posts(instance.posts.values_list('pk', flat=True), tags=True)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_tagged_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_posts([instance.pk], tags=True)
+    elif action in ('post_add', 'post_remove'):
+        touch_posts(pk_set, tags=True)
+    elif action == 'pre_clear':
+        touch_posts(instance.posts.values_list('pk', flat=True), tags=True)
+
+
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+def touch_image_post(sender, instance, raw=False, **kwargs):
+    # Only the feed renders images.
+    if not raw:
+        Post.objects.filter(pk=instance.post_id).update(changed_at=timezone.now())
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+def invalidate_post_activity(sender, instance, **kwargs):
+    old_post = instance.tracked_changes().get('post_id', (None,))[0]
+    post_detail_cache.invalidate(instance.post_id, old_post)
+
+
+@receiver(post_save, sender=PostLike)
+def count_saved_like(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Post.objects.filter(pk=instance.post_id).adjust_counters(likes=1)
+        return
+    changes = instance.tracked_changes()
+    if 'post_id' in changes:
+        old_post, new_post = changes['post_id']
+        Post.objects.filter(pk=old_post).adjust_counters(likes=-1)
+        Post.objects.filter(pk=new_post).adjust_counters(likes=1)
+
+
+@receiver(post_delete, sender=PostLike)
+def count_deleted_like(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).adjust_counters(likes=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Post.objects.filter(pk=instance.post_id).adjust_counters(comments=1)
+        return
+    changes = instance.tracked_changes()
+    if 'post_id' in changes:
+        old_post, new_post = changes['post_id']
+        Post.objects.filter(pk=old_post).adjust_counters(comments=-1)
+        Post.objects.filter(pk=new_post).adjust_counters(comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).adjust_counters(comments=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_reply(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_parent, new_parent = instance.tracked_changes().get('parent_id', (None, None))
+    if created:
+        new_parent = instance.parent_id
+    if old_parent is not None:
+        Comment.objects.filter(pk=old_parent).update(reply_count=F('reply_count') - 1)
+    if new_parent is not None:
+        Comment.objects.filter(pk=new_parent).update(reply_count=F('reply_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_reply(sender, instance, **kwargs):
+    if instance.parent_id is not None:
+        Comment.objects.filter(pk=instance.parent_id).update(reply_count=F('reply_count') - 1)
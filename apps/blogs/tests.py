@@ -1,3 +1,314 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from apps.blogs.buffers import PostViewBuffer, post_views
+from apps.blogs.models import AuthorProfile, Category, Comment, Post, PostImage, PostLike, PostLikeQuerySet, Tag
+
+User = get_user_model()
+
+
+class PostFeedQueryBudgetTests(APITestCase):
+    # validators, page, tags, images, liked ids
+    query_budget = 5
+
+    def setUp(self):
+        caches['responses'].clear()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        category = Category.objects.create(name='Django')
+        tags = [Tag.objects.create(name=f'tag-{index}') for index in range(3)]
+        self.posts = []
+        for index in range(25):
+            post = Post.objects.create(
+                author=self.author, category=category, title=f'Post number {index}', content='c' * 40,
+                status=Post.STATUS_PUBLISHED,
+            )
+            post.tags.set(tags)
+            PostImage.objects.create(post=post, image='posts/images/cover.png')
+            self.posts.append(post)
+        PostLike.objects.create(post=self.posts[-1], user=self.reader)
+
+    def test_feed_page_within_budget(self):
+        self.client.force_authenticate(self.reader)
+        with self.assertNumQueries(self.query_budget):
+            response = self.client.get('/blogs/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0]['id'], self.posts[-1].pk)
+        self.assertTrue(results[0]['is_liked'])
+        self.assertEqual(results[0]['author']['username'], 'author')
+        self.assertEqual(len(results[0]['tags']), 3)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        with self.assertNumQueries(self.query_budget - 1):
+            response = self.client.get('/blogs/', {'page_size': 25})
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_cursor_walks_every_post_once(self):
+        seen = []
+        url = '/blogs/'
+        while url:
+            response = self.client.get(url)
+            seen.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(post.pk for post in self.posts))
+
+
+class PostDetailCacheTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.author = User.objects.create(username='author')
+        self.category = Category.objects.create(name='Django')
+        self.tag = Tag.objects.create(name='orm')
+        self.post = Post.objects.create(
+            author=self.author, category=self.category, title='Cached post', content='c' * 40,
+            status=Post.STATUS_PUBLISHED,
+        )
+        self.post.tags.add(self.tag)
+        self.url = f'/blogs/{self.post.pk}/'
+        # Detail reads count views; write them while this test's rows exist.
+        self.addCleanup(post_views.flush)
+        self.client.get(self.url)
+
+    def test_author_edits_refresh_detail(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Grace'
+            self.author.save()
+            profile = AuthorProfile.objects.get(user=self.author)
+            profile.bio = 'Writes about Django'
+            profile.save()
+
+        author = self.client.get(self.url).data['author']
+        self.assertEqual(author['first_name'], 'Grace')
+        self.assertEqual(author['profile']['bio'], 'Writes about Django')
+
+    def test_category_and_tag_edits_refresh_detail(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Web'
+            self.category.save()
+            self.tag.name = 'queries'
+            self.tag.save()
+        data = self.client.get(self.url).data
+        self.assertEqual(data['category']['name'], 'Web')
+        self.assertEqual([tag['name'] for tag in data['tags']], ['queries'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+            Tag.objects.create(name='migrations').posts.add(self.post)
+        data = self.client.get(self.url).data
+        self.assertIsNone(data['category'])
+        self.assertEqual(sorted(tag['name'] for tag in data['tags']), ['migrations', 'queries'])
+
+
+class PostConditionalGetTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        self.tag = Tag.objects.create(name='orm')
+        self.post, self.other = [
+            Post.objects.create(
+                author=self.author, category=Category.objects.create(name=title), title=title, content='c' * 40,
+                status=Post.STATUS_PUBLISHED,
+            )
+            for title in ('First post', 'Second post')
+        ]
+        self.post.tags.add(self.tag)
+        self.url = f'/blogs/{self.post.pk}/'
+        self.addCleanup(post_views.flush)
+
+    def backdate(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Post.objects.update(changed_at=hour_ago)
+        AuthorProfile.objects.update(updated_at=hour_ago)
+        Category.objects.update(updated_at=hour_ago)
+        return http_date(hour_ago.timestamp())
+
+    def assert_modified(self, url, last_modified, etag):
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_post_is_not_modified(self):
+        last_modified = self.backdate()
+        for url in (self.url, '/blogs/'):
+            response = self.client.get(url)
+            self.assertEqual(response['Last-Modified'], last_modified)
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_likes_change_validators(self):
+        last_modified = self.backdate()
+        etags = {url: self.client.get(url)['ETag'] for url in (self.url, '/blogs/')}
+        PostLike.objects.create(post=self.post, user=self.reader)
+        for url, etag in etags.items():
+            self.assert_modified(url, last_modified, etag)
+
+    def test_liked_flags_are_part_of_the_feed_etag(self):
+        like = PostLike.objects.create(post=self.post, user=self.author)
+        self.client.force_authenticate(self.reader)
+        etag = self.client.get('/blogs/')['ETag']
+
+        # Hand the like over without touching any counter.
+        PostLike.objects.filter(pk=like.pk).update(user=self.reader)
+        response = self.client.get('/blogs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(next(post['is_liked'] for post in response.data['results'] if post['id'] == self.post.pk))
+
+    def test_author_and_tag_edits_change_validators(self):
+        for edit in (self.rename_author, self.edit_profile, self.rename_tag, self.retag):
+            last_modified = self.backdate()
+            etags = {url: self.client.get(url)['ETag'] for url in (self.url, '/blogs/')}
+            edit()
+            for url, etag in etags.items():
+                self.assert_modified(url, last_modified, etag)
+
+    def rename_author(self):
+        self.author.first_name = 'Grace'
+        self.author.save()
+
+    def edit_profile(self):
+        profile = AuthorProfile.objects.get(user=self.author)
+        profile.bio = 'Writes about Django'
+        profile.save()
+
+    def rename_tag(self):
+        self.tag.name = 'queries'
+        self.tag.save()
+
+    def retag(self):
+        self.post.tags.clear()
+
+    def test_deleted_post_moves_feed_last_modified(self):
+        last_modified = self.backdate()
+        etag = self.client.get('/blogs/')['ETag']
+        self.other.delete()
+        self.assert_modified('/blogs/', last_modified, etag)
+
+
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='reader')
+        self.post, self.other = [
+            Post.objects.create(author=self.user, title=title, content='c' * 40, status=Post.STATUS_PUBLISHED)
+            for title in ('First post', 'Second post')
+        ]
+        self.client.force_authenticate(self.user)
+
+    def counts(self, post):
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.likes_count, post.likes.count())
+        self.assertEqual(post.comments_count, post.comments.count())
+        return post.likes_count, post.comments_count
+
+    def test_like_toggles_keep_likes_count(self):
+        url = f'/blogs/{self.post.pk}/like/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.counts(self.post), (1, 0))
+        self.assertEqual(self.client.post(url).status_code, 204)
+        self.assertEqual(self.counts(self.post), (0, 0))
+
+    def test_toggle_racing_another_like_returns_it(self):
+        def racing_create(queryset, **kwargs):
+            # The other request's like lands between this toggle's DELETE and INSERT.
+            QuerySet.create(PostLike.objects.all(), **kwargs)
+            return QuerySet.create(queryset, **kwargs)
+
+        with mock.patch.object(PostLikeQuerySet, 'create', racing_create):
+            like = PostLike.objects.toggle(self.post.pk, self.user)
+        self.assertEqual(like, PostLike.objects.get())
+        self.assertEqual(self.counts(self.post), (1, 0))
+
+    def test_view_flush_commits_all_chunks_or_none(self):
+        buffer = PostViewBuffer(interval=60)
+        buffer.chunk_size = 1
+        self.addCleanup(buffer.stop)
+        buffer.add(self.post.pk, 2)
+        buffer.add(self.other.pk, 3)
+
+        update = QuerySet.update
+        calls = []
+
+        def fail_second_chunk(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise DatabaseError('disk I/O error')
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', fail_second_chunk), self.assertLogs('core.buffers', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('views', flat=True)), [0, 0])
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('views', flat=True)), [2, 3])
+
+    def test_comment_writes_keep_comments_count(self):
+        comment = Comment.objects.create(post=self.post, user=self.user, content='hello there')
+        self.assertEqual(self.counts(self.post), (0, 1))
+        comment.post = self.other
+        comment.save()
+        self.assertEqual((self.counts(self.post), self.counts(self.other)), ((0, 0), (0, 1)))
+        comment.delete()
+        self.assertEqual(self.counts(self.other), (0, 0))
+
+
+class CommentThreadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='commenter')
+        self.post = Post.objects.create(
+            author=self.user, title='Threaded post', content='c' * 40, status=Post.STATUS_PUBLISHED,
+        )
+
+    def reply(self, parent=None):
+        return Comment.objects.create(post=self.post, user=self.user, content='hello there', parent=parent)
+
+    def test_page_of_threads_in_two_queries(self):
+        first, second = self.reply(), self.reply()
+        child = self.reply(first)
+        grandchild = self.reply(child)
+        sibling = self.reply(first)
+        other = self.reply(second)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/blogs/{self.post.pk}/comments/')
+        threads = {thread['id']: [reply['id'] for reply in thread['replies']] for thread in response.data['results']}
+        self.assertEqual(threads, {first.pk: [child.pk, grandchild.pk, sibling.pk], second.pk: [other.pk]})
+        first.refresh_from_db()
+        self.assertEqual(first.reply_count, 2)
+        self.assertEqual(Comment.objects.get(pk=grandchild.pk).depth, 2)
+
+    def test_replies_are_capped_per_thread(self):
+        busy, quiet = self.reply(), self.reply()
+        busy_replies = [self.reply(busy) for _ in range(3)]
+        quiet_reply = self.reply(quiet)
+
+        with mock.patch('apps.blogs.views.CommentListCreateAPIView.replies_per_thread', 2):
+            response = self.client.get(f'/blogs/{self.post.pk}/comments/')
+        threads = {thread['id']: [reply['id'] for reply in thread['replies']] for thread in response.data['results']}
+        self.assertEqual(threads, {busy.pk: [reply.pk for reply in busy_replies[:2]], quiet.pk: [quiet_reply.pk]})
+        self.assertTrue(response.data['replies_truncated'])
+
+    def test_full_thread_is_not_truncated(self):
+        root = self.reply()
+        replies = [self.reply(root) for _ in range(2)]
+
+        with mock.patch('apps.blogs.views.CommentListCreateAPIView.replies_per_thread', 2):
+            response = self.client.get(f'/blogs/{self.post.pk}/comments/')
+        thread = response.data['results'][0]['replies']
+        self.assertEqual([reply['id'] for reply in thread], [reply.pk for reply in replies])
+        self.assertFalse(response.data['replies_truncated'])
+
+    def test_subtree_endpoint(self):
+        root = self.reply()
+        replies = [self.reply(root) for _ in range(3)]
+        response = self.client.get(f'/blogs/comment/{root.pk}/replies/')
+        self.assertEqual([reply['id'] for reply in response.data['results']], [reply.pk for reply in replies])
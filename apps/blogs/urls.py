@@ -1,13 +1,16 @@
 from django.urls import path
 
 from apps.blogs import views
+from apps.recommendations.views import RelatedPostsAPIView
 
 app_name = 'blogs'
 
 urlpatterns = [
     path('', views.PostListCreateAPIView.as_view(), name='list'),
     path('<int:pk>/', views.PostRetrieveUpdateDestroyAPIView.as_view(), name='retrieve'),
+    path('<int:pk>/related/', RelatedPostsAPIView.as_view(), name='related'),
     path('<int:pk>/comments/', views.CommentListCreateAPIView.as_view(), name='comment-list'),
     path('comment/<int:pk>/', views.CommentRetrieveUpdateDestroyAPIView.as_view(), name='comment-retrieve'),
+    path('comment/<int:pk>/replies/', views.CommentRepliesAPIView.as_view(), name='comment-replies'),
     path('<int:pk>/like/', views.LikeCreateDeleteAPIView.as_view(), name='like-create'),
 ]
\ No newline at end of file
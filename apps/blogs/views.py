@@ -1,21 +1,69 @@
 from django.contrib.auth import get_user_model, authenticate
+from django.db import IntegrityError
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.utils.decorators import method_decorator
 from django.utils.text import slugify
 from rest_framework import status
-from rest_framework.exceptions import PermissionDenied, ValidationError
-from rest_framework.generics import CreateAPIView, get_object_or_404, RetrieveUpdateDestroyAPIView, ListCreateAPIView
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.generics import CreateAPIView, get_object_or_404, RetrieveUpdateDestroyAPIView, ListCreateAPIView, \
+    ListAPIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from apps.blogs.models import Post, Category, Tag, PostImage, Comment, PostLike
+from apps.blogs.buffers import post_views
+from apps.blogs.models import AuthorProfile, Post, Category, Tag, PostImage, Comment, PostLike
+from apps.blogs.pagination import CommentSubtreePagination, CommentThreadPagination, PostCursorPagination
 from apps.blogs.serializers import RegisterSerializer, ProfileSerializer, PostListCreateSerializer, \
     PostRetrieveUpdateDestroySerializer, CommentListCreateSerializer, CommentRetrieveUpdateDestroySerializer, \
-    LikeCreateSerializer
+    LikeCreateSerializer, CommentThreadSerializer, ThreadCommentSerializer
+from core.cache import post_detail_cache, profile_cache
+from core.conditional import conditional, latest, newest
 
 User = get_user_model()
 
+
+def post_list_validators(request):
+    posts = Post.objects.filter(status='published', published_at__isnull=False)
+    search = request.GET.get('search')
+    if search:
+        posts = posts.search(search)
+    flags = {}
+    if request.user.is_authenticated:
+        # The `is_liked` flags: likes by this user among the listed posts.
+        like = Subquery(PostLike.objects.filter(post=OuterRef('pk'), user=request.user).values('pk')[:1])
+        flags = {'liked': Count(like), 'last_like': Max(like)}
+    state = posts.order_by().aggregate(
+        changed_at=Max('changed_at'),
+        count=Count('pk'),
+        likes=Sum('likes_count'),
+        comments=Sum('comments_count'),
+        authors_updated_at=Max('author__author__updated_at'),
+        categories_updated_at=Max('category__updated_at'),
+        **flags,
+        # Dated by the whole tables: a post leaving the feed bumps its own
+        # `changed_at`, or its author's profile when deleted.
+        posts_changed_at=Max(latest(Post.objects.all(), 'changed_at')),
+        authors_last_updated_at=Max(latest(AuthorProfile.objects.all(), 'updated_at')),
+        categories_last_updated_at=Max(latest(Category.objects.all(), 'updated_at')),
+    )
+    last_modified = newest(
+        state.pop('posts_changed_at'), state.pop('authors_last_updated_at'), state.pop('categories_last_updated_at'),
+    )
+    return (request.user.pk, sorted(request.GET.lists()), *state.values()), last_modified
+
+
+def post_detail_validators(request, pk):
+    state = Post.objects.filter(pk=pk).values_list(
+        'changed_at', 'category__updated_at', 'author__author__updated_at', 'likes_count', 'comments_count',
+    ).first()
+    if state is None:
+        return None
+    return state, newest(*state[:3])
+
+
 class RegisterAPIView(CreateAPIView):
     serializer_class = RegisterSerializer
     queryset = User.objects.all()
@@ -67,6 +115,12 @@ class ProfileAPIView(RetrieveUpdateDestroyAPIView):
         print(f'Current user {self.request.user}')
         return user
 
+    def get(self, request, *args, **kwargs):
+        data = profile_cache.get_or_compute(
+            self.kwargs['username'], lambda: self.get_serializer(self.get_object()).data
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
     def put(self, request, *args, **kwargs):
         return self.update(request, *args, **kwargs)
 
@@ -78,13 +132,21 @@ class ProfileAPIView(RetrieveUpdateDestroyAPIView):
 
 
 
+@method_decorator(conditional(post_list_validators, vary=('Authorization',)), name='get')
 class PostListCreateAPIView(ListCreateAPIView):
     serializer_class = PostListCreateSerializer
     queryset = Post.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly, )
+    pagination_class = PostCursorPagination
 
     def get_queryset(self):
-        return Post.objects.filter(status='published')
+        posts = Post.objects.filter(status='published', published_at__isnull=False).select_related(
+            'category', 'author__author'
+        ).prefetch_related('tags', 'images')
+        search = self.request.GET.get('search')
+        if search:
+            posts = posts.search(search)
+        return posts
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -92,6 +154,21 @@ class PostListCreateAPIView(ListCreateAPIView):
     def post(self, request, *args, **kwargs):
         return self.create(request, *args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        posts = list(queryset) if page is None else page
+        self.liked_ids = PostLike.objects.liked_ids(request.user, [post.pk for post in posts])
+        serializer = self.get_serializer(posts, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['liked_ids'] = getattr(self, 'liked_ids', None)
+        return context
+
     def perform_create(self, serializer):
         category_id = self.request.data.pop('category_id')
         tags_id = self.request.data.pop('tags_id')
@@ -133,18 +210,27 @@ class PostListCreateAPIView(ListCreateAPIView):
         post.images.set(*images)
 
 
+@method_decorator(conditional(post_detail_validators), name='get')
 class PostRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
     serializer_class = PostRetrieveUpdateDestroySerializer
     queryset = Post.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly, )
 
     def get_object(self):
-        post = get_object_or_404(Post, id=self.kwargs['pk'])
+        posts = Post.objects.select_related('category', 'author__author').prefetch_related('tags')
+        post = get_object_or_404(posts, id=self.kwargs['pk'])
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
             if self.request.user != post.author:
                 raise PermissionDenied("You cannot modify another user's posts.")
         return post
 
+    def get(self, request, *args, **kwargs):
+        data = post_detail_cache.get_or_compute(
+            self.kwargs['pk'], lambda: self.get_serializer(self.get_object()).data
+        )
+        post_views.add(self.kwargs['pk'])
+        return Response(data, status=status.HTTP_200_OK)
+
     def put(self, request, *args, **kwargs):
         return self.update(request, *args, **kwargs)
 
@@ -195,12 +281,16 @@ class CommentListCreateAPIView(ListCreateAPIView):
     serializer_class = CommentListCreateSerializer
     queryset = Comment.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly, )
+    pagination_class = CommentThreadPagination
+    replies_per_thread = 20
 
     def get_object(self):
         return get_object_or_404(Post, id=self.kwargs['pk'])
 
     def get_queryset(self):
-        return Comment.objects.filter(is_public=True, post_id=self.kwargs['pk']).order_by('-created_at')
+        return Comment.objects.filter(
+            is_public=True, post_id=self.kwargs['pk'], parent__isnull=True
+        ).select_related('user')
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -208,6 +298,35 @@ class CommentListCreateAPIView(ListCreateAPIView):
     def post(self, request, *args, **kwargs):
         return self.create(request, *args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        """
+        A page of top-level comments, each with its replies in thread order.
+        All replies of the page come from one query over the roots' `path`
+        ranges, capped at `replies_per_thread` per root; threads cut short
+        can be continued through the comment's replies endpoint. One extra
+        reply per root is read to tell a full thread from a cut one.
+        """
+        roots = self.paginate_queryset(self.get_queryset())
+        descendants = list(
+            Comment.objects.threads(roots, self.replies_per_thread + 1).filter(is_public=True).select_related('user')
+        )
+        roots_by_segment = {root.path: root.pk for root in roots}
+        replies = {}
+        for comment in descendants:
+            root_id = roots_by_segment.get(comment.path[:Comment.PATH_SEGMENT_LENGTH])
+            if root_id is not None:
+                replies.setdefault(root_id, []).append(comment)
+        truncated = False
+        for root_id, thread in replies.items():
+            if len(thread) > self.replies_per_thread:
+                replies[root_id] = thread[:self.replies_per_thread]
+                truncated = True
+
+        serializer = CommentThreadSerializer(roots, many=True, context={'replies': replies})
+        response = self.get_paginated_response(serializer.data)
+        response.data['replies_truncated'] = truncated
+        return response
+
     def perform_create(self, serializer):
         post = self.get_object()
         content = self.request.data.get('content')
@@ -216,10 +335,25 @@ class CommentListCreateAPIView(ListCreateAPIView):
             parent = Comment.objects.filter(id=parent_id).first()
         else:
             parent = None
+        if parent is not None:
+            if parent.post_id != post.id:
+                raise ValidationError({'parent_id': 'Parent must belong to the same post.'})
+            if parent.depth + 1 >= Comment.MAX_DEPTH:
+                raise ValidationError({'parent_id': f'Replies can be nested at most {Comment.MAX_DEPTH} levels deep.'})
 
         serializer.save(user=self.request.user, content=content, parent=parent, post=post)
 
 
+class CommentRepliesAPIView(ListAPIView):
+    """Every reply below a comment, at any depth, in thread order."""
+    serializer_class = ThreadCommentSerializer
+    pagination_class = CommentSubtreePagination
+
+    def get_queryset(self):
+        comment = get_object_or_404(Comment, id=self.kwargs['pk'])
+        return Comment.objects.subtree(comment).filter(is_public=True).select_related('user')
+
+
 class CommentRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
     serializer_class = CommentRetrieveUpdateDestroySerializer
     queryset = Comment.objects.all()
@@ -247,27 +381,14 @@ class CommentRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
 class LikeCreateDeleteAPIView(APIView):
     model = PostLike
 
-    def get_object(self):
-        return get_object_or_404(Post, id=self.kwargs['pk'])
-
     def post(self, request, *args, **kwargs):
-        post = self.get_object()
-        like = PostLike.objects.filter(post=post, user=self.request.user).first()
-        if like:
-            like.delete()
+        try:
+            like = PostLike.objects.toggle(self.kwargs['pk'], request.user)
+        except IntegrityError:
+            raise NotFound('No Post matches the given query.')
+        if like is None:
             return Response({'detail':'You dislike this post!'}, status=status.HTTP_204_NO_CONTENT)
 
-        like = PostLike.objects.create(post=post, user=request.user)
         serializer = LikeCreateSerializer(like)
         return Response({'detail':'You liked this post!',
                          **serializer.data}, status=status.HTTP_201_CREATED)
-
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,109 @@
+from collections import Counter, defaultdict
+
+from apps.course.models import Course, Instructor
+from core.cache import course_detail_cache, instructor_cache
+from core.counters import DeletionState, deleted_directly
+
+INSTRUCTOR_TOTALS = ('students', 'reviews', 'rating')
+
+
+def adjust_course_counters(course_id, students=0, reviews=0, rating=0, stars=None):
+    """
+    Apply enrollment and review deltas to a course and to its instructor's
+    running totals. The instructor is cached as a fragment of its own, so
+    only that fragment and this course's detail are dropped.
+    """
+    instructor_id = Course.objects.filter(pk=course_id).values_list('instructor_id', flat=True).first()
+    Course.objects.filter(pk=course_id).adjust_counters(students=students, reviews=reviews, rating=rating, stars=stars)
+    Instructor.objects.filter(pk=instructor_id).adjust_counters(students=students, reviews=reviews, rating=rating)
+    course_detail_cache.invalidate(course_id)
+    instructor_cache.invalidate(instructor_id)
+
+
+def _cascade_state():
+    return {'courses': {}, 'sections': {}, 'deltas': defaultdict(Counter)}
+
+
+# The courses and sections a deletion removes, and the counter deltas of
+# the rows it removes from courses that stay.
+cascade = DeletionState(_cascade_state)
+
+
+def note_deleted_course(origin, course_id):
+    """
+    Record that `origin` removes the course, and take its totals off its
+    instructor once the deletion finishes. Must run before the row goes.
+    """
+    row = Course.objects.filter(pk=course_id).values_list(
+        'instructor_id', 'students_count', 'reviews_count', 'rating_sum'
+    ).first()
+    if row is not None:
+        cascade.get(origin)['courses'][course_id] = row
+
+
+def note_deleted_section(origin, section_id, course_id):
+    cascade.get(origin)['sections'][section_id] = course_id
+
+
+def course_deleted_with(origin, course_id):
+    """Whether `course_id` goes in the same deletion; its rows then need no counters."""
+    return course_id in cascade.get(origin)['courses']
+
+
+def section_course(origin, section_id):
+    """The course of a section that goes in the same deletion, or None."""
+    return cascade.get(origin)['sections'].get(section_id)
+
+
+def adjust_deleted_course_counters(origin, model, course_id, **deltas):
+    """
+    Apply the counter deltas of a deleted `model` row. A row deleted on
+    its own is applied right away; rows removed by a cascade from
+    elsewhere are summed and applied once per course and instructor by
+    `apply_cascaded_counters()`; rows of a deleted course are skipped.
+    """
+    if course_deleted_with(origin, course_id):
+        return
+    if deleted_directly(origin, model):
+        adjust_course_counters(course_id, **deltas)
+        return
+    totals = cascade.get(origin)['deltas'][course_id]
+    for name, value in deltas.items():
+        if name == 'stars':
+            totals.update({('stars', star): delta for star, delta in value.items()})
+        else:
+            totals[name] += value
+
+
+def apply_cascaded_counters(origin):
+    """Apply what the deletion started by `origin` summed up, in a few UPDATEs."""
+    state = cascade.pop(origin)
+    instructors = defaultdict(Counter)
+    # Instructors losing a course are updated even without totals to take
+    # off, as their courses count changes.
+    recounted = set()
+    for instructor_id, students, reviews, rating_sum in state['courses'].values():
+        instructors[instructor_id].update(students=-students, reviews=-reviews, rating=-rating_sum)
+        recounted.add(instructor_id)
+
+    deltas = {course_id: totals for course_id, totals in state['deltas'].items() if any(totals.values())}
+    course_instructors = dict(Course.objects.filter(pk__in=deltas).values_list('pk', 'instructor_id')) if deltas else {}
+    for course_id, totals in deltas.items():
+        stars = {star: delta for (_, star), delta in _items(totals, tuple)}
+        counters = dict(_items(totals, str))
+        lessons_changed = bool(counters.get('lessons') or counters.get('duration'))
+        Course.objects.filter(pk=course_id).adjust_counters(stars=stars, touch=lessons_changed, **counters)
+        if course_id in course_instructors:
+            instructors[course_instructors[course_id]].update(
+                {name: counters[name] for name in INSTRUCTOR_TOTALS if name in counters}
+            )
+
+    instructors = {pk: totals for pk, totals in instructors.items() if pk in recounted or any(totals.values())}
+    for instructor_id, totals in instructors.items():
+        Instructor.objects.filter(pk=instructor_id).adjust_counters(touch=instructor_id in recounted, **totals)
+    course_detail_cache.invalidate(*deltas)
+    instructor_cache.invalidate(*instructors)
+
+
+def _items(totals, key_type):
+    return ((key, value) for key, value in totals.items() if isinstance(key, key_type) and value)
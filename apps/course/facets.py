@@ -0,0 +1,94 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.course.models import Course, CourseQuerySet
+
+PRICE_BUCKETS = (
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100-200', 100, 200),
+    ('200+', 200, None),
+)
+
+# Each facet is counted with every catalog filter applied except its own,
+# so the sidebar shows how many results picking another value would give.
+FACET_OWN_FILTERS = {
+    'category': ('cat_id',),
+    'level': ('level',),
+    'language': ('language',),
+    'price': ('min_price', 'max_price'),
+}
+FACET_PARAMS = CourseQuerySet.CATALOG_FILTERS + ('search',)
+
+
+def requested_facets(value):
+    if not value:
+        return []
+    if value.lower() in ('1', 'true', 'all'):
+        return list(FACET_OWN_FILTERS)
+    return [name for name in value.split(',') if name in FACET_OWN_FILTERS]
+
+
+# Bumped by course and category writes; the cached counts of older
+# generations are left to expire.
+GENERATION_KEY = 'catalog-facets:generation'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_catalog_facets():
+    """Start a new generation of cached facet counts once the transaction commits."""
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, uuid.uuid4().hex, None))
+
+
+def _cache_key(facet, params, generation):
+    payload = json.dumps([facet, params, generation], sort_keys=True)
+    return 'catalog-facets:' + hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def _count_facet(facet, courses):
+    if facet == 'category':
+        rows = courses.values('category_id', 'category__name').annotate(count=Count('pk')).order_by('-count', 'category_id')
+        return [{'value': row['category_id'], 'label': row['category__name'], 'count': row['count']} for row in rows]
+    if facet == 'price':
+        buckets = {}
+        for label, low, high in PRICE_BUCKETS:
+            condition = Q(price__gte=low)
+            if high is not None:
+                condition &= Q(price__lt=high)
+            buckets[label] = Count('pk', filter=condition)
+        counts = courses.aggregate(**buckets)
+        return [{'value': label, 'label': label, 'count': counts[label]} for label, _, _ in PRICE_BUCKETS]
+
+    labels = dict(Course.LEVEL_CHOICES) if facet == 'level' else {}
+    rows = courses.values(facet).annotate(count=Count('pk')).order_by('-count', facet)
+    return [{'value': row[facet], 'label': labels.get(row[facet], row[facet]), 'count': row['count']} for row in rows]
+
+
+def get_catalog_facets(params, facets):
+    """
+    Grouped counts for the requested catalog facets, one aggregate query per
+    facet, cached per filter combination for `CATALOG_FACETS_TIMEOUT` seconds
+    or until a course or category is written.
+    """
+    params = {name: params.get(name) for name in FACET_PARAMS if params.get(name)}
+    generation = _generation()
+    result = {}
+    for facet in facets:
+        facet_params = {name: value for name, value in params.items() if name not in FACET_OWN_FILTERS[facet]}
+        key = _cache_key(facet, facet_params, generation)
+        counts = cache.get(key)
+        if counts is None:
+            counts = _count_facet(facet, Course.objects.catalog(facet_params))
+            cache.set(key, counts, getattr(settings, 'CATALOG_FACETS_TIMEOUT', 60))
+        result[facet] = counts
+    return result
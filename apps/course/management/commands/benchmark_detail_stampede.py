@@ -0,0 +1,80 @@
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from apps.course.models import Course
+from apps.course.views import CourseDetailPutPatchDeleteAPIView
+from core.cache import course_detail_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire bursts of concurrent course detail requests at a cold cache entry and report how many database '
+        'queries each burst costs with and without single-flight.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help='Course id; defaults to the course with the most lessons.')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--bursts', type=int, default=5)
+
+    def handle(self, *args, **options):
+        pk = options['course']
+        if pk is None:
+            pk = Course.objects.order_by('-total_lessons', 'pk').values_list('pk', flat=True).first()
+        if pk is None or not Course.objects.filter(pk=pk).exists():
+            raise CommandError('No course to benchmark; create one or pass --course.')
+
+        view = CourseDetailPutPatchDeleteAPIView.as_view()
+        factory = APIRequestFactory()
+        original = course_detail_cache.single_flight
+        try:
+            for single_flight in (False, True):
+                course_detail_cache.single_flight = single_flight
+                queries, elapsed = [], []
+                for _ in range(options['bursts']):
+                    course_detail_cache.backend.delete(course_detail_cache.key(pk))
+                    burst_queries, burst_elapsed = self.burst(view, factory, pk, options['concurrency'])
+                    queries.append(burst_queries)
+                    elapsed.append(burst_elapsed)
+                label = 'single-flight' if single_flight else 'no single-flight'
+                self.stdout.write(
+                    f'{label:>16}: {options["concurrency"]} concurrent misses x {options["bursts"]} bursts, '
+                    f'queries per burst min={min(queries)} max={max(queries)}, '
+                    f'slowest burst {max(elapsed) * 1000:.1f} ms'
+                )
+        finally:
+            course_detail_cache.single_flight = original
+
+    def burst(self, view, factory, pk, concurrency):
+        barrier = threading.Barrier(concurrency)
+        lock = threading.Lock()
+        counts = []
+
+        def count_queries(execute, sql, params, many, context):
+            with lock:
+                counts.append(sql)
+            return execute(sql, params, many, context)
+
+        def worker():
+            request = factory.get(f'/courses/{pk}/')
+            request.user = AnonymousUser()
+            try:
+                with connection.execute_wrapper(count_queries):
+                    barrier.wait()
+                    response = view(request, pk=pk)
+                    assert response.status_code == 200, response.status_code
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(counts), time.perf_counter() - started
@@ -0,0 +1,63 @@
+from itertools import combinations
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.course.models import Course, CourseQuerySet
+from apps.course.pagination import CourseCursorPagination
+
+SAMPLE_PARAMS = {
+    'cat_id': '1',
+    'level': 'beginner',
+    'instructor_id': '1',
+    'min_price': '10',
+    'max_price': '100',
+    'is_featured': 'True',
+    'language': 'Uzbek',
+}
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on every filter/ordering combination of the course catalog and report full table scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the plan of every combination.')
+
+    def handle(self, *args, **options):
+        paginator = CourseCursorPagination()
+        filters = CourseQuerySet.CATALOG_FILTERS
+        total = 0
+        full_scans = []
+
+        for size in range(len(filters) + 1):
+            for combination in combinations(filters, size):
+                params = {name: SAMPLE_PARAMS[name] for name in combination}
+                for ordering in paginator.ordering_fields:
+                    total += 1
+                    prefix = '-' if ordering.startswith('-') else ''
+                    queryset = Course.objects.for_catalog().catalog(params).order_by(ordering, prefix + 'id')
+                    plan = queryset[:paginator.page_size + 1].explain()
+                    scans = self.find_full_scans(plan)
+                    label = '{} ordering={}'.format(','.join(combination) or '(no filters)', ordering)
+                    if options['verbose_plans']:
+                        self.stdout.write(label)
+                        self.stdout.write(plan)
+                    if scans:
+                        full_scans.append((label, scans))
+
+        for label, scans in full_scans:
+            self.stdout.write(self.style.WARNING('FULL SCAN  {}: {}'.format(label, '; '.join(scans))))
+
+        summary = '{} of {} catalog queries fall back to a full scan'.format(len(full_scans), total)
+        if full_scans:
+            self.stdout.write(self.style.ERROR(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+
+    def find_full_scans(self, plan):
+        if connection.vendor == 'postgresql':
+            return [line.strip() for line in plan.splitlines() if 'Seq Scan' in line]
+        return [
+            line.strip() for line in plan.splitlines()
+            if ' SCAN ' in ' {} '.format(line.strip()) and 'USING' not in line
+        ]
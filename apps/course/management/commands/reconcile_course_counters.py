@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.course.models import Course, computed_stats_expressions
+
+FLOAT_TOLERANCE = 1e-6
+
+
+class Command(BaseCommand):
+    help = 'Compare the denormalized Course counters with the source tables and repair any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted courses.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        expressions = computed_stats_expressions()
+        drift = Q()
+        for name in expressions:
+            if name == 'average_rating':
+                drift |= Q(average_rating__gt=F('computed_average_rating') + FLOAT_TOLERANCE)
+                drift |= Q(average_rating__lt=F('computed_average_rating') - FLOAT_TOLERANCE)
+            else:
+                drift |= ~Q(**{name: F('computed_' + name)})
+
+        drifted = Course.objects.with_computed_stats().filter(drift).order_by('pk')
+        repaired = 0
+        batch = []
+        for course in drifted.iterator(chunk_size=options['batch_size']):
+            details = ', '.join(
+                '{} {} -> {}'.format(name, getattr(course, name), getattr(course, 'computed_' + name))
+                for name in expressions
+                if abs(getattr(course, name) - getattr(course, 'computed_' + name)) > FLOAT_TOLERANCE
+            )
+            self.stdout.write(self.style.WARNING(f'Course {course.pk}: {details}'))
+            batch.append(course.pk)
+            if len(batch) >= options['batch_size']:
+                repaired += self.repair(batch, options['dry_run'])
+                batch = []
+        if batch:
+            repaired += self.repair(batch, options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{repaired} drifted course(s) found')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{repaired} course(s) repaired'))
+
+    def repair(self, pks, dry_run):
+        if dry_run:
+            return len(pks)
+        with transaction.atomic():
+            Course.objects.filter(pk__in=pks).update(changed_at=timezone.now(), **computed_stats_expressions())
+        return len(pks)
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.course.models import Instructor, computed_instructor_stats_expressions
+
+RATING_TOLERANCE = 0.005
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the instructor running totals (students, reviews, rating sum and rating) from the source tables, '
+        'reporting any instructor whose totals had drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only verify and report drifted instructors.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        expressions = computed_instructor_stats_expressions()
+        drift = Q()
+        for name in expressions:
+            if name == 'rating':
+                drift |= Q(rating__gt=F('computed_rating') + RATING_TOLERANCE)
+                drift |= Q(rating__lt=F('computed_rating') - RATING_TOLERANCE)
+            else:
+                drift |= ~Q(**{name: F('computed_' + name)})
+
+        drifted = Instructor.objects.with_computed_stats().filter(drift).order_by('pk')
+        repaired = 0
+        batch = []
+        for instructor in drifted.iterator(chunk_size=options['batch_size']):
+            details = ', '.join(
+                '{} {} -> {}'.format(name, getattr(instructor, name), getattr(instructor, 'computed_' + name))
+                for name in expressions
+                if abs(float(getattr(instructor, name)) - getattr(instructor, 'computed_' + name)) > RATING_TOLERANCE
+            )
+            self.stdout.write(self.style.WARNING(f'Instructor {instructor.pk}: {details}'))
+            batch.append(instructor.pk)
+            if len(batch) >= options['batch_size']:
+                repaired += self.repair(batch, options['dry_run'])
+                batch = []
+        if batch:
+            repaired += self.repair(batch, options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{repaired} drifted instructor(s) found')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{repaired} instructor(s) repaired'))
+
+    def repair(self, pks, dry_run):
+        if dry_run:
+            return len(pks)
+        with transaction.atomic():
+            Instructor.objects.filter(pk__in=pks).update(updated_at=timezone.now(), **computed_instructor_stats_expressions())
+        return len(pks)
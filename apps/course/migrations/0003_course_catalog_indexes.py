@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0002_course_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'category', 'price', 'id'], name='course_cour_status_15138b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'level', 'price', 'id'], name='course_cour_status_c6e744_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'instructor', 'price', 'id'], name='course_cour_status_275624_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'language', 'price', 'id'], name='course_cour_status_f0afcf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'is_featured', 'price', 'id'], name='course_cour_status_960f44_idx'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:11
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    Lesson = apps.get_model('course', 'Lesson')
+    Enrollment = apps.get_model('enrolment', 'Enrollment')
+    CourseReview = apps.get_model('reviews', 'CourseReview')
+
+    def aggregate(queryset, field, expression, output_field):
+        return Coalesce(
+            Subquery(
+                queryset.order_by().values(field).annotate(value=expression).values('value'),
+                output_field=output_field,
+            ),
+            0,
+            output_field=output_field,
+        )
+
+    lessons = Lesson.objects.filter(section__course=OuterRef('pk'))
+    reviews = CourseReview.objects.filter(course=OuterRef('pk'))
+    Course.objects.update(
+        total_lessons=aggregate(lessons, 'section__course', Count('pk'), IntegerField()),
+        total_duration=aggregate(lessons, 'section__course', Sum('duration_minutes'), IntegerField()),
+        students_count=aggregate(
+            Enrollment.objects.filter(course=OuterRef('pk')), 'course', Count('pk'), IntegerField()
+        ),
+        reviews_count=aggregate(reviews, 'course', Count('pk'), IntegerField()),
+        rating_sum=aggregate(reviews, 'course', Sum('rating'), IntegerField()),
+        average_rating=aggregate(reviews, 'course', Avg('rating'), FloatField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0003_course_catalog_indexes'),
+        ('enrolment', '0001_initial'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='average_rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='students_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='total_duration',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='total_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
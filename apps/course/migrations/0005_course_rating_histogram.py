@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:14
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_histogram(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    CourseReview = apps.get_model('reviews', 'CourseReview')
+
+    def star_count(star):
+        reviews = CourseReview.objects.filter(course=OuterRef('pk'), rating=star)
+        return Coalesce(
+            Subquery(
+                reviews.order_by().values('course').annotate(value=Count('pk')).values('value'),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    Course.objects.update(**{f'rating_{star}_count': star_count(star) for star in range(1, 6)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0004_course_counters'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:51
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Round
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    Instructor = apps.get_model('course', 'Instructor')
+    Enrollment = apps.get_model('enrolment', 'Enrollment')
+    CourseReview = apps.get_model('reviews', 'CourseReview')
+
+    def aggregate(queryset, field, expression, output_field):
+        return Coalesce(
+            Subquery(
+                queryset.order_by().values(field).annotate(value=expression).values('value'),
+                output_field=output_field,
+            ),
+            0,
+            output_field=output_field,
+        )
+
+    enrollments = Enrollment.objects.exclude(status='dropped')
+    Course.objects.update(students_count=aggregate(
+        enrollments.filter(course=OuterRef('pk')), 'course', Count('pk'), IntegerField()
+    ))
+    reviews = CourseReview.objects.filter(course__instructor=OuterRef('pk'))
+    Instructor.objects.update(
+        total_students=aggregate(
+            enrollments.filter(course__instructor=OuterRef('pk')), 'course__instructor', Count('pk'), IntegerField()
+        ),
+        reviews_count=aggregate(reviews, 'course__instructor', Count('pk'), IntegerField()),
+        rating_sum=aggregate(reviews, 'course__instructor', Sum('rating'), IntegerField()),
+        rating=Round(aggregate(reviews, 'course__instructor', Avg('rating'), FloatField()), 2),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_sync_updated_at'),
+        ('enrolment', '0003_trending_event_indexes'),
+        ('reviews', '0003_trending_event_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructor',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='instructor',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='instructor',
+            name='rating',
+            field=models.DecimalField(decimal_places=2, default=0.0, editable=False, max_digits=3),
+        ),
+        migrations.AlterField(
+            model_name='instructor',
+            name='total_students',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,17 +1,85 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Avg, Count, Exists, F, IntegerField, FloatField, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from django.utils import timezone
+
+from core.counters import CounterSourceMixin
 
 User = get_user_model()
 
+
+def _count_subquery(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field).annotate(value=Count('pk')).values('value'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _aggregate_subquery(queryset, field, aggregate, output_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field).annotate(value=aggregate).values('value'),
+            output_field=output_field,
+        ),
+        0,
+        output_field=output_field,
+    )
+
+
+class InstructorQuerySet(models.QuerySet):
+    def with_courses_count(self):
+        return self.annotate(
+            courses_count=_count_subquery(Course.objects.filter(instructor=OuterRef('pk')), 'instructor')
+        )
+
+    def with_computed_stats(self):
+        """Annotate `computed_<counter>` for every running total, worked out from the source tables."""
+        return self.annotate(**{
+            'computed_' + name: expression for name, expression in computed_instructor_stats_expressions().items()
+        })
+
+    def adjust_counters(self, students=0, reviews=0, rating=0, touch=False):
+        """
+        Apply deltas to the running totals in a single UPDATE; `rating` is
+        rederived from the adjusted sum and count, and `updated_at` bumped.
+        `touch` bumps it without deltas, for changes to the courses count.
+        """
+        updates = {}
+        if students:
+            updates['total_students'] = F('total_students') + students
+        if reviews or rating:
+            updates['reviews_count'] = F('reviews_count') + reviews
+            updates['rating_sum'] = F('rating_sum') + rating
+            updates['rating'] = Coalesce(
+                Round(Cast(F('rating_sum') + rating, FloatField()) / NullIf(F('reviews_count') + reviews, 0), 2),
+                0.0,
+                output_field=FloatField(),
+            )
+        if not updates and not touch:
+            return 0
+        return self.update(updated_at=timezone.now(), **updates)
+
+
 class Instructor(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='instructor_profile')
     bio = models.TextField()
     profile_image = models.URLField()
     expertise = models.CharField(max_length=200)
-    total_students = models.IntegerField(default=0)
-    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
+    total_students = models.IntegerField(default=0, editable=False)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0, editable=False)
+    reviews_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
     is_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped by changes to the running totals, the user's name and the courses count.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = InstructorQuerySet.as_manager()
 
 
 class Category(models.Model):
@@ -21,9 +89,180 @@ class Category(models.Model):
     icon = models.CharField(max_length=50)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subcategories')
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class CourseQuerySet(models.QuerySet):
+    CATALOG_FILTERS = ('cat_id', 'level', 'instructor_id', 'min_price', 'max_price', 'is_featured', 'language')
+
+    def catalog(self, params):
+        """
+        Published courses narrowed by the catalog query parameters. The
+        composite indexes on `Course` are laid out for these filters.
+        """
+        courses = self.filter(status='published')
+        cat_id = params.get('cat_id')
+        level = params.get('level')
+        instructor_id = params.get('instructor_id')
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        is_featured = params.get('is_featured')
+        language = params.get('language')
+        search = params.get('search')
+
+        if cat_id:
+            courses = courses.filter(category_id=cat_id)
+
+        if level:
+            courses = courses.filter(level=level)
+
+        if instructor_id:
+            courses = courses.filter(instructor_id=instructor_id)
+
+        if min_price:
+            courses = courses.filter(price__gte=min_price)
+
+        if max_price:
+            courses = courses.filter(price__lte=max_price)
+
+        if is_featured:
+            courses = courses.filter(is_featured=is_featured)
+
+        if language:
+            courses = courses.filter(language=language)
+
+        if search:
+            courses = courses.search(search)
+
+        return courses
+
+    def search(self, query):
+        from apps.search.backends import get_backend
+
+        sql, params = get_backend().matching_ids_sql(query, 'course')
+        return self.filter(pk__in=RawSQL(sql, params))
 
+    def for_catalog(self):
+        return self.select_related('category').prefetch_related(
+            Prefetch('instructor', queryset=Instructor.objects.select_related('user').with_courses_count()),
+        )
 
-class Course(models.Model):
+    def for_detail(self, user=None, latest_reviews=None):
+        """
+        Load everything `CourseDetailSerializer` renders up front, with
+        section summaries rather than lessons: a fixed
+        number of queries no matter how many sections, lessons or reviews the
+        course has. Only the newest `latest_reviews` reviews are loaded.
+        """
+        from apps.enrolment.models import Enrollment
+        from apps.reviews.models import CourseReview
+
+        if latest_reviews is None:
+            latest_reviews = Course.DETAIL_LATEST_REVIEWS
+        courses = self.for_catalog().prefetch_related(
+            Prefetch('sections', queryset=Section.objects.order_by('order', 'pk').annotate(
+                lessons_count=Count('lessons'),
+                total_duration=Coalesce(Sum('lessons__duration_minutes'), 0),
+            )),
+            Prefetch(
+                'reviews',
+                queryset=CourseReview.objects.select_related('student').order_by('-created_at', '-pk')[:latest_reviews],
+                to_attr='latest_reviews',
+            ),
+        )
+        if user is not None and user.is_authenticated:
+            courses = courses.annotate(
+                user_is_enrolled=Exists(Enrollment.objects.filter(course=OuterRef('pk'), student=user))
+            )
+        return courses
+
+    def with_computed_stats(self):
+        """
+        Annotate `computed_<counter>` for every denormalized counter, worked
+        out from the source tables. Used to audit and repair the counters.
+        """
+        return self.annotate(**{
+            'computed_' + name: expression for name, expression in computed_stats_expressions().items()
+        })
+
+    def adjust_counters(self, students=0, reviews=0, rating=0, lessons=0, duration=0, stars=None, touch=False):
+        """
+        Apply deltas to the denormalized counters in a single UPDATE.
+        `average_rating` is rederived from the adjusted sum and count, and
+        `stars` maps a 1-5 star rating to the delta for its histogram bucket.
+        `touch` also bumps `updated_at`, for changes to the course content;
+        `changed_at` is bumped by every adjustment.
+        """
+        now = timezone.now()
+        updates = {}
+        if touch:
+            updates['updated_at'] = now
+        for star, delta in (stars or {}).items():
+            if star in Course.RATING_STARS and delta:
+                name = f'rating_{star}_count'
+                updates[name] = F(name) + delta
+        if students:
+            updates['students_count'] = F('students_count') + students
+        if lessons:
+            updates['total_lessons'] = F('total_lessons') + lessons
+        if duration:
+            updates['total_duration'] = F('total_duration') + duration
+        if reviews or rating:
+            updates['reviews_count'] = F('reviews_count') + reviews
+            updates['rating_sum'] = F('rating_sum') + rating
+            updates['average_rating'] = Coalesce(
+                Cast(F('rating_sum') + rating, FloatField()) / NullIf(F('reviews_count') + reviews, 0),
+                0.0,
+                output_field=FloatField(),
+            )
+        if not updates:
+            return 0
+        return self.update(changed_at=now, **updates)
+
+
+def computed_stats_expressions():
+    from apps.enrolment.models import Enrollment
+    from apps.reviews.models import CourseReview
+
+    lessons = Lesson.objects.filter(section__course=OuterRef('pk'))
+    reviews = CourseReview.objects.filter(course=OuterRef('pk'))
+    stars = {
+        f'rating_{star}_count': _count_subquery(reviews.filter(rating=star), 'course')
+        for star in Course.RATING_STARS
+    }
+    return {
+        **stars,
+        'total_lessons': _count_subquery(lessons, 'section__course'),
+        'total_duration': _aggregate_subquery(lessons, 'section__course', Sum('duration_minutes'), IntegerField()),
+        'students_count': _count_subquery(
+            Enrollment.objects.filter(course=OuterRef('pk')).exclude(status='dropped'), 'course'
+        ),
+        'reviews_count': _count_subquery(reviews, 'course'),
+        'rating_sum': _aggregate_subquery(reviews, 'course', Sum('rating'), IntegerField()),
+        'average_rating': _aggregate_subquery(reviews, 'course', Avg('rating'), FloatField()),
+    }
+
+
+def computed_instructor_stats_expressions():
+    from apps.enrolment.models import Enrollment
+    from apps.reviews.models import CourseReview
+
+    reviews = CourseReview.objects.filter(course__instructor=OuterRef('pk'))
+    return {
+        'total_students': _count_subquery(
+            Enrollment.objects.filter(course__instructor=OuterRef('pk')).exclude(status='dropped'),
+            'course__instructor',
+        ),
+        'reviews_count': _count_subquery(reviews, 'course__instructor'),
+        'rating_sum': _aggregate_subquery(reviews, 'course__instructor', Sum('rating'), IntegerField()),
+        'rating': Round(
+            _aggregate_subquery(reviews, 'course__instructor', Avg('rating'), FloatField()), 2,
+            output_field=FloatField(),
+        ),
+    }
+
+
+class Course(CounterSourceMixin, models.Model):
     LEVEL_CHOICES = [
         ('beginner', 'Beginner'),
         ('intermediate', 'Intermediate'),
@@ -36,6 +275,9 @@ class Course(models.Model):
         ('archived', 'Archived'),
     ]
 
+    RATING_STARS = (1, 2, 3, 4, 5)
+    DETAIL_LATEST_REVIEWS = 10
+
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
@@ -54,16 +296,79 @@ class Course(models.Model):
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Like `updated_at`, but also bumped when the denormalized counters move.
+    changed_at = models.DateTimeField(auto_now=True, db_index=True)
+    students_count = models.PositiveIntegerField(default=0, editable=False)
+    reviews_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    average_rating = models.FloatField(default=0, editable=False)
+    total_lessons = models.PositiveIntegerField(default=0, editable=False)
+    total_duration = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
 
+    tracked_fields = ('instructor_id', 'status')
+
+    objects = CourseQuerySet.as_manager()
+
+    @property
+    def rating_histogram(self):
+        return {star: getattr(self, f'rating_{star}_count') for star in self.RATING_STARS}
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'price', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
+            models.Index(fields=['status', 'category', 'price', 'id']),
+            models.Index(fields=['status', 'level', 'price', 'id']),
+            models.Index(fields=['status', 'instructor', 'price', 'id']),
+            models.Index(fields=['status', 'language', 'price', 'id']),
+            models.Index(fields=['status', 'is_featured', 'price', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
+
+def curriculum(course_id):
+    """
+    The section/lesson tree of a course as nested lists, read with a single
+    query over sections left-joined to their lessons.
+    """
+    rows = Section.objects.filter(course_id=course_id).order_by(
+        'order', 'pk', 'lessons__order', 'lessons__pk'
+    ).values_list(
+        'pk', 'title', 'order',
+        'lessons__pk', 'lessons__title', 'lessons__duration_minutes', 'lessons__order', 'lessons__is_preview',
+    )
+    sections = []
+    for section_id, title, order, *lesson in rows:
+        if not sections or sections[-1][0] != section_id:
+            sections.append([section_id, title, order, []])
+        if lesson[0] is not None:
+            sections[-1][3].append(lesson)
+    return sections
+
+
+class Section(CounterSourceMixin, models.Model):
+    tracked_fields = ('course_id',)
 
-class Section(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sections')
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
 
-class Lesson(models.Model):
+class Lesson(CounterSourceMixin, models.Model):
+    tracked_fields = ('section_id', 'duration_minutes')
+
     section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='lessons')
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -72,3 +377,9 @@ class Lesson(models.Model):
     order = models.IntegerField(default=0)
     is_preview = models.BooleanField(default=False)
     resources = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+        ]
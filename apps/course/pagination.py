@@ -0,0 +1,8 @@
+from core.pagination import KeysetPagination
+
+
+class CourseCursorPagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+    ordering_fields = ('price', '-price', 'created_at', '-created_at')
+    default_ordering = '-price'
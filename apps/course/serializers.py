@@ -3,7 +3,7 @@ from decimal import Decimal
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from rest_framework import serializers
-from apps.course.models import Category, Instructor, Course, Lesson, Section
+from apps.course.models import Category, Instructor, Course, Section
 from apps.reviews.models import CourseReview
 
 User = get_user_model()
@@ -29,6 +29,9 @@ class InlineInstructorSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_courses_count(self, obj):
+        courses_count = getattr(obj, 'courses_count', None)
+        if courses_count is not None:
+            return courses_count
         return obj.courses.count()
 
 
@@ -36,11 +39,7 @@ class CourseListCreateSerializer(serializers.ModelSerializer):
     category = InlineCategorySerializer(read_only=True)
     instructor = InlineInstructorSerializer(read_only=True)
     final_price = serializers.SerializerMethodField(read_only=True)
-    total_lessons = serializers.SerializerMethodField(read_only=True)
-    total_duration = serializers.SerializerMethodField(read_only=True)
-    students_count = serializers.SerializerMethodField(read_only=True)
-    average_rating = serializers.SerializerMethodField(read_only=True)
-    reviews_count = serializers.SerializerMethodField(read_only=True)
+    is_enrolled = serializers.SerializerMethodField(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(),
         write_only=True,
@@ -54,7 +53,8 @@ class CourseListCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Course
-        exclude = ['id', 'created_at', 'updated_at', 'is_featured']
+        exclude = ['id', 'created_at', 'updated_at', 'changed_at', 'is_featured', 'rating_sum',
+                   'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count']
         extra_kwargs = {
             'slug': {'read_only': True},
         }
@@ -62,25 +62,15 @@ class CourseListCreateSerializer(serializers.ModelSerializer):
     def get_final_price(self, obj):
         return Decimal(obj.price) * Decimal((1 - Decimal(obj.discount_percentage) / 100))
 
-    def get_total_lessons(self, obj):
-        return sum(section.lessons.count() for section in obj.sections.all())
-
-    def get_total_duration(self, obj):
-        return sum(
-            lesson.duration_minutes
-            for section in obj.sections.all()
-            for lesson in section.lessons.all()
-        )
-
-    def get_students_count(self, obj):
-        return obj.enrollments.count()
-
-    def get_average_rating(self, obj):
-        return sum(review.rating for review in obj.reviews.all()) / obj.reviews.count() \
-            if obj.reviews.count() else 0
-
-    def get_reviews_count(self, obj):
-        return obj.reviews.count()
+    def get_is_enrolled(self, obj):
+        # List views resolve the whole page at once into `enrolled_ids`.
+        enrolled_ids = self.context.get('enrolled_ids')
+        if enrolled_ids is not None:
+            return obj.pk in enrolled_ids
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return obj.enrollments.filter(student=request.user).exists()
 
     def validate_title(self, title):
         if len(title) < 10:
@@ -153,24 +143,21 @@ class InlineStudentSerializer(serializers.ModelSerializer):
         return f'{obj.first_name} {obj.last_name}'
 
 
-class InlineLessonSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Lesson
-        fields = ('id', 'title', 'duration_minutes', 'order', 'is_preview')
-
-
 class InlineSectionSerializer(serializers.ModelSerializer):
-    lessons = InlineLessonSerializer(many=True)
     lessons_count = serializers.SerializerMethodField()
     total_duration = serializers.SerializerMethodField()
     class Meta:
         model = Section
-        fields = ('id', 'title', 'description', 'order', 'lessons', 'lessons_count', 'total_duration')
+        fields = ('id', 'title', 'description', 'order', 'lessons_count', 'total_duration')
 
     def get_lessons_count(self, obj):
+        if hasattr(obj, 'lessons_count'):
+            return obj.lessons_count
         return obj.lessons.count()
 
     def get_total_duration(self, obj):
+        if hasattr(obj, 'total_duration'):
+            return obj.total_duration
         return sum(lesson.duration_minutes for lesson in obj.lessons.all())
 
 
@@ -202,7 +189,8 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         write_only=True,
         many=True
     )
-    reviews = InlineReviewSerializer(many=True, read_only=True)
+    reviews = serializers.SerializerMethodField(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     reviews_id = serializers.PrimaryKeyRelatedField(
         queryset=CourseReview.objects.all(),
         source='reviews',
@@ -212,16 +200,13 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     final_price = serializers.SerializerMethodField(read_only=True)
     level_display = serializers.CharField(source='get_level_display', read_only=True)
     total_sections = serializers.SerializerMethodField(read_only=True)
-    total_lessons = serializers.SerializerMethodField(read_only=True)
-    total_duration_minutes = serializers.SerializerMethodField(read_only=True)
-    students_count = serializers.SerializerMethodField(read_only=True)
-    reviews_count = serializers.SerializerMethodField(read_only=True)
-    average_rating = serializers.SerializerMethodField(read_only=True)
+    total_duration_minutes = serializers.IntegerField(source='total_duration', read_only=True)
     is_enrolled = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Course
-        fields = "__all__"
+        exclude = ('changed_at', 'rating_sum', 'total_duration',
+                   'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count')
         extra_kwargs = {
             'id': {'read_only': True},
             'slug': {'read_only': True},
@@ -230,25 +215,13 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     def get_final_price(self, obj):
         return Decimal(obj.price) * Decimal((1 - Decimal(obj.discount_percentage) / 100))
 
-    def get_total_lessons(self, obj):
-        return sum(section.lessons.count() for section in obj.sections.all())
-
-    def get_total_duration_minutes(self, obj):
-        return sum(
-            lesson.duration_minutes
-            for section in obj.sections.all()
-            for lesson in section.lessons.all()
-        )
-
-    def get_students_count(self, obj):
-        return obj.enrollments.count()
-
-    def get_average_rating(self, obj):
-        return sum(review.rating for review in obj.reviews.all()) / obj.reviews.count() \
-            if obj.reviews.count() else 0
-
-    def get_reviews_count(self, obj):
-        return obj.reviews.count()
+    def get_reviews(self, obj):
+        reviews = getattr(obj, 'latest_reviews', None)
+        if reviews is None:
+            reviews = obj.reviews.select_related('student').order_by('-created_at', '-pk')[
+                :Course.DETAIL_LATEST_REVIEWS
+            ]
+        return InlineReviewSerializer(reviews, many=True).data
 
     def get_total_sections(self, obj):
         return obj.sections.count()
@@ -257,6 +230,8 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
+        if hasattr(obj, 'user_is_enrolled'):
+            return obj.user_is_enrolled
         return obj.enrollments.filter(student=user).exists()
 
     def validate_title(self, title):
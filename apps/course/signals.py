@@ -0,0 +1,189 @@
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.course.counters import (
+    adjust_deleted_course_counters, apply_cascaded_counters, course_deleted_with, note_deleted_course,
+    note_deleted_section, section_course,
+)
+from apps.course.facets import invalidate_catalog_facets
+from apps.course.models import Category, Course, Instructor, Lesson, Section
+from core.cache import course_detail_cache, instructor_cache
+from core.counters import deleted_directly
+
+
+@receiver(post_save, sender=Lesson)
+def count_saved_lesson(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Course.objects.filter(sections=instance.section_id).adjust_counters(
+            lessons=1, duration=instance.duration_minutes, touch=True
+        )
+        return
+
+    changes = instance.tracked_changes()
+    if 'section_id' in changes:
+        old_section, new_section = changes['section_id']
+        old_duration = changes.get('duration_minutes', (instance.duration_minutes,))[0]
+        Course.objects.filter(sections=old_section).adjust_counters(lessons=-1, duration=-old_duration, touch=True)
+        Course.objects.filter(sections=new_section).adjust_counters(
+            lessons=1, duration=instance.duration_minutes, touch=True
+        )
+    elif 'duration_minutes' in changes:
+        old_duration, new_duration = changes['duration_minutes']
+        Course.objects.filter(sections=instance.section_id).adjust_counters(
+            duration=new_duration - old_duration, touch=True
+        )
+    else:
+        Course.objects.filter(sections=instance.section_id).adjust_counters(touch=True)
+
+
+@receiver(post_delete, sender=Lesson)
+def count_deleted_lesson(sender, instance, origin=None, **kwargs):
+    course_id = section_course(origin, instance.section_id)
+    if course_id is None:
+        Course.objects.filter(sections=instance.section_id).adjust_counters(
+            lessons=-1, duration=-instance.duration_minutes, touch=True
+        )
+    else:
+        adjust_deleted_course_counters(origin, Lesson, course_id, lessons=-1, duration=-instance.duration_minutes)
+
+
+@receiver(post_save, sender=Section)
+def count_saved_section(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    changes = {} if created else instance.tracked_changes()
+    if 'course_id' not in changes:
+        Course.objects.filter(pk=instance.course_id).adjust_counters(touch=True)
+        return
+    old_course, new_course = changes['course_id']
+    totals = instance.lessons.aggregate(lessons=Count('pk'), duration=Sum('duration_minutes'))
+    Course.objects.filter(pk=old_course).adjust_counters(
+        lessons=-totals['lessons'], duration=-(totals['duration'] or 0), touch=True
+    )
+    Course.objects.filter(pk=new_course).adjust_counters(
+        lessons=totals['lessons'], duration=totals['duration'] or 0, touch=True
+    )
+
+
+@receiver(post_delete, sender=Section)
+def touch_section_course(sender, instance, origin=None, **kwargs):
+    if not course_deleted_with(origin, instance.course_id):
+        Course.objects.filter(pk=instance.course_id).adjust_counters(touch=True)
+
+
+@receiver(pre_delete, sender=Course)
+def remember_deleted_course(sender, instance, origin=None, **kwargs):
+    note_deleted_course(origin, instance.pk)
+
+
+@receiver(pre_delete, sender=Section)
+def remember_deleted_section(sender, instance, origin=None, **kwargs):
+    note_deleted_section(origin, instance.pk, instance.course_id)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Instructor)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender='enrolment.Enrollment')
+@receiver(post_delete, sender='reviews.CourseReview')
+def finish_cascaded_counters(sender, instance, origin=None, **kwargs):
+    # Connected for every model whose deletion can reach a counted row.
+    if deleted_directly(origin, sender):
+        apply_cascaded_counters(origin)
+
+
+@receiver(post_save, sender=Course)
+def move_instructor_totals(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    changes = instance.tracked_changes()
+    if 'instructor_id' not in changes:
+        return
+    old_instructor, new_instructor = changes['instructor_id']
+    students, reviews, rating = Course.objects.filter(pk=instance.pk).values_list(
+        'students_count', 'reviews_count', 'rating_sum'
+    ).get()
+    Instructor.objects.filter(pk=old_instructor).adjust_counters(
+        students=-students, reviews=-reviews, rating=-rating, touch=True
+    )
+    Instructor.objects.filter(pk=new_instructor).adjust_counters(
+        students=students, reviews=reviews, rating=rating, touch=True
+    )
+    instructor_cache.invalidate(old_instructor, new_instructor)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course(sender, instance, **kwargs):
+    course_detail_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_facets(sender, **kwargs):
+    invalidate_catalog_facets()
+
+
+@receiver(post_save, sender=Course)
+def count_instructor_course(sender, instance, created, raw=False, **kwargs):
+    # The instructor fragment shows how many courses they have; moves and
+    # deletions are counted along with the running totals.
+    if created and not raw:
+        Instructor.objects.filter(pk=instance.instructor_id).adjust_counters(touch=True)
+        instructor_cache.invalidate(instance.instructor_id)
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_section_course(sender, instance, origin=None, **kwargs):
+    if course_deleted_with(origin, instance.course_id):
+        return
+    old_course = instance.tracked_changes().get('course_id', (None,))[0]
+    course_detail_cache.invalidate(instance.course_id, old_course)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_course(sender, instance, origin=None, **kwargs):
+    course_id = section_course(origin, instance.section_id)
+    if course_id is not None:
+        # Its section goes too; the course is invalidated by the counters.
+        return
+    sections = {instance.section_id, instance.tracked_changes().get('section_id', (None,))[0]} - {None}
+    course_detail_cache.invalidate(*Section.objects.filter(pk__in=sections).values_list('course_id', flat=True))
+
+
+@receiver(post_save, sender=Instructor)
+@receiver(post_delete, sender=Instructor)
+def invalidate_instructor(sender, instance, **kwargs):
+    instructor_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_instructor_user(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # The instructor fragment renders the user's name; saves such as the
+    # `last_login` update on every login leave it alone.
+    if raw or created or (update_fields is not None and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    instructors = list(Instructor.objects.filter(user=instance).values_list('pk', flat=True))
+    if instructors:
+        Instructor.objects.filter(pk__in=instructors).update(updated_at=timezone.now())
+        instructor_cache.invalidate(*instructors)
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_courses(sender, instance, created, raw=False, **kwargs):
+    # A deleted category takes its courses with it, which drops them.
+    if raw or created:
+        return
+    course_detail_cache.invalidate(*Course.objects.filter(category=instance).values_list('pk', flat=True))
@@ -1,3 +1,576 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from apps.course.facets import FACET_OWN_FILTERS, get_catalog_facets
+from apps.course.models import Category, Course, Instructor, Lesson, Section, computed_stats_expressions
+from apps.enrolment.models import Enrollment
+from apps.reviews.models import CourseReview
+from core.cache import course_detail_cache
+
+User = get_user_model()
+
+
+class CourseFixtureMixin:
+    def setUp(self):
+        instructor_user = User.objects.create(username='instructor')
+        self.instructor = Instructor.objects.create(
+            user=instructor_user, bio='bio', profile_image='https://example.com/a.png',
+            expertise='Python', is_verified=True,
+        )
+        self.category = Category.objects.create(name='Programming', slug='programming', description='d', icon='i')
+        self.student = User.objects.create(username='student')
+        caches['responses'].clear()
+
+    def make_course(self, slug, sections, lessons_per_section, reviews):
+        course = Course.objects.create(
+            title='Complete Django course', slug=slug, description='d' * 60,
+            instructor=self.instructor, category=self.category, thumbnail='https://example.com/t.png',
+            price=Decimal('49.99'), level='beginner', status='published', duration_hours=Decimal('10'),
+            requirements='None', what_you_learn='Django',
+        )
+        for section_order in range(sections):
+            section = Section.objects.create(course=course, title=f'Section {section_order}', order=section_order)
+            Lesson.objects.bulk_create(
+                Lesson(section=section, title=f'Lesson {order}', content='c', video_url='https://example.com/v',
+                       duration_minutes=5, order=order)
+                for order in range(lessons_per_section)
+            )
+        for index in range(reviews):
+            reviewer = User.objects.create(username=f'{slug}-reviewer-{index}')
+            CourseReview.objects.create(course=course, student=reviewer, rating=5, title='Great', comment='c' * 20)
+        return course
+
+
+class CourseDetailQueryBudgetTests(CourseFixtureMixin, APITestCase):
+    # One query for the conditional GET validators, four for the object graph.
+    query_budget = 5
+
+    def assert_detail_budget(self, course):
+        with self.assertNumQueries(self.query_budget):
+            response = self.client.get(f'/courses/{course.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_small_course_within_budget(self):
+        course = self.make_course('small', sections=1, lessons_per_section=1, reviews=1)
+        self.assert_detail_budget(course)
+
+    def test_large_course_within_budget(self):
+        course = self.make_course('large', sections=40, lessons_per_section=10, reviews=30)
+        response = self.assert_detail_budget(course)
+        self.assertEqual(len(response.data['sections']), 40)
+        self.assertEqual(response.data['sections'][0]['lessons_count'], 10)
+
+    def test_enrolled_user_within_budget(self):
+        course = self.make_course('enrolled', sections=5, lessons_per_section=5, reviews=3)
+        Enrollment.objects.create(student=self.student, course=course)
+        self.client.force_authenticate(self.student)
+        response = self.assert_detail_budget(course)
+        self.assertTrue(response.data['is_enrolled'])
+
+    def test_missing_course_returns_404(self):
+        response = self.client.get('/courses/999999/')
+        self.assertEqual(response.status_code, 404)
+
+
+class CourseDetailCacheTests(CourseFixtureMixin, APITestCase):
+    def test_repeated_detail_is_served_from_cache(self):
+        course = self.make_course('cached', sections=2, lessons_per_section=2, reviews=1)
+        self.client.get(f'/courses/{course.pk}/')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/courses/{course.pk}/')
+        self.assertEqual(response.data['reviews_count'], 1)
+        self.assertFalse(response.data['is_enrolled'])
+
+    def test_is_enrolled_is_per_user(self):
+        course = self.make_course('cached-enrolled', sections=1, lessons_per_section=1, reviews=0)
+        self.client.get(f'/courses/{course.pk}/')
+        Enrollment.objects.create(student=self.student, course=course)
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/courses/{course.pk}/')
+        self.assertTrue(response.data['is_enrolled'])
+
+    def test_review_invalidates_detail(self):
+        course = self.make_course('cached-review', sections=1, lessons_per_section=1, reviews=0)
+        self.client.get(f'/courses/{course.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseReview.objects.create(course=course, student=self.student, rating=4, title='Good', comment='c' * 20)
+
+        response = self.client.get(f'/courses/{course.pk}/')
+        self.assertEqual(response.data['reviews_count'], 1)
+        self.assertEqual(len(response.data['reviews']), 1)
+
+    def test_enrollment_leaves_the_instructors_other_courses_cached(self):
+        course = self.make_course('cached-enrolment', sections=1, lessons_per_section=1, reviews=0)
+        other = self.make_course('cached-other', sections=1, lessons_per_section=1, reviews=0)
+        self.client.get(f'/courses/{other.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=course)
+
+        self.assertIsNotNone(course_detail_cache.backend.get(course_detail_cache.key(other.pk)))
+        # The validators and the instructor fragment.
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/courses/{other.pk}/')
+        self.assertEqual(response.data['instructor']['total_students'], 1)
+        self.assertEqual(response.data['students_count'], 0)
+
+    def test_instructor_and_category_edits_refresh_detail(self):
+        course = self.make_course('cached-related', sections=1, lessons_per_section=1, reviews=0)
+        self.client.get(f'/courses/{course.pk}/')
+        user = self.instructor.user
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = 'Ada'
+            user.save()
+            self.category.name = 'Software'
+            self.category.save()
+
+        response = self.client.get(f'/courses/{course.pk}/')
+        self.assertEqual(response.data['instructor']['user']['first_name'], 'Ada')
+        self.assertEqual(response.data['category']['name'], 'Software')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.instructor.bio = 'New bio'
+            self.instructor.save()
+        self.assertEqual(self.client.get(f'/courses/{course.pk}/').data['instructor']['bio'], 'New bio')
+
+    def test_stale_entry_is_served_while_another_worker_rebuilds(self):
+        course = self.make_course('cached-stale', sections=1, lessons_per_section=1, reviews=0)
+        self.client.get(f'/courses/{course.pk}/')
+        key = course_detail_cache.key(course.pk)
+        entry = course_detail_cache.backend.get(key)
+        course_detail_cache.backend.set(key, dict(entry, expires=0))
+        token = course_detail_cache.acquire(key)
+        try:
+            with self.assertNumQueries(1):
+                response = self.client.get(f'/courses/{course.pk}/')
+        finally:
+            course_detail_cache.release(key, token)
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(5):
+            self.client.get(f'/courses/{course.pk}/')
+
+
+class CourseConditionalGetTests(CourseFixtureMixin, APITestCase):
+    def test_matching_etag_returns_304_without_serializing(self):
+        course = self.make_course('etag', sections=2, lessons_per_section=2, reviews=1)
+        response = self.client.get(f'/courses/{course.pk}/')
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/courses/{course.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_review_changes_etag(self):
+        course = self.make_course('etag-review', sections=1, lessons_per_section=1, reviews=0)
+        etag = self.client.get(f'/courses/{course.pk}/')['ETag']
+        CourseReview.objects.create(course=course, student=self.student, rating=3, title='Okay', comment='c' * 20)
+
+        response = self.client.get(f'/courses/{course.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def backdate(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Course.objects.update(changed_at=hour_ago)
+        Instructor.objects.update(updated_at=hour_ago)
+        Category.objects.update(updated_at=hour_ago)
+        return http_date(hour_ago.timestamp())
+
+    def test_last_modified_follows_counter_changes(self):
+        course = self.make_course('etag-since', sections=1, lessons_per_section=1, reviews=0)
+        last_modified = self.backdate()
+        for url in (f'/courses/{course.pk}/', '/courses/'):
+            response = self.client.get(url)
+            self.assertEqual(response['Last-Modified'], last_modified)
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        Enrollment.objects.create(student=self.student, course=course)
+        for url in (f'/courses/{course.pk}/', '/courses/'):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_related_edits_change_validators(self):
+        course = self.make_course('etag-related', sections=1, lessons_per_section=1, reviews=0)
+        last_modified = self.backdate()
+        etag = self.client.get(f'/courses/{course.pk}/')['ETag']
+        list_etag = self.client.get('/courses/')['ETag']
+
+        user = self.instructor.user
+        user.last_name = 'Lovelace'
+        user.save()
+        for url, old_etag in ((f'/courses/{course.pk}/', etag), ('/courses/', list_etag)):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=old_etag).status_code, 200)
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+        last_modified = self.backdate()
+        etag = self.client.get(f'/courses/{course.pk}/')['ETag']
+        self.category.slug = 'software'
+        self.category.save()
+        self.assertEqual(self.client.get(f'/courses/{course.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(
+            self.client.get(f'/courses/{course.pk}/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200
+        )
+
+    def test_deleted_course_moves_catalog_last_modified(self):
+        kept = self.make_course('etag-kept', sections=0, lessons_per_section=0, reviews=0)
+        doomed = self.make_course('etag-doomed', sections=0, lessons_per_section=0, reviews=0)
+        last_modified = self.backdate()
+        self.assertEqual(self.client.get('/courses/')['Last-Modified'], last_modified)
+
+        doomed.delete()
+        self.assertEqual(self.client.get('/courses/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_catalog_etag(self):
+        self.make_course('etag-list', sections=1, lessons_per_section=1, reviews=0)
+        etag = self.client.get('/courses/')['ETag']
+        self.assertEqual(self.client.get('/courses/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/courses/?level=advanced', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class CourseListFlagsTests(CourseFixtureMixin, APITestCase):
+    def test_enrolled_flags_resolved_in_one_query(self):
+        courses = [self.make_course(f'flag-{index}', sections=0, lessons_per_section=0, reviews=0) for index in range(5)]
+        Enrollment.objects.create(student=self.student, course=courses[1])
+        Enrollment.objects.create(student=self.student, course=courses[3])
+        self.client.force_authenticate(self.student)
+
+        # validators, page, instructor prefetch, enrolled ids
+        with self.assertNumQueries(4):
+            response = self.client.get('/courses/')
+        flags = {course['slug']: course['is_enrolled'] for course in response.data['results']}
+        self.assertEqual(flags, {'flag-0': False, 'flag-1': True, 'flag-2': False, 'flag-3': True, 'flag-4': False})
+
+    def test_enrolled_flags_are_part_of_the_etag(self):
+        course = self.make_course('flag-etag', sections=0, lessons_per_section=0, reviews=0)
+        other = User.objects.create(username='other')
+        enrollment = Enrollment.objects.create(student=other, course=course)
+        self.client.force_authenticate(self.student)
+        etag = self.client.get('/courses/')['ETag']
+
+        # Hand the enrollment over without touching any counter.
+        Enrollment.objects.filter(pk=enrollment.pk).update(student=self.student)
+        response = self.client.get('/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['is_enrolled'])
+
+
+class CatalogPaginationTests(CourseFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Several courses share a price, so the pages split ties on `id`.
+        self.prices = {}
+        for index, price in enumerate(['10', '20', '20', '20', '30', '30', '40', '50']):
+            course = self.make_course(f'page-{index}', sections=0, lessons_per_section=0, reviews=0)
+            Course.objects.filter(pk=course.pk).update(price=Decimal(price))
+            self.prices[course.slug] = (Decimal(price), course.pk)
+
+    def expected(self, descending=True):
+        return sorted(self.prices, key=self.prices.get, reverse=descending)
+
+    def slugs(self, response):
+        return [course['slug'] for course in response.data['results']]
+
+    def walk(self, url):
+        slugs, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.slugs(response))
+            slugs.extend(pages[-1])
+            url = response.data['next']
+        return slugs, pages
+
+    def test_next_links_cover_every_course_once_across_ties(self):
+        slugs, pages = self.walk('/courses/?page_size=3')
+        self.assertEqual(slugs, self.expected())
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+
+        slugs, _ = self.walk('/courses/?page_size=3&ordering=price')
+        self.assertEqual(slugs, self.expected(descending=False))
+
+    def test_previous_link_returns_the_page_before(self):
+        first = self.client.get('/courses/?page_size=3')
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(back.data['previous'])
+        self.assertEqual(self.client.get(back.data['next']).data['results'], second.data['results'])
+
+    def test_cursor_is_stable_across_inserts(self):
+        first = self.client.get('/courses/?page_size=3')
+        second = self.slugs(self.client.get(first.data['next']))
+        newer = self.make_course('page-new', sections=0, lessons_per_section=0, reviews=0)
+        Course.objects.filter(pk=newer.pk).update(price=Decimal('99'))
+
+        self.assertEqual(self.slugs(self.client.get(first.data['next'])), second)
+        self.assertEqual(self.slugs(self.client.get('/courses/?page_size=3'))[0], 'page-new')
+
+    def test_ordering_outside_the_allow_list_is_rejected(self):
+        for ordering in ('title', 'students_count', '-id', 'price,title'):
+            response = self.client.get('/courses/', {'ordering': ordering})
+            self.assertEqual(response.status_code, 400, ordering)
+            self.assertIn('ordering', response.data)
+
+        cursor = self.client.get('/courses/?page_size=3').data['next']
+        self.assertEqual(self.client.get(cursor + '&ordering=created_at').status_code, 404)
+
+
+class CatalogFacetTests(CourseFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.other_category = Category.objects.create(name='Design', slug='design', description='d', icon='i')
+        for index, (level, price, category) in enumerate([
+            ('beginner', '10', self.category), ('beginner', '30', self.category),
+            ('advanced', '30', self.category), ('advanced', '150', self.other_category),
+        ]):
+            course = self.make_course(f'facet-{index}', sections=0, lessons_per_section=0, reviews=0)
+            Course.objects.filter(pk=course.pk).update(level=level, price=Decimal(price), category=category)
+
+    def facets(self, **params):
+        response = self.client.get('/courses/', dict(params, facets='all'))
+        self.assertEqual(response.status_code, 200)
+        return {name: {row['value']: row['count'] for row in rows} for name, rows in response.data['facets'].items()}
+
+    def test_counts_match_the_filtered_catalog(self):
+        for params in ({}, {'level': 'beginner'}, {'cat_id': self.category.pk}, {'min_price': '20'}):
+            facets = self.facets(**params)
+            for name, own_filters in FACET_OWN_FILTERS.items():
+                # Each facet ignores its own filter.
+                narrowed = {key: value for key, value in params.items() if key not in own_filters}
+                courses = Course.objects.catalog(narrowed)
+                self.assertEqual(sum(facets[name].values()), courses.count(), (params, name))
+
+        facets = self.facets(level='beginner')
+        self.assertEqual(facets['level'], {'beginner': 2, 'advanced': 2})
+        self.assertEqual(facets['category'], {self.category.pk: 2})
+        self.assertEqual(facets['price']['25-50'], 1)
+
+    def test_cache_key_follows_the_filters(self):
+        self.assertEqual(self.facets(level='advanced')['category'], {self.category.pk: 1, self.other_category.pk: 1})
+        self.assertEqual(self.facets(level='beginner')['category'], {self.category.pk: 2})
+        # The level facet ignores the level filter, so both share one entry.
+        with self.assertNumQueries(0):
+            facets = get_catalog_facets({'level': 'advanced'}, ['level'])
+        self.assertEqual(facets, get_catalog_facets({'level': 'beginner'}, ['level']))
+
+    def test_writes_invalidate_the_counts(self):
+        self.assertEqual(self.facets()['level'], {'beginner': 2, 'advanced': 2})
+        course = Course.objects.get(slug='facet-0')
+        with self.captureOnCommitCallbacks(execute=True):
+            course.level = 'advanced'
+            course.save()
+        self.assertEqual(self.facets()['level'], {'beginner': 1, 'advanced': 3})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+        self.assertEqual(self.facets()['level'], {'beginner': 1, 'advanced': 2})
+
+
+class ExplainCatalogTests(CourseFixtureMixin, APITestCase):
+    def test_no_catalog_query_falls_back_to_a_full_scan(self):
+        self.make_course('explained', sections=0, lessons_per_section=0, reviews=0)
+        out = StringIO()
+        call_command('explain_catalog', stdout=out)
+        output = out.getvalue()
+        self.assertNotIn('FULL SCAN', output)
+        self.assertRegex(output, r'\b0 of [1-9]\d* catalog queries fall back to a full scan')
+
+
+class CourseCurriculumTests(CourseFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_curriculum_is_compact_and_cached(self):
+        course = self.make_course('curriculum', sections=3, lessons_per_section=4, reviews=0)
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/courses/{course.pk}/curriculum/')
+        self.assertEqual(len(response.data['sections']), 3)
+        self.assertEqual(len(response.data['sections'][0][3]), 4)
+
+        with self.assertNumQueries(1):
+            self.client.get(f'/courses/{course.pk}/curriculum/')
+
+    def test_lesson_change_invalidates_curriculum(self):
+        course = self.make_course('curriculum-edit', sections=1, lessons_per_section=1, reviews=0)
+        self.client.get(f'/courses/{course.pk}/curriculum/')
+        lesson = Lesson.objects.get(section__course=course)
+        lesson.title = 'Renamed lesson'
+        lesson.save()
+
+        response = self.client.get(f'/courses/{course.pk}/curriculum/')
+        self.assertEqual(response.data['sections'][0][3][0][1], 'Renamed lesson')
+
+
+class InstructorCounterTests(CourseFixtureMixin, APITestCase):
+    def assert_totals(self, students, reviews, rating_sum, rating):
+        instructor = Instructor.objects.get(pk=self.instructor.pk)
+        self.assertEqual(
+            (instructor.total_students, instructor.reviews_count, instructor.rating_sum, instructor.rating),
+            (students, reviews, rating_sum, Decimal(rating)),
+        )
+        computed = Instructor.objects.with_computed_stats().get(pk=self.instructor.pk)
+        self.assertEqual((computed.computed_total_students, computed.computed_rating_sum), (students, rating_sum))
+
+    def test_reviews_and_enrollments_update_totals(self):
+        first = self.make_course('first', sections=0, lessons_per_section=0, reviews=2)
+        second = self.make_course('second', sections=0, lessons_per_section=0, reviews=0)
+        self.assert_totals(students=0, reviews=2, rating_sum=10, rating='5.00')
+
+        review = CourseReview.objects.create(course=second, student=self.student, rating=2, title='Meh', comment='c')
+        self.assert_totals(students=0, reviews=3, rating_sum=12, rating='4.00')
+        review.rating = 3
+        review.save()
+        self.assert_totals(students=0, reviews=3, rating_sum=13, rating='4.33')
+        review.delete()
+        self.assert_totals(students=0, reviews=2, rating_sum=10, rating='5.00')
+
+        enrollment = Enrollment.objects.create(student=self.student, course=first)
+        Enrollment.objects.create(student=self.student, course=second)
+        self.assert_totals(students=2, reviews=2, rating_sum=10, rating='5.00')
+        enrollment.status = 'dropped'
+        enrollment.save()
+        self.assert_totals(students=1, reviews=2, rating_sum=10, rating='5.00')
+        self.assertEqual(Course.objects.get(pk=first.pk).students_count, 0)
+        enrollment.delete()
+        self.assert_totals(students=1, reviews=2, rating_sum=10, rating='5.00')
+
+    def test_course_moving_to_another_instructor_moves_totals(self):
+        course = self.make_course('moving', sections=0, lessons_per_section=0, reviews=1)
+        other = Instructor.objects.create(
+            user=User.objects.create(username='other'), bio='bio', profile_image='https://example.com/b.png',
+            expertise='Go',
+        )
+        course = Course.objects.get(pk=course.pk)
+        course.instructor = other
+        course.save()
+        self.assert_totals(students=0, reviews=0, rating_sum=0, rating='0')
+        other.refresh_from_db()
+        self.assertEqual((other.reviews_count, other.rating_sum, other.rating), (1, 5, Decimal('5')))
+
+
+class CourseCounterTests(CourseFixtureMixin, APITestCase):
+    def counters(self, course):
+        """The stored counters of `course`, after checking they match a recount."""
+        course = Course.objects.with_computed_stats().get(pk=course.pk)
+        for name in computed_stats_expressions():
+            self.assertAlmostEqual(getattr(course, name), getattr(course, 'computed_' + name), msg=name)
+        return course
+
+    def add_lesson(self, section, minutes):
+        return Lesson.objects.create(section=section, title='Lesson', content='c', video_url='https://example.com/v',
+                                     duration_minutes=minutes, order=0)
+
+    def test_enrollments_and_reviews(self):
+        first = self.make_course('first', sections=0, lessons_per_section=0, reviews=0)
+        second = self.make_course('second', sections=0, lessons_per_section=0, reviews=0)
+
+        enrollment = Enrollment.objects.create(student=self.student, course=first)
+        self.assertEqual(self.counters(first).students_count, 1)
+        enrollment.status = 'dropped'
+        enrollment.save()
+        self.assertEqual(self.counters(first).students_count, 0)
+        enrollment.status = 'active'
+        enrollment.course = second
+        enrollment.save()
+        self.assertEqual((self.counters(first).students_count, self.counters(second).students_count), (0, 1))
+        enrollment.delete()
+        self.assertEqual(self.counters(second).students_count, 0)
+
+        review = CourseReview.objects.create(course=first, student=self.student, rating=4, title='Good', comment='c')
+        self.assertEqual(self.counters(first).rating_4_count, 1)
+        review.rating = 2
+        review.save()
+        course = self.counters(first)
+        self.assertEqual((course.reviews_count, course.rating_sum, course.rating_2_count), (1, 2, 1))
+        review.course = second
+        review.save()
+        self.assertEqual((self.counters(first).reviews_count, self.counters(second).average_rating), (0, 2.0))
+        review.delete()
+        self.assertEqual(self.counters(second).reviews_count, 0)
+
+    def test_sections_and_lessons(self):
+        first = self.make_course('first', sections=0, lessons_per_section=0, reviews=0)
+        second = self.make_course('second', sections=0, lessons_per_section=0, reviews=0)
+        section = Section.objects.create(course=first, title='Section', order=0)
+        other_section = Section.objects.create(course=second, title='Section', order=0)
+
+        lesson = self.add_lesson(section, 5)
+        self.add_lesson(section, 7)
+        course = self.counters(first)
+        self.assertEqual((course.total_lessons, course.total_duration), (2, 12))
+        lesson.duration_minutes = 10
+        lesson.save()
+        self.assertEqual(self.counters(first).total_duration, 17)
+        lesson.section = other_section
+        lesson.save()
+        self.assertEqual((self.counters(first).total_lessons, self.counters(second).total_duration), (1, 10))
+        lesson.delete()
+        self.assertEqual(self.counters(second).total_lessons, 0)
+
+        section.course = second
+        section.save()
+        self.assertEqual((self.counters(first).total_lessons, self.counters(second).total_duration), (0, 7))
+        for _ in range(3):
+            self.add_lesson(section, 1)
+        with CaptureQueriesContext(connection) as queries:
+            section.delete()
+        self.assertEqual(self.counters(second).total_lessons, 0)
+        course_updates = [query for query in queries if query['sql'].startswith('UPDATE "course_course"')]
+        self.assertEqual(len(course_updates), 2)
+
+    def test_cascades_apply_one_delta_per_course_and_instructor(self):
+        kept = self.make_course('kept', sections=0, lessons_per_section=0, reviews=1)
+        doomed = self.make_course('doomed', sections=0, lessons_per_section=0, reviews=3)
+        students = [User.objects.create(username=f'student-{index}') for index in range(3)]
+        for student in students:
+            Enrollment.objects.create(student=student, course=kept)
+            Enrollment.objects.create(student=student, course=doomed)
+        CourseReview.objects.create(course=kept, student=students[0], rating=1, title='Bad', comment='c')
+
+        with CaptureQueriesContext(connection) as queries:
+            doomed.delete()
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        instructor = Instructor.objects.get(pk=self.instructor.pk)
+        self.assertEqual((instructor.total_students, instructor.reviews_count, instructor.rating_sum), (3, 2, 6))
+
+        with CaptureQueriesContext(connection) as queries:
+            students[0].delete()
+        course = self.counters(kept)
+        self.assertEqual((course.students_count, course.reviews_count, course.rating_1_count), (2, 1, 0))
+        instructor = Instructor.objects.get(pk=self.instructor.pk)
+        self.assertEqual((instructor.total_students, instructor.reviews_count, instructor.rating_sum), (2, 1, 5))
+        counter_updates = [
+            query for query in queries
+            if query['sql'].startswith(('UPDATE "course_course"', 'UPDATE "course_instructor"'))
+        ]
+        self.assertEqual(len(counter_updates), 2)
+
+    def test_reconcile_repairs_drift(self):
+        course = self.make_course('drifted', sections=1, lessons_per_section=3, reviews=2)
+        Course.objects.filter(pk=course.pk).update(students_count=42, rating_sum=1)
+
+        output = StringIO()
+        call_command('reconcile_course_counters', '--dry-run', stdout=output)
+        self.assertIn('1 drifted course(s) found', output.getvalue())
+        self.assertEqual(Course.objects.get(pk=course.pk).students_count, 42)
+
+        call_command('reconcile_course_counters', stdout=StringIO())
+        course = self.counters(course)
+        self.assertEqual((course.students_count, course.total_lessons, course.rating_sum), (0, 3, 10))
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from apps.course import views
+from apps.recommendations.views import RelatedCoursesAPIView, SimilarCoursesAPIView
 from apps.reviews.views import CourseReviewListCreateView
 
 app_name = 'courses'
@@ -8,5 +9,8 @@ app_name = 'courses'
 urlpatterns = [
     path('', views.CourseListCreateAPIView.as_view(), name='courses'),
     path('<int:pk>/', views.CourseDetailPutPatchDeleteAPIView.as_view(), name='course-detail'),
+    path('<int:pk>/curriculum/', views.CourseCurriculumAPIView.as_view(), name='course-curriculum'),
     path('<int:pk>/reviews/', CourseReviewListCreateView.as_view(), name='course-detail'),
+    path('<int:pk>/similar/', SimilarCoursesAPIView.as_view(), name='course-similar'),
+    path('<int:pk>/related/', RelatedCoursesAPIView.as_view(), name='course-related'),
 ]
\ No newline at end of file
@@ -1,62 +1,106 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef, Subquery, Sum
+from django.utils.decorators import method_decorator
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.course.models import Course
-from apps.course.serializers import CourseListCreateSerializer, CourseDetailSerializer
-
-
+from apps.course.facets import get_catalog_facets, requested_facets
+from apps.course.models import Category, Course, Instructor, curriculum
+from apps.course.pagination import CourseCursorPagination
+from apps.course.serializers import CourseListCreateSerializer, CourseDetailSerializer, InlineInstructorSerializer
+from apps.enrolment.models import Enrollment
+from apps.reviews.models import CourseReview
+from core.cache import course_detail_cache, instructor_cache
+from core.conditional import conditional, latest, newest
+
+
+def catalog_validators(request):
+    courses = Course.objects.catalog(request.GET)
+    if requested_facets(request.GET.get('facets')):
+        # Facet counts ignore the facet's own filter, so any published
+        # course can change them.
+        courses = Course.objects.filter(status='published')
+    flags = {}
+    if request.user.is_authenticated:
+        # The `is_enrolled` flags: enrolling or leaving touches no course
+        # row, so the user's enrollments among the listed courses are part
+        # of the state.
+        enrollment = Subquery(
+            Enrollment.objects.filter(course=OuterRef('pk'), student=request.user).values('pk')[:1]
+        )
+        flags = {'enrolled': Count(enrollment), 'last_enrollment': Max(enrollment)}
+    state = courses.order_by().aggregate(
+        changed_at=Max('changed_at'),
+        count=Count('pk'),
+        students=Sum('students_count'),
+        reviews=Sum('reviews_count'),
+        rating=Sum('rating_sum'),
+        instructors_updated_at=Max('instructor__updated_at'),
+        categories_updated_at=Max('category__updated_at'),
+        **flags,
+        # Dated by the whole tables: a course leaving the list bumps its
+        # own `changed_at`, or its instructor's courses count.
+        courses_changed_at=Max(latest(Course.objects.all(), 'changed_at')),
+        instructors_last_updated_at=Max(latest(Instructor.objects.all(), 'updated_at')),
+        categories_last_updated_at=Max(latest(Category.objects.all(), 'updated_at')),
+    )
+    last_modified = newest(
+        state.pop('courses_changed_at'), state.pop('instructors_last_updated_at'),
+        state.pop('categories_last_updated_at'),
+    )
+    return (request.user.pk, sorted(request.GET.lists()), *state.values()), last_modified
+
+
+def course_detail_validators(request, pk):
+    courses = Course.objects.filter(pk=pk).annotate(
+        reviews_updated_at=Subquery(
+            CourseReview.objects.filter(course=OuterRef('pk')).order_by('-updated_at').values('updated_at')[:1]
+        ),
+    )
+    timestamps = ['changed_at', 'reviews_updated_at', 'instructor__updated_at', 'category__updated_at']
+    fields = [*timestamps, 'students_count', 'reviews_count', 'rating_sum']
+    user = request.user
+    if user.is_authenticated:
+        courses = courses.annotate(
+            user_is_enrolled=Exists(Enrollment.objects.filter(course=OuterRef('pk'), student=user))
+        )
+        fields.append('user_is_enrolled')
+    state = courses.values(*fields).first()
+    if state is None:
+        return None
+    return (user.pk, *state.values()), newest(*(state[name] for name in timestamps))
+
+
+def render_instructor(instructor_id):
+    instructor = Instructor.objects.select_related('user').with_courses_count().filter(pk=instructor_id).first()
+    return None if instructor is None else InlineInstructorSerializer(instructor).data
+
+
+@method_decorator(conditional(catalog_validators, vary=('Authorization',)), name='get')
 class CourseListCreateAPIView(APIView):
     serializer_class = CourseListCreateSerializer
+    pagination_class = CourseCursorPagination
     model = Course
 
     def get_object(self, request):
-        courses = self.model.objects.filter(status='published')
-        cat_id = request.GET.get('cat_id')
-        level = request.GET.get('level')
-        instructor_id = request.GET.get('instructor_id')
-        min_price = request.GET.get('min_price')
-        max_price = request.GET.get('max_price')
-        is_featured = request.GET.get('is_featured')
-        language = request.GET.get('language')
-        search = request.GET.get('search')
-        ordering = request.GET.get('ordering')
-
-        if cat_id:
-            courses = courses.filter(category_id=cat_id)
-
-        if level:
-            courses = courses.filter(level=level)
-
-        if instructor_id:
-            courses = courses.filter(instructor_id=instructor_id)
-
-        if min_price:
-            courses = courses.filter(price__gte=min_price)
-
-        if max_price:
-            courses = courses.filter(price__lte=max_price)
-
-        if is_featured:
-            courses = courses.filter(is_featured=is_featured)
-
-        if language:
-            courses = courses.filter(language=language)
-
-        if search:
-            courses = courses.filter(title__icontains=search)
-
-        if ordering:
-            courses = courses.order_by(ordering)
-        else:
-            courses = courses.order_by('-price')
-
-        return courses
+        return self.model.objects.for_catalog().catalog(request.GET)
 
     def get(self, request):
         courses = self.get_object(request)
-        serializer = self.serializer_class(courses, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(courses, request, view=self)
+        enrolled_ids = Enrollment.objects.enrolled_ids(request.user, [course.pk for course in page])
+        serializer = self.serializer_class(
+            page, many=True, context={'request': request, 'enrolled_ids': enrolled_ids}
+        )
+        response = paginator.get_paginated_response(serializer.data)
+
+        facets = requested_facets(request.GET.get('facets'))
+        if facets:
+            response.data['facets'] = get_catalog_facets(request.GET, facets)
+        return response
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -66,21 +110,51 @@ class CourseListCreateAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@method_decorator(conditional(course_detail_validators, vary=('Authorization',)), name='get')
 class CourseDetailPutPatchDeleteAPIView(APIView):
     serializer_class = CourseDetailSerializer
     model = Course
 
-    def get_object(self, request, pk):
+    def get_object(self, request, pk, queryset=None):
+        if queryset is None:
+            queryset = self.model.objects.all()
         try:
-            course = self.model.objects.get(pk=pk)
+            course = queryset.get(pk=pk)
             return course
         except self.model.DoesNotExist:
-            raise None
+            return None
 
     def get(self, request, pk):
-        course = self.get_object(request, pk)
-        serializer = self.serializer_class(course, context={'request': request})
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        # The cached representation is shared by every user; `is_enrolled`
+        # is worked out per request on top of it. The instructor's running
+        # totals move with every enrollment in any of their courses, so the
+        # instructor is cached as a fragment of its own and the course entry
+        # only keeps its id.
+        computed = {}
+
+        def build():
+            course = self.get_object(request, pk, self.model.objects.for_detail(request.user))
+            if course is None:
+                return None
+            data = dict(self.serializer_class(course, context={'request': request}).data)
+            computed['is_enrolled'] = data.pop('is_enrolled')
+            computed['instructor'] = data['instructor']
+            data['instructor'] = course.instructor_id
+            return data
+
+        data = course_detail_cache.get_or_compute(pk, build)
+        if data is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        instructor = instructor_cache.get_or_compute(
+            data['instructor'], lambda: computed.get('instructor') or render_instructor(data['instructor'])
+        )
+        if 'is_enrolled' in computed:
+            is_enrolled = computed['is_enrolled']
+        else:
+            is_enrolled = request.user.is_authenticated and Enrollment.objects.filter(
+                course_id=pk, student=request.user
+            ).exists()
+        return Response(data=dict(data, instructor=instructor, is_enrolled=is_enrolled), status=status.HTTP_200_OK)
 
     def put(self, request, pk):
         course = self.get_object(request, pk)
@@ -120,13 +194,25 @@ class CourseDetailPutPatchDeleteAPIView(APIView):
         return Response({"detail": "Course deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
 
+class CourseCurriculumAPIView(APIView):
+    model = Course
+    section_fields = ('id', 'title', 'order', 'lessons')
+    lesson_fields = ('id', 'title', 'duration_minutes', 'order', 'is_preview')
 
+    def get(self, request, pk):
+        updated_at = self.model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
 
-
-
-
-
-
-
-
-
+        key = f'course-curriculum:{pk}:{updated_at.timestamp()}'
+        data = cache.get(key)
+        if data is None:
+            data = {
+                'course': pk,
+                'updated_at': updated_at,
+                'section_fields': self.section_fields,
+                'lesson_fields': self.lesson_fields,
+                'sections': curriculum(pk),
+            }
+            cache.set(key, data, settings.CURRICULUM_CACHE_TIMEOUT)
+        return Response(data, status=status.HTTP_200_OK)
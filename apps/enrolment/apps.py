@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EnrolmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.enrolment'
+
+    def ready(self):
+        import apps.enrolment.signals
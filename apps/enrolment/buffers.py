@@ -0,0 +1,88 @@
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.enrolment.models import Enrollment, LessonProgress
+from core.buffers import WriteBehindBuffer
+
+
+class LessonProgressBuffer(WriteBehindBuffer):
+    """
+    Latest heartbeat per `(enrollment id, lesson id)`, as `(watch time in
+    minutes, completed)`. Players report the total watch time, so entries
+    merge by maximum and a lesson stays completed once it has been.
+    Newly completed lessons advance their enrollment's progress.
+    """
+    name = 'lesson_progress'
+    chunk_size = 500
+
+    def merge(self, current, value):
+        return max(current[0], value[0]), current[1] or value[1]
+
+    def write(self, batch):
+        now = timezone.now()
+        items = sorted(batch.items())
+        for start in range(0, len(items), self.chunk_size):
+            chunk = dict(items[start:start + self.chunk_size])
+            with transaction.atomic():
+                upsert_progress(chunk, now)
+                completions = complete_progress([key for key, (_, completed) in chunk.items() if completed], now)
+                by_count = defaultdict(list)
+                for enrollment, count in completions.items():
+                    by_count[count].append(enrollment)
+                for count, enrollments in by_count.items():
+                    Enrollment.objects.filter(pk__in=enrollments).adjust_progress(count)
+
+
+def upsert_progress(entries, now):
+    """
+    Insert or update the `LessonProgress` rows of `entries`, mapping
+    `(enrollment id, lesson id)` to `(watch time, completed)`, in one
+    statement. Rows written by another worker since may be further along,
+    so the conflict update keeps the higher watch time; bulk_create() could
+    only overwrite it. Completions are left to `complete_progress()`.
+    """
+    meta = LessonProgress._meta
+    table = connection.ops.quote_name(meta.db_table)
+    # Sync clients page on updated_at, so upserts must move it.
+    updated_at = meta.get_field('updated_at').get_db_prep_value(now, connection)
+    params = []
+    for (enrollment, lesson), (minutes, _) in entries.items():
+        params += [enrollment, lesson, minutes, False, updated_at]
+    sql = (
+        'INSERT INTO {table} (enrollment_id, lesson_id, watch_time_minutes, is_completed, updated_at) '
+        'VALUES {values} '
+        'ON CONFLICT (enrollment_id, lesson_id) DO UPDATE SET '
+        'watch_time_minutes = CASE WHEN excluded.watch_time_minutes > {table}.watch_time_minutes '
+        'THEN excluded.watch_time_minutes ELSE {table}.watch_time_minutes END, '
+        'updated_at = excluded.updated_at'
+    ).format(table=table, values=', '.join(['(%s, %s, %s, %s, %s)'] * len(entries)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def complete_progress(keys, now):
+    """
+    Mark the `LessonProgress` rows of `keys`, `(enrollment id, lesson id)`
+    pairs, completed in one statement and count the rows it actually
+    changed per enrollment. Only rows not completed yet match, so a lesson
+    completed by two workers at once is counted by one of them.
+    """
+    if not keys:
+        return Counter()
+    meta = LessonProgress._meta
+    completed_at = meta.get_field('completed_at').get_db_prep_value(now, connection)
+    sql = (
+        'UPDATE {table} SET is_completed = %s, completed_at = %s, updated_at = %s '
+        'WHERE NOT is_completed AND (enrollment_id, lesson_id) IN (VALUES {values}) '
+        'RETURNING enrollment_id'
+    ).format(
+        table=connection.ops.quote_name(meta.db_table), values=', '.join(['(%s, %s)'] * len(keys)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [True, completed_at, completed_at, *(value for key in keys for value in key)])
+        return Counter(enrollment for enrollment, in cursor.fetchall())
+
+
+lesson_progress = LessonProgressBuffer()
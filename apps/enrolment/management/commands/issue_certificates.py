@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.enrolment.progress import issue_certificates
+
+
+class Command(BaseCommand):
+    help = 'Issue certificates for completed enrollments. Run it periodically, e.g. every minute from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Certificates per transaction.')
+
+    def handle(self, *args, **options):
+        issued = issue_certificates(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {issued} certificate request(s)'))
@@ -0,0 +1,117 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.course.models import Category, Course, Instructor, Lesson, Section
+from apps.enrolment.buffers import LessonProgressBuffer
+from apps.enrolment.models import Enrollment, LessonProgress
+from apps.enrolment.views import HeartbeatAPIView
+
+User = get_user_model()
+
+
+class InlineBuffer(LessonProgressBuffer):
+    """Flushed by the load test itself, inside its transaction, instead of by a background thread."""
+
+    def _start(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Post heartbeat batches through the ingestion endpoint for a fixed time, flushing the buffer on its '
+        'interval, and report the sustained heartbeat rate and flush costs. Everything runs in a transaction '
+        'that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--learners', type=int, default=2000)
+        parser.add_argument('--lessons', type=int, default=50)
+        parser.add_argument('--batch', type=int, default=10, help='Heartbeats per request.')
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--interval', type=float, default=1, help='Buffer flush interval in seconds.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def run(self, learners, lessons, batch, seconds, interval, **options):
+        students, lesson_ids = self.fixtures(learners, lessons)
+        buffer = InlineBuffer(interval=interval, threshold=float('inf'))
+        view = HeartbeatAPIView.as_view(buffer=buffer)
+        factory = APIRequestFactory()
+        rng = random.Random(0)
+        watched = {}
+
+        requests = heartbeats = peak = 0
+        flushes, flushed_keys = [], 0
+        started = next_flush = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            while time.perf_counter() - started < seconds:
+                student = rng.choice(students)
+                beats = []
+                for lesson in rng.sample(lesson_ids, min(batch, len(lesson_ids))):
+                    minutes = watched[student.pk, lesson] = watched.get((student.pk, lesson), 0) + 1
+                    beats.append({'lesson': lesson, 'watch_time_minutes': minutes, 'is_completed': minutes >= 10})
+                request = factory.post('/enrollments/progress/heartbeats/', {'heartbeats': beats}, format='json')
+                force_authenticate(request, student)
+                response = view(request)
+                assert response.status_code == 202, response.status_code
+                requests += 1
+                heartbeats += len(beats)
+                peak = max(peak, buffer.size())
+                if time.perf_counter() >= next_flush:
+                    flush_started = time.perf_counter()
+                    flushed_keys += buffer.flush()
+                    flushes.append(time.perf_counter() - flush_started)
+                    next_flush = time.perf_counter() + interval
+            flush_started = time.perf_counter()
+            flushed_keys += buffer.flush()
+            flushes.append(time.perf_counter() - flush_started)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{heartbeats} heartbeats in {requests} requests over {elapsed:.1f} s: '
+            f'{heartbeats / elapsed:.0f} heartbeats/s, {requests / elapsed:.0f} requests/s, '
+            f'{len(queries)} queries\n'
+            f'{len(flushes)} flushes of {flushed_keys} keys in total, '
+            f'avg {sum(flushes) / len(flushes) * 1000:.1f} ms, max {max(flushes) * 1000:.1f} ms, '
+            f'peak pending {peak}; {LessonProgress.objects.count()} progress rows, '
+            f'{Enrollment.objects.filter(status="completed").count()} enrollments completed'
+        )
+
+    def fixtures(self, learners, lessons):
+        instructor = Instructor.objects.create(
+            user=User.objects.create(username='heartbeat-loadtest-instructor'), bio='-',
+            profile_image='https://example.com/i.png', expertise='-',
+        )
+        category = Category.objects.create(name='Heartbeat load test', slug='heartbeat-loadtest', description='-',
+                                           icon='-')
+        course = Course.objects.create(
+            title='Heartbeat load test', slug='heartbeat-loadtest', description='-', instructor=instructor,
+            category=category, thumbnail='https://example.com/t.png', price=Decimal('0'), level='beginner',
+            status='published', duration_hours=Decimal('1'), requirements='-', what_you_learn='-',
+        )
+        section = Section.objects.create(course=course, title='Section', order=0)
+        Lesson.objects.bulk_create(
+            Lesson(section=section, title=f'Lesson {order}', content='-', video_url='https://example.com/v',
+                   duration_minutes=10, order=order)
+            for order in range(lessons)
+        )
+        # bulk_create skips the lesson counter signals.
+        Course.objects.filter(pk=course.pk).update(total_lessons=lessons)
+        User.objects.bulk_create(
+            [User(username=f'heartbeat-loadtest-{index}') for index in range(learners)], batch_size=1000
+        )
+        students = list(User.objects.filter(username__startswith='heartbeat-loadtest-').exclude(pk=instructor.user_id))
+        Enrollment.objects.bulk_create(
+            [Enrollment(student=student, course=course) for student in students], batch_size=1000
+        )
+        return students, list(Lesson.objects.filter(section=section).values_list('pk', flat=True))
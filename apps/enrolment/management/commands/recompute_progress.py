@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.course.models import Course
+from apps.enrolment.progress import recompute_progress, request_progress_recompute
+
+
+class Command(BaseCommand):
+    help = (
+        'Rederive enrollment progress for courses whose lessons were added, moved or removed, in bounded '
+        'batches. Run it periodically, e.g. every minute from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Queue every course first, e.g. to repair completion counts after a failure.',
+        )
+        parser.add_argument('--batch-size', type=int, help='Enrollments per transaction.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            request_progress_recompute(*Course.objects.values_list('pk', flat=True))
+        stats = recompute_progress(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {stats["enrollments"]} enrollment(s) in {stats["courses"]} course(s)'
+        ))
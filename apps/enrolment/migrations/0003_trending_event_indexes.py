@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_sync_updated_at'),
+        ('enrolment', '0002_sync_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['enrolled_at'], name='enrolment_e_enrolle_944560_idx'),
+        ),
+    ]
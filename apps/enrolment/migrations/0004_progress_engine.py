@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least, NullIf
+
+
+def backfill_progress(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    Enrollment = apps.get_model('enrolment', 'Enrollment')
+    LessonProgress = apps.get_model('enrolment', 'LessonProgress')
+
+    Enrollment.objects.update(completed_lessons=Coalesce(
+        Subquery(
+            LessonProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True).order_by().values(
+                'enrollment'
+            ).annotate(value=Count('pk')).values('value'),
+            output_field=IntegerField(),
+        ),
+        0,
+    ))
+    total = Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('total_lessons')[:1])
+    Enrollment.objects.update(progress_percentage=Coalesce(
+        Least(models.F('completed_lessons') * 100 / NullIf(total, 0), Value(100)), 0, output_field=IntegerField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0007_instructor_counters'),
+        ('enrolment', '0003_trending_event_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressRecompute',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='course.course')),
+                ('requested_at', models.DateTimeField()),
+                ('cursor', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CertificateRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='certificate_request', to='enrolment.enrollment')),
+            ],
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,74 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least, NullIf
+from django.utils import timezone
+
 from apps.course.models import Course, Lesson
+from core.counters import CounterSourceMixin
 
 User = get_user_model()
 
-class Enrollment(models.Model):
+class EnrollmentQuerySet(models.QuerySet):
+    def enrolled_ids(self, user, course_ids):
+        """The subset of `course_ids` `user` is enrolled in, in one query."""
+        if not user.is_authenticated or not course_ids:
+            return set()
+        return set(self.filter(student=user, course_id__in=course_ids).values_list('course_id', flat=True))
+
+    def adjust_progress(self, completed):
+        """
+        Add `completed` lesson completions and rederive the progress from
+        the course's cached lesson count, in a single UPDATE.
+        """
+        done = F('completed_lessons') + completed
+        updated = self.update(
+            completed_lessons=done, progress_percentage=progress_expression(done), updated_at=timezone.now()
+        )
+        self.complete_finished()
+        return updated
+
+    def recompute_progress(self):
+        """Recount completed lessons from `LessonProgress` and rederive the progress."""
+        done = Coalesce(
+            Subquery(
+                LessonProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True).order_by().values(
+                    'enrollment'
+                ).annotate(value=Count('pk')).values('value'),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+        updated = self.update(
+            completed_lessons=done, progress_percentage=progress_expression(done), updated_at=timezone.now()
+        )
+        self.complete_finished()
+        return updated
+
+    def complete_finished(self):
+        """
+        Mark active enrollments that reached 100% completed and queue their
+        certificates. Completion is kept if lessons are added later.
+        """
+        finished = list(self.filter(status='active', progress_percentage__gte=100).values_list('pk', flat=True))
+        if finished:
+            now = timezone.now()
+            self.model.objects.filter(pk__in=finished, status='active').update(
+                status='completed', completed_at=now, updated_at=now
+            )
+            CertificateRequest.objects.bulk_create(
+                [CertificateRequest(enrollment_id=pk) for pk in finished], ignore_conflicts=True
+            )
+        return finished
+
+
+def progress_expression(done):
+    """Whole percent of the course's lessons `done` stands for; 0 for a course without lessons."""
+    total = Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('total_lessons')[:1])
+    return Coalesce(Least(done * 100 / NullIf(total, 0), Value(100)), 0, output_field=IntegerField())
+
+
+class Enrollment(CounterSourceMixin, models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
         ('completed', 'Completed'),
@@ -16,21 +80,37 @@ class Enrollment(models.Model):
     enrolled_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     progress_percentage = models.IntegerField(default=0)
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False)
     completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    tracked_fields = ('course_id', 'status')
+
+    objects = EnrollmentQuerySet.as_manager()
 
     class Meta:
         unique_together = ['student', 'course']
+        indexes = [
+            models.Index(fields=['student', 'updated_at', 'id']),
+            models.Index(fields=['enrolled_at']),
+        ]
 
 
-class LessonProgress(models.Model):
+class LessonProgress(CounterSourceMixin, models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='lesson_progress')
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     watch_time_minutes = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    tracked_fields = ('enrollment_id', 'is_completed')
 
     class Meta:
         unique_together = ['enrollment', 'lesson']
+        indexes = [
+            models.Index(fields=['enrollment', 'updated_at', 'id']),
+        ]
 
 
 class Certificate(models.Model):
@@ -38,3 +118,20 @@ class Certificate(models.Model):
     certificate_number = models.CharField(max_length=50, unique=True)
     issued_at = models.DateTimeField(auto_now_add=True)
     certificate_url = models.URLField()
+
+
+class CertificateRequest(models.Model):
+    """A completed enrollment waiting for `manage.py issue_certificates`."""
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='certificate_request')
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+
+class ProgressRecompute(models.Model):
+    """
+    A course whose lesson count changed, so the progress of its enrollments
+    must be rederived. `manage.py recompute_progress` works through them in
+    batches, keeping its place in `cursor`; a new change restarts it.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    requested_at = models.DateTimeField()
+    cursor = models.PositiveIntegerField(default=0)
@@ -0,0 +1,70 @@
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.enrolment.models import Certificate, CertificateRequest, Enrollment, ProgressRecompute
+
+
+def request_progress_recompute(*course_ids):
+    """Queue the enrollments of `course_ids` for `recompute_progress()`, restarting any run in progress."""
+    now = timezone.now()
+    for course_id in set(course_ids) - {None}:
+        ProgressRecompute.objects.update_or_create(course_id=course_id, defaults={'requested_at': now, 'cursor': 0})
+
+
+def recompute_progress(batch_size=None):
+    """
+    Rederive the progress of the enrollments of every queued course,
+    `batch_size` enrollments per transaction. A course queued again while
+    its enrollments are being worked through is left for the next run,
+    which starts it over.
+    """
+    batch_size = batch_size or settings.PROGRESS_RECOMPUTE_BATCH_SIZE
+    stats = {'courses': 0, 'enrollments': 0}
+    for job in ProgressRecompute.objects.order_by('requested_at'):
+        current = ProgressRecompute.objects.filter(pk=job.pk, requested_at=job.requested_at)
+        cursor = job.cursor
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    Enrollment.objects.filter(course_id=job.course_id, pk__gt=cursor).order_by('pk').values_list(
+                        'pk', flat=True
+                    )[:batch_size]
+                )
+                if not ids:
+                    stats['courses'] += current.delete()[0] > 0
+                    break
+                stats['enrollments'] += Enrollment.objects.filter(pk__in=ids).recompute_progress()
+                cursor = ids[-1]
+                if not current.update(cursor=cursor):
+                    break
+    return stats
+
+
+def certificate_number():
+    return uuid.uuid4().hex[:16].upper()
+
+
+def issue_certificates(batch_size=None):
+    """Issue a certificate for every queued completion, `batch_size` per transaction."""
+    batch_size = batch_size or settings.CERTIFICATE_BATCH_SIZE
+    issued = 0
+    while True:
+        with transaction.atomic():
+            requests = list(CertificateRequest.objects.order_by('pk').values_list('pk', 'enrollment_id')[:batch_size])
+            if not requests:
+                return issued
+            certificates = []
+            for _, enrollment_id in requests:
+                number = certificate_number()
+                certificates.append(Certificate(
+                    enrollment_id=enrollment_id,
+                    certificate_number=number,
+                    certificate_url=settings.CERTIFICATE_URL_TEMPLATE.format(number=number),
+                ))
+            # Enrollments that already have one are skipped.
+            Certificate.objects.bulk_create(certificates, ignore_conflicts=True)
+            CertificateRequest.objects.filter(pk__in=[pk for pk, _ in requests]).delete()
+            issued += len(requests)
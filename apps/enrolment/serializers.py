@@ -0,0 +1,12 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class HeartbeatSerializer(serializers.Serializer):
+    lesson = serializers.IntegerField(min_value=1)
+    watch_time_minutes = serializers.IntegerField(min_value=0)
+    is_completed = serializers.BooleanField(default=False)
+
+
+class HeartbeatBatchSerializer(serializers.Serializer):
+    heartbeats = HeartbeatSerializer(many=True, allow_empty=False, max_length=settings.LESSON_PROGRESS_HEARTBEAT_BATCH)
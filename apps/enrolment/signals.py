@@ -0,0 +1,103 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.course.counters import adjust_course_counters, adjust_deleted_course_counters
+from apps.course.models import Lesson, Section
+from apps.enrolment.models import Enrollment, LessonProgress
+from apps.enrolment.progress import request_progress_recompute
+from core.counters import deleted_directly
+
+
+def counts_as_student(status):
+    return status != 'dropped'
+
+
+@receiver(post_save, sender=Enrollment)
+def count_saved_enrollment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if counts_as_student(instance.status):
+            adjust_course_counters(instance.course_id, students=1)
+        return
+    changes = instance.tracked_changes()
+    old_course, new_course = changes.get('course_id', (instance.course_id, instance.course_id))
+    was_counted = counts_as_student(changes.get('status', (instance.status,))[0])
+    is_counted = counts_as_student(instance.status)
+    if old_course != new_course:
+        if was_counted:
+            adjust_course_counters(old_course, students=-1)
+        if is_counted:
+            adjust_course_counters(new_course, students=1)
+    elif was_counted != is_counted:
+        adjust_course_counters(instance.course_id, students=1 if is_counted else -1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_deleted_enrollment(sender, instance, origin=None, **kwargs):
+    if counts_as_student(instance.status):
+        adjust_deleted_course_counters(origin, Enrollment, instance.course_id, students=-1)
+
+
+@receiver(post_save, sender=LessonProgress)
+def count_saved_completion(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if instance.is_completed:
+            Enrollment.objects.filter(pk=instance.enrollment_id).adjust_progress(1)
+        return
+    changes = instance.tracked_changes()
+    if 'is_completed' not in changes and 'enrollment_id' not in changes:
+        return
+    old_enrollment, new_enrollment = changes.get('enrollment_id', (instance.enrollment_id, instance.enrollment_id))
+    was_completed = changes.get('is_completed', (instance.is_completed,))[0]
+    if was_completed:
+        Enrollment.objects.filter(pk=old_enrollment).adjust_progress(-1)
+    if instance.is_completed:
+        Enrollment.objects.filter(pk=new_enrollment).adjust_progress(1)
+
+
+@receiver(post_delete, sender=LessonProgress)
+def count_deleted_completion(sender, instance, origin=None, **kwargs):
+    # Progress deleted along with a lesson is recounted by recompute_progress,
+    # and along with its enrollment there is nothing left to update.
+    if instance.is_completed and deleted_directly(origin, LessonProgress):
+        Enrollment.objects.filter(pk=instance.enrollment_id).adjust_progress(-1)
+
+
+@receiver(post_save, sender=Lesson)
+def recompute_for_saved_lesson(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    sections = {instance.section_id}
+    if not created:
+        if 'section_id' not in instance.tracked_changes():
+            return
+        sections.add(instance.tracked_changes()['section_id'][0])
+    request_progress_recompute(*Section.objects.filter(pk__in=sections).values_list('course_id', flat=True))
+
+
+@receiver(post_delete, sender=Lesson)
+def recompute_for_deleted_lesson(sender, instance, origin=None, **kwargs):
+    # Lessons going with their section are requested once by the section's
+    # handler; when the course goes too there are no enrollments left.
+    if deleted_directly(origin, Lesson):
+        request_progress_recompute(
+            *Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Section)
+def recompute_for_deleted_section(sender, instance, origin=None, **kwargs):
+    if deleted_directly(origin, Section):
+        request_progress_recompute(instance.course_id)
+
+
+@receiver(post_save, sender=Section)
+def recompute_for_moved_section(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    changes = instance.tracked_changes()
+    if 'course_id' in changes:
+        request_progress_recompute(*changes['course_id'])
@@ -1,3 +1,174 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.course.models import Category, Course, Instructor, Lesson, Section
+from apps.enrolment.buffers import LessonProgressBuffer
+from apps.enrolment.models import Certificate, CertificateRequest, Enrollment, LessonProgress, ProgressRecompute
+from apps.enrolment.progress import issue_certificates, recompute_progress
+from apps.enrolment.views import HeartbeatAPIView
+
+User = get_user_model()
+
+
+class HeartbeatTests(APITestCase):
+    def setUp(self):
+        instructor = Instructor.objects.create(
+            user=User.objects.create(username='instructor'), bio='bio',
+            profile_image='https://example.com/a.png', expertise='Python',
+        )
+        category = Category.objects.create(name='Programming', slug='programming', description='d', icon='i')
+        self.lessons = []
+        for slug in ('enrolled', 'other'):
+            course = Course.objects.create(
+                title='Complete Django course', slug=slug, description='d' * 60, instructor=instructor,
+                category=category, thumbnail='https://example.com/t.png', price=Decimal('49.99'),
+                level='beginner', status='published', duration_hours=Decimal('10'), requirements='None',
+                what_you_learn='Django',
+            )
+            section = Section.objects.create(course=course, title='Section', order=0)
+            self.lessons.append(Lesson.objects.create(
+                section=section, title='Lesson', content='c', video_url='https://example.com/v',
+                duration_minutes=5, order=0,
+            ))
+        self.student = User.objects.create(username='student')
+        self.enrollment = Enrollment.objects.create(student=self.student, course=self.lessons[0].section.course)
+        self.client.force_authenticate(self.student)
+        self.buffer = LessonProgressBuffer(interval=60)
+        self.addCleanup(self.buffer.flush)
+        patcher = mock.patch.object(HeartbeatAPIView, 'buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def send(self, *heartbeats):
+        return self.client.post('/enrollments/progress/heartbeats/', {'heartbeats': list(heartbeats)}, format='json')
+
+    def test_heartbeats_coalesce_into_one_upsert(self):
+        lesson, other = self.lessons
+        response = self.send(
+            {'lesson': lesson.pk, 'watch_time_minutes': 3},
+            {'lesson': lesson.pk, 'watch_time_minutes': 2, 'is_completed': True},
+            {'lesson': other.pk, 'watch_time_minutes': 1},
+        )
+        self.assertEqual((response.status_code, response.data), (202, {'accepted': 2, 'ignored': 1}))
+        self.assertFalse(LessonProgress.objects.exists())
+
+        self.assertEqual(self.buffer.flush(), 1)
+        progress = LessonProgress.objects.get()
+        self.assertEqual((progress.enrollment_id, progress.lesson_id), (self.enrollment.pk, lesson.pk))
+        self.assertEqual((progress.watch_time_minutes, progress.is_completed), (3, True))
+        completed_at = progress.completed_at
+        self.assertIsNotNone(completed_at)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.progress_percentage, self.enrollment.status), (100, 'completed'))
+
+        # A late heartbeat never moves progress backwards, even past a
+        # row another worker wrote after this one last saw it.
+        LessonProgress.objects.filter(pk=progress.pk).update(watch_time_minutes=7)
+        self.send({'lesson': lesson.pk, 'watch_time_minutes': 4})
+        self.buffer.flush()
+        progress.refresh_from_db()
+        self.assertEqual((progress.watch_time_minutes, progress.is_completed), (7, True))
+        self.assertEqual(progress.completed_at, completed_at)
+
+    def test_only_completions_the_flush_makes_are_counted(self):
+        lesson = self.lessons[0]
+        # Completed by another worker after this buffer took its heartbeat.
+        self.send({'lesson': lesson.pk, 'watch_time_minutes': 5, 'is_completed': True})
+        LessonProgress.objects.create(enrollment=self.enrollment, lesson=lesson, is_completed=True)
+        with CaptureQueriesContext(connection) as queries:
+            self.buffer.flush()
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_lessons, self.enrollment.progress_percentage), (1, 100))
+
+    @override_settings(LESSON_PROGRESS_MAX_PENDING=1)
+    def test_full_buffer_sheds_load(self):
+        self.send({'lesson': self.lessons[0].pk, 'watch_time_minutes': 1})
+        response = self.send({'lesson': self.lessons[0].pk, 'watch_time_minutes': 2})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '60')
+
+
+class ProgressTests(APITestCase):
+    def setUp(self):
+        instructor = Instructor.objects.create(
+            user=User.objects.create(username='instructor'), bio='bio',
+            profile_image='https://example.com/a.png', expertise='Python',
+        )
+        category = Category.objects.create(name='Programming', slug='programming', description='d', icon='i')
+        self.course = Course.objects.create(
+            title='Complete Django course', slug='django', description='d' * 60, instructor=instructor,
+            category=category, thumbnail='https://example.com/t.png', price=Decimal('49.99'), level='beginner',
+            status='published', duration_hours=Decimal('10'), requirements='None', what_you_learn='Django',
+        )
+        self.section = Section.objects.create(course=self.course, title='Section', order=0)
+        self.lessons = [self.add_lesson(order) for order in range(4)]
+        self.enrollment = Enrollment.objects.create(student=User.objects.create(username='student'), course=self.course)
+
+    def add_lesson(self, order):
+        return Lesson.objects.create(
+            section=self.section, title=f'Lesson {order}', content='c', video_url='https://example.com/v',
+            duration_minutes=5, order=order,
+        )
+
+    def complete(self, lesson):
+        return LessonProgress.objects.create(enrollment=self.enrollment, lesson=lesson, is_completed=True)
+
+    def assert_progress(self, completed_lessons, percentage, status):
+        self.enrollment.refresh_from_db()
+        self.assertEqual(
+            (self.enrollment.completed_lessons, self.enrollment.progress_percentage, self.enrollment.status),
+            (completed_lessons, percentage, status),
+        )
+
+    def test_completions_drive_progress_and_certificate(self):
+        first = self.complete(self.lessons[0])
+        self.assert_progress(1, 25, 'active')
+        first.watch_time_minutes = 3
+        with CaptureQueriesContext(connection) as queries:
+            first.save()
+        self.assertFalse([query for query in queries if 'enrolment_enrollment' in query['sql']])
+        self.assert_progress(1, 25, 'active')
+        first.delete()
+        self.assert_progress(0, 0, 'active')
+
+        for lesson in self.lessons:
+            self.complete(lesson)
+        self.assert_progress(4, 100, 'completed')
+        self.assertIsNotNone(self.enrollment.completed_at)
+        self.assertTrue(CertificateRequest.objects.filter(enrollment=self.enrollment).exists())
+
+        self.assertEqual(issue_certificates(), 1)
+        self.assertTrue(Certificate.objects.filter(enrollment=self.enrollment).exists())
+        self.assertFalse(CertificateRequest.objects.exists())
+
+    def test_lesson_changes_recompute_in_batches(self):
+        for lesson in self.lessons[:2]:
+            self.complete(lesson)
+        ProgressRecompute.objects.all().delete()
+        others = Enrollment.objects.bulk_create(
+            Enrollment(student=User.objects.create(username=f'other-{index}'), course=self.course)
+            for index in range(4)
+        )
+
+        self.lessons[0].delete()
+        self.add_lesson(4)
+        self.assertEqual(ProgressRecompute.objects.get().course_id, self.course.pk)
+        self.assertEqual(recompute_progress(batch_size=2), {'courses': 1, 'enrollments': 1 + len(others)})
+        self.assert_progress(1, 25, 'active')
+        self.assertFalse(ProgressRecompute.objects.exists())
+
+    def test_section_delete_requests_one_recompute(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.section.delete()
+        requests = [
+            query for query in queries if query['sql'].startswith('SELECT') and 'progressrecompute' in query['sql']
+        ]
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(ProgressRecompute.objects.get().course_id, self.course.pk)
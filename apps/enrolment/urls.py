@@ -0,0 +1,9 @@
+from django.urls import path
+
+from apps.enrolment import views
+
+app_name = 'enrolment'
+
+urlpatterns = [
+    path('progress/heartbeats/', views.HeartbeatAPIView.as_view(), name='heartbeats'),
+]
@@ -1,3 +1,54 @@
-from django.shortcuts import render
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from apps.enrolment.buffers import lesson_progress
+from apps.enrolment.models import Enrollment
+from apps.enrolment.serializers import HeartbeatBatchSerializer
+from core.metrics import metrics
+
+
+class HeartbeatAPIView(APIView):
+    """
+    Accept a batch of video player heartbeats for the current user.
+
+    Heartbeats are coalesced in memory per enrollment and lesson and
+    written by `lesson_progress` on its flush interval, so a request costs
+    one query however many it carries. While more than
+    LESSON_PROGRESS_MAX_PENDING entries wait to be flushed, new batches
+    are refused with 503 and a Retry-After of one flush interval.
+    """
+    permission_classes = [IsAuthenticated]
+    buffer = lesson_progress
+
+    def post(self, request):
+        if self.buffer.size() >= settings.LESSON_PROGRESS_MAX_PENDING:
+            metrics.incr('heartbeats.shed')
+            return Response(
+                {'detail': 'Progress updates are backed up, retry later.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(max(1, round(self.buffer.interval)))},
+            )
+
+        serializer = HeartbeatBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        heartbeats = serializer.validated_data['heartbeats']
+        enrollments = dict(
+            Enrollment.objects.filter(
+                student=request.user, course__sections__lessons__in={beat['lesson'] for beat in heartbeats},
+            ).exclude(status='dropped').values_list('course__sections__lessons', 'pk')
+        )
+
+        accepted = 0
+        for beat in heartbeats:
+            enrollment = enrollments.get(beat['lesson'])
+            if enrollment is not None:
+                self.buffer.add((enrollment, beat['lesson']), (beat['watch_time_minutes'], beat['is_completed']))
+                accepted += 1
+        metrics.incr('heartbeats.accepted', accepted)
+        metrics.incr('heartbeats.ignored', len(heartbeats) - accepted)
+        return Response(
+            {'accepted': accepted, 'ignored': len(heartbeats) - accepted}, status=status.HTTP_202_ACCEPTED
+        )
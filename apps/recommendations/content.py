@@ -0,0 +1,264 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.blogs.models import Post
+from apps.course.models import Course, Lesson
+from apps.recommendations.models import ContentIndex, ContentVector, RelatedCourse, RelatedPost
+from apps.recommendations.similarity import numpy_modules
+from apps.recommendations.text import HashingVectorizer, inverse_document_frequency, nearest, tfidf, tokenize
+
+CHUNK_SIZE = 1000
+BATCH_SIZE = 2000
+
+
+class ContentSource:
+    """A kind of document in the content similarity index and the table its related lists go to."""
+    kind = None
+    model = None
+    related_model = None
+    owner_field = None
+
+    def published(self):
+        return self.model.objects.filter(status='published')
+
+    def chunk_tokens(self, pks):
+        """Yield `(pk, tokens)` for the objects in `pks`."""
+        raise NotImplementedError
+
+    def documents(self, objects):
+        pks = list(objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), CHUNK_SIZE):
+            yield from self.chunk_tokens(pks[start:start + CHUNK_SIZE])
+
+    def related(self, owner, related, score):
+        return self.related_model(**{self.owner_field + '_id': owner, 'related_id': related, 'score': score})
+
+
+class CourseSource(ContentSource):
+    kind = 'course'
+    model = Course
+    related_model = RelatedCourse
+    owner_field = 'course'
+
+    def chunk_tokens(self, pks):
+        lessons = defaultdict(list)
+        for course_id, title in Lesson.objects.filter(section__course_id__in=pks).values_list(
+            'section__course_id', 'title'
+        ):
+            lessons[course_id].append(title)
+        for pk, title, description, what_you_learn in Course.objects.filter(pk__in=pks).values_list(
+            'pk', 'title', 'description', 'what_you_learn'
+        ):
+            yield pk, tokenize('\n'.join([title, description, what_you_learn, *lessons[pk]]))
+
+
+class PostSource(ContentSource):
+    """Post text, plus one pseudo-term per tag so shared tags count towards similarity."""
+    kind = 'post'
+    model = Post
+    related_model = RelatedPost
+    owner_field = 'post'
+
+    def chunk_tokens(self, pks):
+        tags = defaultdict(list)
+        for post_id, tag_id in Post.tags.through.objects.filter(post_id__in=pks).values_list('post_id', 'tag_id'):
+            tags[post_id] += [f'#tag{tag_id}'] * settings.RELATED_CONTENT_TAG_WEIGHT
+        for pk, title, excerpt, content in Post.objects.filter(pk__in=pks).values_list(
+            'pk', 'title', 'excerpt', 'content'
+        ):
+            yield pk, tokenize('\n'.join([title, excerpt, content])) + tags[pk]
+
+
+SOURCES = {source.kind: source for source in (CourseSource(), PostSource())}
+
+
+def vectorize(source, objects, idf=None):
+    """`(ids, counts, vectors, idf)` for `objects`; the IDF is computed from them unless given."""
+    np, _ = numpy_modules()
+    ids = []
+
+    def tokens():
+        for pk, document in source.documents(objects):
+            ids.append(pk)
+            yield document
+
+    counts = HashingVectorizer(settings.RELATED_CONTENT_FEATURES).counts(tokens())
+    if idf is None:
+        idf = inverse_document_frequency(counts, settings.RELATED_CONTENT_MAX_DF)
+    vectors = tfidf(counts, idf, settings.RELATED_CONTENT_TERMS)
+    return np.array(ids, dtype=np.int64), vectors, idf
+
+
+def store_vectors(kind, ids, vectors):
+    ContentVector.objects.bulk_create(
+        [
+            ContentVector(
+                kind=kind,
+                object_id=pk,
+                terms=vectors.indices[vectors.indptr[row]:vectors.indptr[row + 1]].astype('<i4').tobytes(),
+                weights=vectors.data[vectors.indptr[row]:vectors.indptr[row + 1]].astype('<f4').tobytes(),
+            )
+            for row, pk in enumerate(ids.tolist())
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def load_vectors(kind):
+    """Every stored vector of `kind` as `(ids, CSR matrix)`."""
+    np, sparse = numpy_modules()
+    ids, indptr, terms, weights = [], [0], [], []
+    for object_id, row_terms, row_weights in ContentVector.objects.filter(kind=kind).order_by().values_list(
+        'object_id', 'terms', 'weights'
+    ).iterator(chunk_size=BATCH_SIZE):
+        ids.append(object_id)
+        terms.append(np.frombuffer(row_terms, dtype='<i4'))
+        weights.append(np.frombuffer(row_weights, dtype='<f4'))
+        indptr.append(indptr[-1] + len(terms[-1]))
+    matrix = sparse.csr_matrix(
+        (
+            np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+            np.concatenate(terms) if terms else np.zeros(0, dtype=np.int32),
+            np.array(indptr, dtype=np.int64),
+        ),
+        shape=(len(ids), settings.RELATED_CONTENT_FEATURES),
+    )
+    return np.array(ids, dtype=np.int64), matrix
+
+
+def store_related(source, neighbours):
+    source.related_model.objects.bulk_create(
+        [source.related(*row) for row in zip(*(column.tolist() for column in neighbours))],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def build(source, until):
+    """Vectorize every published document and recompute all related lists."""
+    ids, vectors, idf = vectorize(source, source.published().filter(updated_at__lte=until))
+    neighbours = nearest(
+        vectors, ids, vectors, ids, settings.RELATED_CONTENT_SIZE, settings.RELATED_CONTENT_MIN_SCORE
+    )
+    with transaction.atomic():
+        ContentVector.objects.filter(kind=source.kind).delete()
+        source.related_model.objects.all().delete()
+        store_vectors(source.kind, ids, vectors)
+        store_related(source, neighbours)
+        ContentIndex.objects.update_or_create(kind=source.kind, defaults={
+            'documents': len(ids),
+            'idf': idf.tobytes(),
+            'watermark': until,
+            'built_at': timezone.now(),
+        })
+    return {'documents': len(ids), 'related': len(neighbours[0])}
+
+
+def offer(source, owners, related, scores):
+    """
+    Add `related` to the lists of `owners` and trim every list touched back
+    to RELATED_CONTENT_SIZE, dropping the weakest entries.
+    """
+    source.related_model.objects.bulk_create(
+        [source.related(*row) for row in zip(owners, related, scores)], ignore_conflicts=True, batch_size=BATCH_SIZE
+    )
+    owner_id = source.owner_field + '_id'
+    rows = source.related_model.objects.filter(**{owner_id + '__in': set(owners)}).order_by(
+        owner_id, '-score', 'pk'
+    ).values_list('pk', owner_id)
+    seen = Counter()
+    extra = []
+    for pk, owner in rows:
+        seen[owner] += 1
+        if seen[owner] > settings.RELATED_CONTENT_SIZE:
+            extra.append(pk)
+    source.related_model.objects.filter(pk__in=extra).delete()
+
+
+def fold_in(source, index, until):
+    """
+    Revectorize documents changed since the watermark against the stored
+    IDF, recompute their related lists, and offer them to the lists of
+    their neighbours. Unpublished and deleted documents drop out.
+    """
+    np, sparse = numpy_modules()
+    changed = set(source.model.objects.filter(
+        updated_at__gt=index.watermark, updated_at__lte=until
+    ).values_list('pk', flat=True))
+    live = set(source.published().values_list('pk', flat=True))
+    stored_ids, stored = load_vectors(source.kind)
+    stale = changed | {pk for pk in stored_ids.tolist() if pk not in live}
+    if not stale:
+        index.watermark = until
+        index.save(update_fields=['watermark'])
+        return {'documents': 0, 'related': 0}
+
+    idf = np.frombuffer(index.idf, dtype=np.float32)
+    ids, vectors, _ = vectorize(source, source.published().filter(pk__in=changed & live), idf)
+    keep = ~np.isin(stored_ids, list(stale))
+    corpus_ids = np.concatenate([stored_ids[keep], ids])
+    corpus = sparse.vstack([stored[keep], vectors], format='csr')
+    neighbours = nearest(
+        vectors, ids, corpus, corpus_ids, settings.RELATED_CONTENT_SIZE, settings.RELATED_CONTENT_MIN_SCORE
+    )
+    owner_id = source.owner_field + '_id'
+    with transaction.atomic():
+        ContentVector.objects.filter(kind=source.kind, object_id__in=stale).delete()
+        store_vectors(source.kind, ids, vectors)
+        trimmed = set(source.related_model.objects.filter(related_id__in=stale).exclude(
+            **{owner_id + '__in': stale}
+        ).values_list(owner_id, flat=True))
+        source.related_model.objects.filter(Q(**{owner_id + '__in': stale}) | Q(related_id__in=stale)).delete()
+        store_related(source, neighbours)
+        # Cosine is symmetric: each changed document may now belong on its neighbours' lists.
+        owners, related, scores = (column.tolist() for column in neighbours)
+        offer(source, related, owners, scores)
+        refilled = refill(source, trimmed, corpus, corpus_ids)
+        index.watermark = until
+        index.save(update_fields=['watermark'])
+    return {'documents': len(ids), 'related': len(owners) + refilled}
+
+
+def refill(source, owners, corpus, corpus_ids):
+    """
+    Recompute the lists of `owners` that lost entries to stale documents
+    and now hold fewer than RELATED_CONTENT_SIZE, so they take up the
+    candidates trimmed from them before.
+    """
+    np, _ = numpy_modules()
+    owner_id = source.owner_field + '_id'
+    full = set(source.related_model.objects.filter(**{owner_id + '__in': owners}).values(owner_id).annotate(
+        entries=Count('pk')
+    ).filter(entries__gte=settings.RELATED_CONTENT_SIZE).values_list(owner_id, flat=True))
+    rows = np.flatnonzero(np.isin(corpus_ids, list(owners - full)))
+    if not len(rows):
+        return 0
+    neighbours = nearest(
+        corpus[rows], corpus_ids[rows], corpus, corpus_ids,
+        settings.RELATED_CONTENT_SIZE, settings.RELATED_CONTENT_MIN_SCORE,
+    )
+    source.related_model.objects.filter(**{owner_id + '__in': corpus_ids[rows].tolist()}).delete()
+    store_related(source, neighbours)
+    return len(neighbours[0])
+
+
+def refresh_related_content(kinds=None, full=False, now=None):
+    """
+    Bring the related course and post lists up to date, reading changes up
+    to RELATED_CONTENT_SETTLE_SECONDS ago. The first run for a kind, and a
+    `full` one, rebuilds it, which also refreshes the IDF weights.
+    """
+    until = (now or timezone.now()) - timedelta(seconds=settings.RELATED_CONTENT_SETTLE_SECONDS)
+    stats = {}
+    for kind in kinds or SOURCES:
+        source = SOURCES[kind]
+        index = ContentIndex.objects.filter(kind=kind).first()
+        if full or index is None:
+            stats[kind] = build(source, until)
+        else:
+            stats[kind] = fold_in(source, index, until)
+    return stats
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.similarity import recommend, similar_courses
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the similarity and recommendation steps on a synthetic enrollment matrix with skewed course '
+        'popularity. Nothing touches the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type=int, default=1000000)
+        parser.add_argument('--students', type=int, default=100000)
+        parser.add_argument('--courses', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('NumPy and SciPy are required for recommendations.')
+
+        rng = np.random.default_rng(options['seed'])
+        popularity = 1 / np.arange(1, options['courses'] + 1) ** 0.8
+        pairs = np.column_stack([
+            rng.integers(1, options['students'] + 1, options['enrollments']),
+            rng.choice(np.arange(1, options['courses'] + 1), options['enrollments'], p=popularity / popularity.sum()),
+        ])
+        pairs = np.unique(pairs, axis=0)
+        self.stdout.write(f'{len(pairs)} enrollments, {options["students"]} students, {options["courses"]} courses')
+
+        began = time.perf_counter()
+        neighbours = similar_courses(pairs, settings.RECOMMENDATIONS_SIMILAR_COURSES, settings.RECOMMENDATIONS_SHRINK)
+        self.stdout.write(f'similar courses: {len(neighbours[0])} rows in {time.perf_counter() - began:.2f} s')
+
+        began = time.perf_counter()
+        recommendations = recommend(pairs, neighbours, settings.RECOMMENDATIONS_PER_STUDENT)
+        self.stdout.write(f'recommendations: {len(recommendations[0])} rows in {time.perf_counter() - began:.2f} s')
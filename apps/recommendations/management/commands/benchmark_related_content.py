@@ -0,0 +1,72 @@
+import resource
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.text import HashingVectorizer, inverse_document_frequency, nearest, tfidf, tokenize
+
+
+class Command(BaseCommand):
+    help = (
+        'Time building the content similarity index over synthetic posts, and folding a handful of edited posts '
+        'into it, and report peak memory. Nothing touches the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--words', type=int, default=300, help='Words per post.')
+        parser.add_argument('--topics', type=int, default=2000)
+        parser.add_argument('--changed', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('NumPy and SciPy are required for content similarity.')
+
+        posts = self.generate(np, options)
+        ids = np.arange(1, len(posts) + 1, dtype=np.int64)
+
+        began = time.perf_counter()
+        counts = HashingVectorizer(settings.RELATED_CONTENT_FEATURES).counts(tokenize(text) for text in posts)
+        idf = inverse_document_frequency(counts, settings.RELATED_CONTENT_MAX_DF)
+        vectors = tfidf(counts, idf, settings.RELATED_CONTENT_TERMS)
+        vectorized = time.perf_counter() - began
+        neighbours = nearest(
+            vectors, ids, vectors, ids, settings.RELATED_CONTENT_SIZE, settings.RELATED_CONTENT_MIN_SCORE
+        )
+        built = time.perf_counter() - began
+        self.stdout.write(
+            f'build: {len(posts)} posts, vectorized in {vectorized:.1f} s, {len(neighbours[0])} related rows '
+            f'in {built:.1f} s total; {vectors.nnz * 8 / 2 ** 20:.0f} MB of vectors, '
+            f'peak RSS {self.peak_mb():.0f} MB including the post texts'
+        )
+
+        changed = ids[:options['changed']]
+        began = time.perf_counter()
+        counts = HashingVectorizer(settings.RELATED_CONTENT_FEATURES).counts(
+            tokenize(posts[pk - 1]) for pk in changed.tolist()
+        )
+        fresh = tfidf(counts, idf, settings.RELATED_CONTENT_TERMS)
+        nearest(fresh, changed, vectors, ids, settings.RELATED_CONTENT_SIZE, settings.RELATED_CONTENT_MIN_SCORE)
+        self.stdout.write(f'fold-in: {len(changed)} edited posts in {(time.perf_counter() - began) * 1000:.0f} ms')
+
+    def generate(self, np, options):
+        """Posts mixing Zipf-distributed common words with words from one of `topics` topics."""
+        rng = np.random.default_rng(options['seed'])
+        vocabulary = np.array([f'word{index}' for index in range(100000)])
+        popularity = 1 / np.arange(1, len(vocabulary) + 1) ** 1.07
+        topics = rng.integers(0, len(vocabulary), (options['topics'], 200))
+        half = options['words'] // 2
+        posts = []
+        for start in range(0, options['posts'], 1000):
+            size = min(1000, options['posts'] - start)
+            common = rng.choice(len(vocabulary), (size, half), p=popularity / popularity.sum())
+            topical = topics[rng.integers(0, options['topics'], size)[:, None], rng.integers(0, 200, (size, half))]
+            posts += [' '.join(words) for words in vocabulary[np.concatenate([common, topical], axis=1)].tolist()]
+        return posts
+
+    def peak_mb(self):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
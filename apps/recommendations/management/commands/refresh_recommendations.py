@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.refresh import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold new enrollments into the similar-course and recommendation tables. Run it periodically, and with '
+        '--full now and then (e.g. nightly) to pick up dropped enrollments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild both tables from every enrollment.')
+
+    def handle(self, *args, **options):
+        stats = refresh_recommendations(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats["enrollments"]} enrollment(s) read, {stats["courses"]} course(s) rescored, '
+            f'{stats["recommendations"]} recommendation(s) stored'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.content import SOURCES, refresh_related_content
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold new and edited courses and posts into the content similarity index and their related lists. '
+        'Run it periodically, and with --full now and then to refresh the IDF weights.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(SOURCES), action='append', help='Only refresh this kind.')
+        parser.add_argument('--full', action='store_true', help='Rebuild the index from every published document.')
+
+    def handle(self, *args, **options):
+        stats = refresh_related_content(kinds=options['kind'], full=options['full'])
+        for kind, counts in stats.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: {counts["documents"]} document(s) vectorized, {counts["related"]} related row(s) stored'
+            ))
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from apps.blogs.models import Post
+from apps.course.models import Course
+
+User = get_user_model()
+
+
+class RecommendationState(models.Model):
+    """
+    The single row of refresh state: `watermark` is the newest enrollment
+    time folded in, `built_at` the time of the last full build.
+    """
+    watermark = models.DateTimeField(null=True, blank=True)
+    built_at = models.DateTimeField(null=True, blank=True)
+
+
+class SimilarCourse(models.Model):
+    """One of the top-K neighbours of `course` by co-enrollment cosine."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    similar = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ['course', 'similar']
+        indexes = [
+            models.Index(fields=['course', '-score']),
+        ]
+
+
+class CourseRecommendation(models.Model):
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_recommendations')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ['student', 'course']
+        indexes = [
+            models.Index(fields=['student', '-score']),
+        ]
+
+
+class ContentIndex(models.Model):
+    """
+    Corpus statistics for one kind of document in the content similarity
+    index: the hashed-term IDF weights of the last full build, and the
+    `updated_at` watermark of the newest change folded in since.
+    """
+    kind = models.CharField(max_length=20, unique=True)
+    documents = models.PositiveIntegerField(default=0)
+    idf = models.BinaryField()
+    watermark = models.DateTimeField(null=True, blank=True)
+    built_at = models.DateTimeField()
+
+
+class ContentVector(models.Model):
+    """A document's pruned, L2-normalised TF-IDF vector as parallel int32/float32 arrays."""
+    kind = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    terms = models.BinaryField()
+    weights = models.BinaryField()
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+
+
+class RelatedCourse(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    related = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ['course', 'related']
+        indexes = [
+            models.Index(fields=['course', '-score']),
+        ]
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ['post', 'related']
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
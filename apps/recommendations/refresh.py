@@ -0,0 +1,124 @@
+import itertools
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.enrolment.models import Enrollment
+from apps.recommendations.models import CourseRecommendation, RecommendationState, SimilarCourse
+from apps.recommendations.similarity import recommend, similar_courses
+
+BATCH_SIZE = 2000
+
+
+def active_enrollments():
+    return Enrollment.objects.exclude(status='dropped').order_by()
+
+
+def fetch_pairs(enrollments):
+    """`(student id, course id)` rows of `enrollments` as an n x 2 array, without building model tuples."""
+    import numpy as np
+
+    sql, params = enrollments.values_list('student_id', 'course_id').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        flat = np.fromiter(itertools.chain.from_iterable(cursor), dtype=np.int64)
+    return flat.reshape(-1, 2)
+
+
+def store_neighbours(neighbours):
+    SimilarCourse.objects.bulk_create(
+        [
+            SimilarCourse(course_id=course, similar_id=similar, score=score)
+            for course, similar, score in zip(*(column.tolist() for column in neighbours))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def store_recommendations(pairs, neighbours):
+    if not len(pairs):
+        return 0
+    recommendations = recommend(pairs, neighbours, settings.RECOMMENDATIONS_PER_STUDENT)
+    CourseRecommendation.objects.bulk_create(
+        [
+            CourseRecommendation(student_id=student, course_id=course, score=score)
+            for student, course, score in zip(*(column.tolist() for column in recommendations))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return len(recommendations[0])
+
+
+def build(until):
+    pairs = fetch_pairs(active_enrollments().filter(enrolled_at__lte=until))
+    neighbours = similar_courses(
+        pairs, settings.RECOMMENDATIONS_SIMILAR_COURSES, settings.RECOMMENDATIONS_SHRINK
+    )
+    SimilarCourse.objects.all().delete()
+    CourseRecommendation.objects.all().delete()
+    store_neighbours(neighbours)
+    recommended = store_recommendations(pairs, neighbours)
+    return {'enrollments': len(pairs), 'courses': len(set(neighbours[0].tolist())), 'recommendations': recommended}
+
+
+def fold_in(since, until):
+    """
+    Recompute the neighbour rows of every course a newly enrolled student
+    takes, and those students' recommendations. Other rows keep their old
+    normalisation until the next full build.
+    """
+    students = list(
+        Enrollment.objects.filter(enrolled_at__gt=since, enrolled_at__lte=until).values_list(
+            'student_id', flat=True
+        ).distinct()
+    )
+    if not students:
+        return {'enrollments': 0, 'courses': 0, 'recommendations': 0}
+    own = active_enrollments().filter(student_id__in=students, enrolled_at__lte=until)
+    affected = list(own.values_list('course_id', flat=True).distinct())
+    co_enrolled = active_enrollments().filter(
+        student_id__in=active_enrollments().filter(course_id__in=affected).values('student_id'),
+        enrolled_at__lte=until,
+    )
+    pairs = fetch_pairs(co_enrolled)
+    counts = dict(
+        active_enrollments().filter(course_id__in=set(pairs[:, 1].tolist()), enrolled_at__lte=until).values(
+            'course_id'
+        ).annotate(total=Count('pk')).values_list('course_id', 'total')
+    )
+    neighbours = similar_courses(
+        pairs, settings.RECOMMENDATIONS_SIMILAR_COURSES, settings.RECOMMENDATIONS_SHRINK, counts=counts, only=affected
+    )
+    SimilarCourse.objects.filter(course_id__in=affected).delete()
+    store_neighbours(neighbours)
+    # The students' own courses are all in `affected`, so the rows just
+    # computed are every neighbour their recommendations need.
+    CourseRecommendation.objects.filter(student_id__in=students).delete()
+    recommended = store_recommendations(fetch_pairs(own), neighbours)
+    return {'enrollments': len(pairs), 'courses': len(affected), 'recommendations': recommended}
+
+
+def refresh_recommendations(full=False, now=None):
+    """
+    Bring the similar-course and recommendation tables up to date.
+
+    Incremental runs fold in the enrollments made since the last run, read
+    up to RECOMMENDATIONS_SETTLE_SECONDS ago; a full build recomputes
+    everything and is also what picks up dropped and deleted enrollments.
+    The first run is always a full build.
+    """
+    now = now or timezone.now()
+    until = now - timedelta(seconds=settings.RECOMMENDATIONS_SETTLE_SECONDS)
+    with transaction.atomic():
+        state, _ = RecommendationState.objects.select_for_update().get_or_create(pk=1)
+        if full or state.watermark is None:
+            stats = build(until)
+            state.built_at = now
+        else:
+            stats = fold_in(state.watermark, until)
+        state.watermark = until
+        state.save()
+    return stats
@@ -0,0 +1,57 @@
+from rest_framework import serializers
+
+from apps.recommendations.models import CourseRecommendation, RelatedCourse, RelatedPost, SimilarCourse
+
+
+class SimilarCourseSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='similar_id')
+    title = serializers.CharField(source='similar.title')
+    slug = serializers.CharField(source='similar.slug')
+    thumbnail = serializers.URLField(source='similar.thumbnail')
+    price = serializers.DecimalField(source='similar.price', max_digits=10, decimal_places=2)
+    level = serializers.CharField(source='similar.level')
+    average_rating = serializers.FloatField(source='similar.average_rating')
+
+    class Meta:
+        model = SimilarCourse
+        fields = ['id', 'title', 'slug', 'thumbnail', 'price', 'level', 'average_rating', 'score']
+
+
+class CourseRecommendationSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='course_id')
+    title = serializers.CharField(source='course.title')
+    slug = serializers.CharField(source='course.slug')
+    thumbnail = serializers.URLField(source='course.thumbnail')
+    price = serializers.DecimalField(source='course.price', max_digits=10, decimal_places=2)
+    level = serializers.CharField(source='course.level')
+    average_rating = serializers.FloatField(source='course.average_rating')
+
+    class Meta:
+        model = CourseRecommendation
+        fields = ['id', 'title', 'slug', 'thumbnail', 'price', 'level', 'average_rating', 'score']
+
+
+class RelatedCourseSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='related_id')
+    title = serializers.CharField(source='related.title')
+    slug = serializers.CharField(source='related.slug')
+    thumbnail = serializers.URLField(source='related.thumbnail')
+    price = serializers.DecimalField(source='related.price', max_digits=10, decimal_places=2)
+    level = serializers.CharField(source='related.level')
+    average_rating = serializers.FloatField(source='related.average_rating')
+
+    class Meta:
+        model = RelatedCourse
+        fields = ['id', 'title', 'slug', 'thumbnail', 'price', 'level', 'average_rating', 'score']
+
+
+class RelatedPostSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='related_id')
+    title = serializers.CharField(source='related.title')
+    slug = serializers.CharField(source='related.slug')
+    excerpt = serializers.CharField(source='related.excerpt')
+    published_at = serializers.DateTimeField(source='related.published_at')
+
+    class Meta:
+        model = RelatedPost
+        fields = ['id', 'title', 'slug', 'excerpt', 'published_at', 'score']
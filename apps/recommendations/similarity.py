@@ -0,0 +1,105 @@
+"""
+Item-item collaborative filtering over a binary student x course matrix.
+
+Everything here works on NumPy arrays of ids and leaves the database to
+`apps.recommendations.refresh`. NumPy and SciPy are imported on first
+use so the rest of the project does not depend on them.
+"""
+
+
+def numpy_modules():
+    import numpy
+    from scipy import sparse
+
+    return numpy, sparse
+
+
+def top_k(rows, cols, scores, k):
+    """
+    Keep the `k` highest scores of every row of a COO triplet. Scores must
+    be non-negative: rows and scores are folded into one float key, as a
+    single argsort is several times faster than a lexsort here.
+    """
+    np, _ = numpy_modules()
+    if not len(rows):
+        return rows, cols, scores
+    key = rows + (1 - scores / (2 * scores.max() or 1))
+    order = np.argsort(key)
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    starts = np.concatenate(([0], np.cumsum(np.bincount(rows))[:-1]))
+    keep = np.arange(len(rows)) - starts[rows] < k
+    return rows[keep], cols[keep], scores[keep]
+
+
+def interaction_matrix(pairs, courses=None):
+    """
+    The binary CSR matrix of `(student id, course id)` pairs, with the
+    sorted student ids and course ids its rows and columns stand for.
+    `courses` adds columns for ids that have no pair.
+    """
+    np, sparse = numpy_modules()
+    students, rows = np.unique(pairs[:, 0], return_inverse=True)
+    if courses is None:
+        courses, cols = np.unique(pairs[:, 1], return_inverse=True)
+    else:
+        courses = np.union1d(courses, pairs[:, 1])
+        cols = np.searchsorted(courses, pairs[:, 1])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, cols)), shape=(len(students), len(courses))
+    )
+    return matrix, students, courses
+
+
+def similar_courses(pairs, k, shrink=0.0, counts=None, only=None):
+    """
+    Top-`k` neighbours per course as `(course ids, similar ids, scores)`.
+
+    The score is co-enrollments / (sqrt(n_i * n_j) + shrink), the cosine
+    of the two course columns damped for pairs with little support.
+    `counts` maps course ids to enrollment totals when `pairs` holds only
+    part of the matrix; `only` restricts the rows computed to those course
+    ids, which is what an incremental refresh needs.
+    """
+    np, _ = numpy_modules()
+    matrix, _, courses = interaction_matrix(pairs)
+    if counts is None:
+        totals = np.asarray(matrix.sum(axis=0), dtype=np.float64).ravel()
+    else:
+        totals = np.array([counts.get(course, 0) for course in courses.tolist()], dtype=np.float64)
+
+    if only is None:
+        positions = np.arange(len(courses))
+        co = (matrix.T @ matrix).tocoo()
+    else:
+        positions = np.flatnonzero(np.isin(courses, only))
+        co = (matrix[:, positions].T @ matrix).tocoo()
+    rows = positions[co.row]
+    off_diagonal = rows != co.col
+    rows, cols, data = rows[off_diagonal], co.col[off_diagonal], co.data[off_diagonal]
+    scores = data / (np.sqrt(totals[rows] * totals[cols]) + shrink)
+    rows, cols, scores = top_k(rows, cols, scores, k)
+    return courses[rows], courses[cols], scores
+
+
+def recommend(pairs, neighbours, n):
+    """
+    Top-`n` unseen courses per student as `(student ids, course ids,
+    scores)`: each candidate scores the summed similarity to the courses
+    the student is enrolled in. `neighbours` is the output of
+    `similar_courses()`.
+    """
+    np, sparse = numpy_modules()
+    course_ids, similar_ids, similarity = neighbours
+    matrix, students, courses = interaction_matrix(pairs, np.union1d(course_ids, similar_ids))
+    size = len(courses)
+    neighbour_matrix = sparse.csr_matrix(
+        (similarity, (np.searchsorted(courses, course_ids), np.searchsorted(courses, similar_ids))),
+        shape=(size, size),
+    )
+    scored = matrix @ neighbour_matrix
+    # Zero out the courses the student already takes.
+    scored = scored - scored.multiply(matrix)
+    scored.eliminate_zeros()
+    scored = scored.tocoo()
+    rows, cols, scores = top_k(scored.row, scored.col, scored.data, n)
+    return students[rows], courses[cols], scores
@@ -0,0 +1,109 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.blogs.models import Post, Tag
+from apps.course.tests import CourseFixtureMixin, User
+from apps.enrolment.models import Enrollment
+from apps.recommendations.content import refresh_related_content
+from apps.recommendations.models import CourseRecommendation, RelatedPost, SimilarCourse
+from apps.recommendations.refresh import refresh_recommendations
+
+
+@override_settings(RECOMMENDATIONS_SETTLE_SECONDS=0)
+class RecommendationTests(CourseFixtureMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.python, self.django, self.cooking = [
+            self.make_course(slug, sections=0, lessons_per_section=0, reviews=0)
+            for slug in ('python', 'django', 'cooking')
+        ]
+        self.students = [User.objects.create(username=f'learner-{index}') for index in range(4)]
+        for student in self.students[:3]:
+            Enrollment.objects.create(student=student, course=self.python)
+            Enrollment.objects.create(student=student, course=self.django)
+        Enrollment.objects.create(student=self.students[3], course=self.cooking)
+        Enrollment.objects.create(student=self.students[0], course=self.cooking)
+
+    def test_build_and_fold_in(self):
+        refresh_recommendations()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/courses/{self.python.pk}/similar/')
+        self.assertEqual([row['id'] for row in response.data], [self.django.pk, self.cooking.pk])
+
+        self.client.force_authenticate(self.students[1])
+        response = self.client.get('/recommendations/courses/')
+        self.assertEqual([row['id'] for row in response.data], [self.cooking.pk])
+
+        Enrollment.objects.create(student=self.student, course=self.python)
+        refresh_recommendations()
+        self.assertEqual(
+            list(CourseRecommendation.objects.filter(student=self.student).order_by('-score').values_list(
+                'course_id', flat=True
+            )),
+            [self.django.pk, self.cooking.pk],
+        )
+        # Four of five python students also take django now.
+        score = SimilarCourse.objects.get(course=self.python, similar=self.django).score
+        self.assertAlmostEqual(score, 3 / ((4 * 3) ** 0.5 + 10))
+
+
+@override_settings(RELATED_CONTENT_SETTLE_SECONDS=0, RELATED_CONTENT_MAX_DF=1.0)
+class RelatedContentTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.django_tag = Tag.objects.create(name='django')
+        texts = [
+            ('Prefetching', 'Django querysets select_related prefetch_related database queries'),
+            ('Aggregation', 'Django querysets annotate aggregate database indexes'),
+            ('Baking', 'Sourdough bread baking hydration starter'),
+        ]
+        self.posts = [
+            Post.objects.create(author=self.author, title=title, content=content, status=Post.STATUS_PUBLISHED)
+            for title, content in texts
+        ]
+        for post in self.posts[:2]:
+            post.tags.add(self.django_tag)
+
+    def test_build_and_fold_in(self):
+        refresh_related_content(kinds=['post'])
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/blogs/{self.posts[0].pk}/related/')
+        self.assertEqual([row['id'] for row in response.data], [self.posts[1].pk])
+
+        post = Post.objects.create(
+            author=self.author, title='Bread', content='Sourdough starter hydration', status=Post.STATUS_PUBLISHED
+        )
+        refresh_related_content(kinds=['post'])
+        related = RelatedPost.objects.filter(post=self.posts[2]).values_list('related_id', flat=True)
+        self.assertEqual(list(related), [post.pk])
+
+        self.posts[1].status = Post.STATUS_DRAFT
+        self.posts[1].save()
+        refresh_related_content(kinds=['post'])
+        self.assertFalse(RelatedPost.objects.filter(related=self.posts[1]).exists())
+
+    def test_tag_changes_are_folded_in(self):
+        refresh_related_content(kinds=['post'])
+        self.assertFalse(RelatedPost.objects.filter(post=self.posts[2]).exists())
+
+        self.posts[2].tags.add(self.django_tag)
+        refresh_related_content(kinds=['post'])
+        related = RelatedPost.objects.filter(post=self.posts[2]).values_list('related_id', flat=True)
+        self.assertTrue(set(related) & {self.posts[0].pk, self.posts[1].pk})
+
+    @override_settings(RELATED_CONTENT_SIZE=1)
+    def test_trimmed_lists_are_refilled(self):
+        extra = Post.objects.create(
+            author=self.author, title='Querysets', content='Django querysets database queries indexes',
+            status=Post.STATUS_PUBLISHED,
+        )
+        extra.tags.add(self.django_tag)
+        refresh_related_content(kinds=['post'])
+        first = RelatedPost.objects.get(post=self.posts[0]).related
+
+        first.status = Post.STATUS_DRAFT
+        first.save()
+        refresh_related_content(kinds=['post'])
+        remaining = ({self.posts[1].pk, extra.pk} - {first.pk}).pop()
+        related = RelatedPost.objects.filter(post=self.posts[0]).values_list('related_id', flat=True)
+        self.assertEqual(list(related), [remaining])
@@ -0,0 +1,109 @@
+"""
+Hashed TF-IDF document vectors and cosine nearest neighbours over them.
+
+Terms are hashed into a fixed number of buckets with CRC32, which is
+stable across processes, so vectors stored by one run stay comparable
+with vectors computed by the next without keeping a vocabulary.
+"""
+import re
+import zlib
+from array import array
+from collections import Counter
+
+from apps.recommendations.similarity import numpy_modules, top_k
+
+TOKEN_RE = re.compile(r'\w\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class HashingVectorizer:
+    def __init__(self, features):
+        self.features = features
+        self._buckets = {}
+
+    def bucket(self, token):
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            bucket = self._buckets[token] = zlib.crc32(token.encode('utf-8')) % self.features
+        return bucket
+
+    def counts(self, documents):
+        """CSR matrix of hashed term counts with one row per token list in `documents`."""
+        np, sparse = numpy_modules()
+        bucket = self.bucket
+        # Typed arrays keep millions of entries compact, unlike lists of ints.
+        indptr, cols, values = array('q', [0]), array('i'), array('f')
+        for tokens in documents:
+            counts = Counter(tokens)
+            cols.extend(map(bucket, counts))
+            values.extend(counts.values())
+            indptr.append(len(cols))
+        matrix = sparse.csr_matrix(
+            (
+                np.frombuffer(values, dtype=np.float32),
+                np.frombuffer(cols, dtype=np.int32),
+                np.frombuffer(indptr, dtype=np.int64),
+            ),
+            shape=(len(indptr) - 1, self.features),
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+
+def inverse_document_frequency(counts, max_df=1.0):
+    """Smoothed IDF per bucket; buckets in more than `max_df` of the documents get 0, like stop words."""
+    np, _ = numpy_modules()
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = (np.log((1 + counts.shape[0]) / (1 + df)) + 1).astype(np.float32)
+    idf[df > max_df * counts.shape[0]] = 0
+    return idf
+
+
+def tfidf(counts, idf, terms, block_size=10000):
+    """
+    Sublinear TF x IDF of `counts`, keeping only the `terms` heaviest
+    terms of each row, L2-normalised. Pruning drops most of the common
+    terms, which is what keeps the neighbour products sparse. Rows are
+    weighed in blocks to bound the temporary arrays.
+    """
+    np, sparse = numpy_modules()
+    blocks = []
+    for start in range(0, counts.shape[0], block_size):
+        coo = counts[start:start + block_size].tocoo()
+        weights = (1 + np.log(coo.data)) * idf[coo.col]
+        rows, cols, weights = top_k(coo.row, coo.col, weights, terms)
+        blocks.append(sparse.csr_matrix((weights, (rows, cols)), shape=coo.shape, dtype=np.float32))
+    if not blocks:
+        return sparse.csr_matrix(counts.shape, dtype=np.float32)
+    matrix = sparse.vstack(blocks, format='csr')
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).astype(np.float32) @ matrix
+
+
+def nearest(queries, query_ids, corpus, corpus_ids, k, min_score, block_size=500):
+    """
+    The `k` rows of `corpus` most similar to each row of `queries`, as
+    `(query ids, corpus ids, scores)`, skipping a document's match with
+    itself and scores under `min_score`. Rows are L2-normalised, so the
+    product is the cosine; it is taken in blocks of queries to bound
+    memory.
+    """
+    np, _ = numpy_modules()
+    corpus_t = corpus.T.tocsr()
+    result = ([], [], [])
+    for start in range(0, queries.shape[0], block_size):
+        scores = (queries[start:start + block_size] @ corpus_t).tocoo()
+        rows = scores.row + start
+        keep = (scores.data >= min_score) & (query_ids[rows] != corpus_ids[scores.col])
+        rows, cols, values = top_k(rows[keep], scores.col[keep], scores.data[keep], k)
+        result[0].append(query_ids[rows])
+        result[1].append(corpus_ids[cols])
+        result[2].append(values)
+    if not result[0]:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+    return tuple(np.concatenate(column) for column in result)
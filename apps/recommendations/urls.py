@@ -0,0 +1,9 @@
+from django.urls import path
+
+from apps.recommendations import views
+
+app_name = 'recommendations'
+
+urlpatterns = [
+    path('courses/', views.CourseRecommendationsAPIView.as_view(), name='courses'),
+]
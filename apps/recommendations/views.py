@@ -0,0 +1,58 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.recommendations.models import CourseRecommendation, RelatedCourse, RelatedPost, SimilarCourse
+from apps.recommendations.serializers import (
+    CourseRecommendationSerializer, RelatedCourseSerializer, RelatedPostSerializer, SimilarCourseSerializer,
+)
+
+
+class SimilarCoursesAPIView(APIView):
+    """Published courses most often taken together with this one, from the precomputed neighbours."""
+    serializer_class = SimilarCourseSerializer
+
+    def get(self, request, pk):
+        neighbours = SimilarCourse.objects.filter(course_id=pk, similar__status='published').select_related(
+            'similar'
+        ).order_by('-score')
+        serializer = self.serializer_class(neighbours, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class CourseRecommendationsAPIView(APIView):
+    """Published courses recommended to the current user, best first."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = CourseRecommendationSerializer
+
+    def get(self, request):
+        recommendations = CourseRecommendation.objects.filter(
+            student=request.user, course__status='published'
+        ).select_related('course').order_by('-score')
+        serializer = self.serializer_class(recommendations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class RelatedCoursesAPIView(APIView):
+    """Published courses with the most similar content, from the precomputed related lists."""
+    serializer_class = RelatedCourseSerializer
+
+    def get(self, request, pk):
+        related = RelatedCourse.objects.filter(course_id=pk, related__status='published').select_related(
+            'related'
+        ).order_by('-score')
+        serializer = self.serializer_class(related, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class RelatedPostsAPIView(APIView):
+    """Published posts with the most similar content and tags, from the precomputed related lists."""
+    serializer_class = RelatedPostSerializer
+
+    def get(self, request, pk):
+        related = RelatedPost.objects.filter(post_id=pk, related__status='published').select_related(
+            'related'
+        ).order_by('-score')
+        serializer = self.serializer_class(related, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0005_course_rating_histogram'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursereview',
+            index=models.Index(fields=['course', 'created_at', 'id'], name='reviews_cou_course__79b00f_idx'),
+        ),
+    ]
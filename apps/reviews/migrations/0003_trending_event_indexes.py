@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_sync_updated_at'),
+        ('reviews', '0002_coursereview_feed_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursereview',
+            index=models.Index(fields=['created_at'], name='reviews_cou_created_344461_idx'),
+        ),
+    ]
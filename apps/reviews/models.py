@@ -1,10 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from apps.course.models import Course, Lesson
+from core.counters import CounterSourceMixin
 
 User = get_user_model()
 
-class CourseReview(models.Model):
+class CourseReview(CounterSourceMixin, models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='reviews')
     student = models.ForeignKey(User, on_delete=models.CASCADE)
     rating = models.IntegerField()
@@ -13,8 +14,14 @@ class CourseReview(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    tracked_fields = ('course_id', 'rating')
+
     class Meta:
         unique_together = ['course', 'student']
+        indexes = [
+            models.Index(fields=['course', 'created_at', 'id']),
+            models.Index(fields=['created_at']),
+        ]
 
 
 class Question(models.Model):
@@ -0,0 +1,8 @@
+from core.pagination import KeysetPagination
+
+
+class ReviewCursorPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 100
+    ordering_fields = ('-created_at', 'created_at')
+    default_ordering = '-created_at'
@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.course.counters import adjust_course_counters, adjust_deleted_course_counters, course_deleted_with
+from apps.reviews.models import CourseReview
+from core.cache import course_detail_cache
+
+
+@receiver(post_save, sender=CourseReview)
+def count_saved_review(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_course_counters(instance.course_id, reviews=1, rating=instance.rating, stars={instance.rating: 1})
+        return
+
+    changes = instance.tracked_changes()
+    if 'course_id' in changes:
+        old_course, new_course = changes['course_id']
+        old_rating = changes.get('rating', (instance.rating,))[0]
+        adjust_course_counters(old_course, reviews=-1, rating=-old_rating, stars={old_rating: -1})
+        adjust_course_counters(new_course, reviews=1, rating=instance.rating, stars={instance.rating: 1})
+    elif 'rating' in changes:
+        old_rating, new_rating = changes['rating']
+        adjust_course_counters(
+            instance.course_id, rating=new_rating - old_rating, stars={old_rating: -1, new_rating: 1}
+        )
+
+
+@receiver(post_delete, sender=CourseReview)
+def count_deleted_review(sender, instance, origin=None, **kwargs):
+    adjust_deleted_course_counters(
+        origin, CourseReview, instance.course_id, reviews=-1, rating=-instance.rating, stars={instance.rating: -1}
+    )
+
+
+@receiver(post_save, sender=CourseReview)
+@receiver(post_delete, sender=CourseReview)
+def invalidate_review_course(sender, instance, origin=None, **kwargs):
+    if course_deleted_with(origin, instance.course_id):
+        return
+    old_course = instance.tracked_changes().get('course_id', (None,))[0]
+    course_detail_cache.invalidate(instance.course_id, old_course)
@@ -1,3 +1,51 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from apps.course.models import Category, Course, Instructor
+from apps.enrolment.models import Enrollment
+from apps.reviews.models import CourseReview
+
+User = get_user_model()
+
+
+class ReviewEligibilityTests(APITestCase):
+    def setUp(self):
+        instructor = Instructor.objects.create(
+            user=User.objects.create(username='instructor'), bio='bio',
+            profile_image='https://example.com/a.png', expertise='Python',
+        )
+        category = Category.objects.create(name='Programming', slug='programming', description='d', icon='i')
+        self.course = Course.objects.create(
+            title='Complete Django course', slug='django', description='d' * 60, instructor=instructor,
+            category=category, thumbnail='https://example.com/t.png', price=Decimal('49.99'), level='beginner',
+            status='published', duration_hours=Decimal('10'), requirements='None', what_you_learn='Django',
+        )
+        self.student = User.objects.create(username='student')
+        self.client.force_authenticate(self.student)
+
+    def post_review(self):
+        return self.client.post(
+            f'/courses/{self.course.pk}/reviews/',
+            {'rating': 4, 'title': 'Solid course', 'comment': 'c' * 20},
+        )
+
+    def test_eligibility_messages(self):
+        self.assertEqual(self.post_review().data['detail'], 'You not joined this course.')
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course, progress_percentage=20)
+        self.assertEqual(self.post_review().data['detail'], 'You need complete more course for write review.')
+        Enrollment.objects.filter(pk=enrollment.pk).update(progress_percentage=50)
+        self.assertEqual(self.post_review().status_code, 201)
+        self.assertEqual(self.post_review().data['detail'], 'You already write review for this course.')
+
+    def test_eligibility_is_one_query_regardless_of_course_size(self):
+        Enrollment.objects.bulk_create(
+            Enrollment(student=User.objects.create(username=f'other-{index}'), course=self.course)
+            for index in range(20)
+        )
+        Enrollment.objects.create(student=self.student, course=self.course, progress_percentage=50)
+        CourseReview.objects.create(course=self.course, student=self.student, rating=5, title='Great', comment='c' * 20)
+        with self.assertNumQueries(1):
+            response = self.post_review()
+        self.assertEqual(response.status_code, 400)
@@ -1,12 +1,13 @@
-from django.db.models.aggregates import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticated
 
-from apps.course.models import Course
+from apps.course.serializers import InlineReviewSerializer
 from apps.enrolment.models import Enrollment
 from apps.reviews.models import CourseReview
-from apps.reviews.serializers import CourseReviewListCreateSerializer, ReviewRetrieveUpdateDestroySerializer, \
-    PagePaginationSerializer
+from apps.reviews.pagination import ReviewCursorPagination
+from apps.reviews.serializers import CourseReviewListCreateSerializer, ReviewRetrieveUpdateDestroySerializer
 
 
 from rest_framework.exceptions import ValidationError
@@ -15,22 +16,38 @@ class CourseReviewListCreateView(ListCreateAPIView):
     queryset = CourseReview.objects.all()
     serializer_class = CourseReviewListCreateSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = PagePaginationSerializer
+    pagination_class = ReviewCursorPagination
+
+    def get_queryset(self):
+        return CourseReview.objects.filter(course_id=self.kwargs['pk']).select_related('student')
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return InlineReviewSerializer
+        return self.serializer_class
 
     def perform_create(self, serializer):
-        course = Course.objects.get(pk=self.kwargs['pk'])
+        # Enrollment and any existing review in one lookup on the
+        # (student, course) unique indexes of both tables.
+        enrolment = Enrollment.objects.filter(student=self.request.user, course_id=self.kwargs['pk']).annotate(
+            reviewed=Exists(CourseReview.objects.filter(course_id=OuterRef('course_id'), student=self.request.user))
+        ).values('progress_percentage', 'reviewed').first()
 
-        if self.request.user not in (enrolment.student for enrolment in course.enrollments.all()):
+        if enrolment is None:
             raise ValidationError({"detail": "You not joined this course."})
 
-        if self.request.user in (review.student for review in course.reviews.all()):
+        if enrolment['reviewed']:
             raise ValidationError({"detail": "You already write review for this course."})
 
-        enrolment = Enrollment.objects.get(student=self.request.user, course=course)
-        if enrolment.progress_percentage <= 20:
+        if enrolment['progress_percentage'] <= 20:
             raise ValidationError({"detail": "You need complete more course for write review."})
 
-        serializer.save(student=self.request.user, course=course)
+        try:
+            with transaction.atomic():
+                serializer.save(student=self.request.user, course_id=self.kwargs['pk'])
+        except IntegrityError:
+            # A concurrent request got there first.
+            raise ValidationError({"detail": "You already write review for this course."})
 
 
 
@@ -42,17 +59,6 @@ class ReviewRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return CourseReview.objects.filter(student=self.request.user)
 
-    def perform_update(self, serializer):
-        review = serializer.save()
-
-        instructor = review.course.instructor
-        avg_rating = CourseReview.objects.filter(course__instructor=instructor).aggregate(
-            avg=Avg('rating')
-        )['avg'] or 0
-
-        instructor.rating = round(avg_rating, 2)
-        instructor.save()
-
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
 
@@ -0,0 +1,150 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from apps.search.models import SearchDocument
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+DOCUMENT_TABLE = SearchDocument._meta.db_table
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query or '')[:16]
+
+
+class SearchHit:
+    __slots__ = ('kind', 'object_id', 'title', 'snippet', 'rank')
+
+    def __init__(self, kind, object_id, title, snippet, rank):
+        self.kind = kind
+        self.object_id = object_id
+        self.title = title
+        self.snippet = snippet
+        self.rank = rank
+
+
+class BaseSearchBackend:
+    def matching_ids_sql(self, query, kind):
+        """
+        Return `(sql, params)` selecting the ids of public objects of `kind`
+        that match `query`, suitable for `filter(pk__in=RawSQL(sql, params))`.
+        """
+        raise NotImplementedError
+
+    def search(self, query, kind=None, limit=20, offset=0):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    fts_table = DOCUMENT_TABLE + '_fts'
+
+    def build_match(self, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        terms = ['"{}"'.format(token.replace('"', '""')) for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def matching_ids_sql(self, query, kind):
+        match = self.build_match(query)
+        if match is None:
+            return 'SELECT object_id FROM {} WHERE 0'.format(DOCUMENT_TABLE), []
+        sql = (
+            'SELECT d.object_id FROM {fts} JOIN {doc} d ON d.id = {fts}.rowid '
+            'WHERE {fts} MATCH %s AND d.kind = %s AND d.is_public'
+        ).format(fts=self.fts_table, doc=DOCUMENT_TABLE)
+        return sql, [match, kind]
+
+    def search(self, query, kind=None, limit=20, offset=0):
+        match = self.build_match(query)
+        if match is None:
+            return []
+        sql = (
+            "SELECT d.kind, d.object_id, d.title, "
+            "snippet({fts}, 1, '<mark>', '</mark>', '…', 16), bm25({fts}, 5.0, 1.0) AS rank "
+            "FROM {fts} JOIN {doc} d ON d.id = {fts}.rowid "
+            "WHERE {fts} MATCH %s AND d.is_public"
+        ).format(fts=self.fts_table, doc=DOCUMENT_TABLE)
+        params = [match]
+        if kind:
+            sql += ' AND d.kind = %s'
+            params.append(kind)
+        sql += ' ORDER BY rank LIMIT %s OFFSET %s'
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [SearchHit(k, object_id, title, snippet, -rank) for k, object_id, title, snippet, rank in cursor]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    def build_query(self, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        return ' & '.join(token + ':*' if i == len(tokens) - 1 else token for i, token in enumerate(tokens))
+
+    def matching_ids_sql(self, query, kind):
+        tsquery = self.build_query(query)
+        if tsquery is None:
+            return 'SELECT object_id FROM {} WHERE false'.format(DOCUMENT_TABLE), []
+        sql = (
+            "SELECT object_id FROM {doc} "
+            "WHERE search_vector @@ to_tsquery('simple', %s) AND kind = %s AND is_public"
+        ).format(doc=DOCUMENT_TABLE)
+        return sql, [tsquery, kind]
+
+    def search(self, query, kind=None, limit=20, offset=0):
+        tsquery = self.build_query(query)
+        if tsquery is None:
+            return []
+        sql = (
+            "SELECT kind, object_id, title, "
+            "ts_headline('simple', body, q, 'StartSel=<mark>, StopSel=</mark>, MaxWords=16, MinWords=8'), "
+            "ts_rank_cd(search_vector, q) AS rank "
+            "FROM {doc}, to_tsquery('simple', %s) q "
+            "WHERE search_vector @@ q AND is_public"
+        ).format(doc=DOCUMENT_TABLE)
+        params = [tsquery]
+        if kind:
+            sql += ' AND kind = %s'
+            params.append(kind)
+        sql += ' ORDER BY rank DESC LIMIT %s OFFSET %s'
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [SearchHit(*row) for row in cursor]
+
+
+class FallbackSearchBackend(BaseSearchBackend):
+    """Substring matching for databases without a full-text engine."""
+
+    def filter_documents(self, query, kind):
+        documents = SearchDocument.objects.filter(is_public=True)
+        if kind:
+            documents = documents.filter(kind=kind)
+        for token in tokenize(query):
+            documents = documents.filter(Q(title__icontains=token) | Q(body__icontains=token))
+        return documents
+
+    def matching_ids_sql(self, query, kind):
+        sql, params = self.filter_documents(query, kind).values('object_id').query.sql_with_params()
+        return sql, list(params)
+
+    def search(self, query, kind=None, limit=20, offset=0):
+        if not tokenize(query):
+            return []
+        documents = self.filter_documents(query, kind).order_by('-source_updated_at')[offset:offset + limit]
+        return [
+            SearchHit(document.kind, document.object_id, document.title, document.body[:160], 0.0)
+            for document in documents
+        ]
+
+
+def get_backend():
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return FallbackSearchBackend()
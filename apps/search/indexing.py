@@ -0,0 +1,95 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Max
+
+from apps.blogs.models import Post
+from apps.course.models import Course, Lesson
+from apps.search.models import SearchDocument
+
+
+def course_document(course):
+    lesson_titles = Lesson.objects.filter(section__course=course).order_by(
+        'section__order', 'order', 'id'
+    ).values_list('title', flat=True)
+    body = '\n'.join([course.description, course.what_you_learn, *lesson_titles])
+    return {
+        'title': course.title,
+        'body': body,
+        'is_public': course.status == 'published',
+        'source_updated_at': course.updated_at,
+    }
+
+
+def post_document(post):
+    return {
+        'title': post.title,
+        'body': '\n'.join(filter(None, [post.excerpt, post.content])),
+        'is_public': post.status == Post.STATUS_PUBLISHED,
+        'source_updated_at': post.updated_at,
+    }
+
+
+INDEXED_MODELS = {
+    SearchDocument.KIND_COURSE: (Course, course_document),
+    SearchDocument.KIND_POST: (Post, post_document),
+}
+
+
+def index_object(kind, instance):
+    _, build_document = INDEXED_MODELS[kind]
+    SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=build_document(instance))
+
+
+_pending = threading.local()
+
+
+def index_courses_on_commit(*course_ids):
+    """
+    Reindex `course_ids` once the current transaction commits, so a batch
+    of lesson changes to a course rebuilds its document only once.
+    """
+    pending = _pending.__dict__.setdefault('courses', set())
+    pending.update(course_ids)
+    transaction.on_commit(_index_pending_courses)
+
+
+def _index_pending_courses():
+    # Every change registers this callback; the first one to run does the work.
+    pending = _pending.__dict__.setdefault('courses', set())
+    course_ids = set(pending)
+    pending.clear()
+    for course in Course.objects.filter(pk__in=course_ids):
+        index_object(SearchDocument.KIND_COURSE, course)
+
+
+def remove_object(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def reindex(kind, full=False, batch_size=500):
+    """
+    Bring the documents of `kind` up to date.
+
+    An incremental run only visits objects whose `updated_at` is newer than
+    the newest indexed one; a full run visits everything and drops documents
+    whose object no longer exists. Returns `(indexed, removed)`.
+    """
+    model, _ = INDEXED_MODELS[kind]
+    objects = model.objects.order_by('updated_at', 'pk')
+    if not full:
+        watermark = SearchDocument.objects.filter(kind=kind).aggregate(value=Max('source_updated_at'))['value']
+        if watermark is not None:
+            objects = objects.filter(updated_at__gt=watermark)
+
+    indexed = 0
+    for instance in objects.iterator(chunk_size=batch_size):
+        index_object(kind, instance)
+        indexed += 1
+
+    removed = 0
+    if full:
+        removed, _ = SearchDocument.objects.filter(kind=kind).exclude(
+            object_id__in=model.objects.values('pk')
+        ).delete()
+    return indexed, removed
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.search.indexing import INDEXED_MODELS, reindex
+
+
+class Command(BaseCommand):
+    help = 'Update the full-text search index for courses and blog posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(INDEXED_MODELS), help='Only reindex this kind of object.')
+        parser.add_argument('--full', action='store_true', help='Reindex everything and prune stale documents.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        kinds = [options['kind']] if options['kind'] else sorted(INDEXED_MODELS)
+        for kind in kinds:
+            indexed, removed = reindex(kind, full=options['full'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{kind}: {indexed} indexed, {removed} removed'))
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    KIND_COURSE = 'course'
+    KIND_POST = 'post'
+    KIND_CHOICES = [
+        (KIND_COURSE, 'Course'),
+        (KIND_POST, 'Post'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=300)
+    body = models.TextField(blank=True)
+    is_public = models.BooleanField(default=True)
+    source_updated_at = models.DateTimeField(null=True, blank=True)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        indexes = [
+            models.Index(fields=['kind', 'source_updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
@@ -0,0 +1,11 @@
+from rest_framework import serializers
+
+from apps.search.models import SearchDocument
+
+
+class SearchHitSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=SearchDocument.KIND_CHOICES)
+    object_id = serializers.IntegerField()
+    title = serializers.CharField()
+    snippet = serializers.CharField()
+    rank = serializers.FloatField()
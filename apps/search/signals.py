@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.blogs.models import Post
+from apps.course.models import Course, Lesson, Section
+from apps.search.indexing import index_courses_on_commit, index_object, remove_object
+from apps.search.models import SearchDocument
+from core.counters import deleted_directly
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(SearchDocument.KIND_COURSE, instance)
+
+
+@receiver(post_delete, sender=Course)
+def remove_course(sender, instance, **kwargs):
+    remove_object(SearchDocument.KIND_COURSE, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(SearchDocument.KIND_POST, instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post(sender, instance, **kwargs):
+    remove_object(SearchDocument.KIND_POST, instance.pk)
+
+
+@receiver(post_save, sender=Lesson)
+def reindex_saved_lesson_course(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sections = {instance.section_id, instance.tracked_changes().get('section_id', (None,))[0]} - {None}
+    index_courses_on_commit(*Section.objects.filter(pk__in=sections).values_list('course_id', flat=True))
+
+
+@receiver(post_delete, sender=Lesson)
+def reindex_deleted_lesson_course(sender, instance, origin=None, **kwargs):
+    # A lesson going with its course needs no reindex: the document goes too.
+    if deleted_directly(origin, Lesson, Section):
+        index_courses_on_commit(
+            *Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True)
+        )
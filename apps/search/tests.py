@@ -0,0 +1,100 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.blogs.models import Post
+from apps.course.models import Category, Course, Instructor, Lesson, Section
+from apps.search.models import SearchDocument
+
+User = get_user_model()
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.instructor = Instructor.objects.create(
+            user=self.author, bio='bio', profile_image='https://example.com/a.png', expertise='Python',
+        )
+        self.category = Category.objects.create(name='Programming', slug='programming', description='d', icon='i')
+
+    def make_course(self, slug, title, lessons=()):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(
+                title=title, slug=slug, description='A practical course. ' * 4, instructor=self.instructor,
+                category=self.category, thumbnail='https://example.com/t.png', price=Decimal('10'),
+                level='beginner', status='published', duration_hours=Decimal('1'), requirements='None',
+                what_you_learn='Things',
+            )
+            section = Section.objects.create(course=course, title='Section', order=0)
+            for order, lesson in enumerate(lessons):
+                Lesson.objects.create(section=section, title=lesson, content='c', video_url='https://example.com/v',
+                                      duration_minutes=5, order=order)
+        return course
+
+    def make_post(self, slug, title, content):
+        return Post.objects.create(
+            author=self.author, title=title, slug=slug, content=content, status=Post.STATUS_PUBLISHED,
+            published_at=timezone.now(),
+        )
+
+    def search(self, query, **params):
+        response = self.client.get('/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_signals_keep_documents_current(self):
+        course = self.make_course('django', 'Web development', lessons=['Middleware internals'])
+        hits = self.search('middleware')
+        self.assertEqual([(hit['kind'], hit['object_id']) for hit in hits], [('course', course.pk)])
+        self.assertIn('<mark>Middleware</mark>', hits[0]['snippet'])
+
+        course.status = 'draft'
+        course.save()
+        self.assertEqual(self.search('middleware'), [])
+
+        course.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind='course', object_id=course.pk).exists())
+
+    def test_title_matches_rank_first_and_prefixes_match(self):
+        body = self.make_post('body', 'Cooking notes', 'Some thoughts on asynchronous programming.')
+        title = self.make_post('title', 'Asynchronous Python', 'Event loops explained.')
+        hits = self.search('asynchron', type='post')
+        self.assertEqual([hit['object_id'] for hit in hits], [title.pk, body.pk])
+        self.assertEqual(len(self.search('asynchron', type='post', page_size=-1)), 1)
+
+    def test_lesson_changes_reindex_the_course_once_and_not_on_course_delete(self):
+        course = self.make_course('django', 'Web development', lessons=['One', 'Two', 'Three'])
+        with mock.patch('apps.search.indexing.index_object') as index_object:
+            with self.captureOnCommitCallbacks(execute=True):
+                course.sections.get().delete()
+        self.assertEqual(index_object.call_count, 1)
+
+        course = self.make_course('flask', 'Microframeworks', lessons=['One', 'Two'])
+        with mock.patch('apps.search.signals.index_courses_on_commit') as index_courses:
+            course.delete()
+        index_courses.assert_not_called()
+
+    def test_reindex_command_rebuilds_and_prunes(self):
+        course = self.make_course('django', 'Web development', lessons=['Middleware internals'])
+        post = self.make_post('post', 'Middleware patterns', 'Layers.')
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.create(kind='post', object_id=post.pk + 100, title='Gone')
+
+        call_command('reindex_search', '--full', stdout=mock.MagicMock())
+        self.assertEqual({hit['object_id'] for hit in self.search('middleware')}, {course.pk, post.pk})
+        self.assertFalse(SearchDocument.objects.filter(object_id=post.pk + 100).exists())
+
+    def test_search_parameter_filters_catalog_and_feed(self):
+        course = self.make_course('django', 'Web development', lessons=['Middleware internals'])
+        self.make_course('flask', 'Microframeworks')
+        post = self.make_post('post', 'Middleware patterns', 'Layers.')
+        self.make_post('other', 'Gardening', 'Tomatoes.')
+
+        courses = self.client.get('/courses/', {'search': 'middleware'}).data['results']
+        self.assertEqual([row['slug'] for row in courses], [course.slug])
+        posts = self.client.get('/blogs/', {'search': 'middleware'}).data['results']
+        self.assertEqual([row['id'] for row in posts], [post.pk])
@@ -0,0 +1,29 @@
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.search.backends import get_backend
+from apps.search.models import SearchDocument
+from apps.search.serializers import SearchHitSerializer
+
+
+class SearchAPIView(APIView):
+    serializer_class = SearchHitSerializer
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        query = request.GET.get('q', '')
+        kind = request.GET.get('type')
+        if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+            raise ValidationError({'type': 'Type must be one of course, post'})
+        try:
+            limit = max(1, min(int(request.GET.get('page_size', self.page_size)), self.max_page_size))
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            raise ValidationError({'detail': 'page_size and offset must be integers'})
+
+        hits = get_backend().search(query, kind=kind, limit=limit, offset=offset)
+        serializer = self.serializer_class(hits, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,125 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.course.models import Course, Lesson, Section
+from apps.enrolment.models import Enrollment, LessonProgress
+from apps.sync.models import Tombstone
+
+
+class SyncSource:
+    """One synced table: the columns sent to clients and the rows a user sees."""
+
+    def __init__(self, kind, model, fields, owner_lookup=None, scope=None):
+        self.kind = kind
+        self.model = model
+        self.fields = fields
+        self.owner_lookup = owner_lookup
+        self.scope = scope or Q()
+
+    def queryset(self, user):
+        if self.owner_lookup is None:
+            return self.model.objects.filter(self.scope)
+        if not user.is_authenticated:
+            return None
+        return self.model.objects.filter(self.scope, **{self.owner_lookup: user})
+
+
+# Enrollment and review counters change without touching `updated_at`,
+# so they are left to the course endpoints; the lesson totals do bump it.
+SOURCES = (
+    SyncSource('course', Course, (
+        'id', 'title', 'slug', 'description', 'instructor_id', 'category_id', 'thumbnail', 'price',
+        'discount_percentage', 'level', 'status', 'duration_hours', 'language', 'is_featured', 'total_lessons',
+        'total_duration', 'created_at', 'updated_at',
+    )),
+    SyncSource('section', Section, (
+        'id', 'course_id', 'title', 'description', 'order', 'updated_at',
+    ), scope=Q(course__status='published')),
+    SyncSource('lesson', Lesson, (
+        'id', 'section_id', 'title', 'duration_minutes', 'order', 'is_preview', 'updated_at',
+    ), scope=Q(section__course__status='published')),
+    SyncSource('enrollment', Enrollment, (
+        'id', 'course_id', 'status', 'progress_percentage', 'enrolled_at', 'completed_at', 'updated_at',
+    ), owner_lookup='student'),
+    SyncSource('lesson_progress', LessonProgress, (
+        'id', 'enrollment_id', 'lesson_id', 'is_completed', 'completed_at', 'watch_time_minutes', 'updated_at',
+    ), owner_lookup='enrollment__student'),
+)
+
+
+def batched(queryset, batch_size, time_field='updated_at'):
+    """
+    Yield the rows of a `values()` queryset ordered by (`time_field`, id),
+    reading `batch_size` rows per query with a keyset predicate.
+    """
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(**{time_field + '__gt': last[0]}) | Q(**{time_field: last[0], 'id__gt': last[1]}))
+        rows = list(page.order_by(time_field, 'id')[:batch_size])
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1][time_field], rows[-1]['id']
+
+
+class ChangeFeed:
+    """
+    The rows of every SyncSource created, updated or deleted in
+    (`since`, `until`], as newline-delimited JSON.
+
+    `until` trails the clock by SYNC_SETTLE_SECONDS so that rows stamped just
+    before a request but committed just after it still land in the next
+    window. A missing watermark, or one older than the tombstone retention,
+    starts a full sync: the feed opens with a `reset` line and the client
+    replaces its mirror.
+    """
+
+    def __init__(self, user, since=None, batch_size=None):
+        now = timezone.now()
+        self.user = user
+        self.until = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        horizon = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        self.since = since if since is not None and since >= horizon else None
+        self.batch_size = batch_size or settings.SYNC_BATCH_SIZE
+
+    def window(self, field):
+        window = Q(**{field + '__lte': self.until})
+        if self.since is not None:
+            window &= Q(**{field + '__gt': self.since})
+        return window
+
+    def changes(self):
+        if self.since is None:
+            yield {'op': 'reset'}
+        for source in SOURCES:
+            queryset = source.queryset(self.user)
+            if queryset is None:
+                continue
+            rows = queryset.filter(self.window('updated_at')).values(*source.fields)
+            for row in batched(rows, self.batch_size):
+                if source.model is Course and row['status'] != 'published':
+                    yield {'op': 'delete', 'type': source.kind, 'id': row['id']}
+                else:
+                    yield {'op': 'upsert', 'type': source.kind, 'data': row}
+        if self.since is not None:
+            yield from self.deletions()
+        yield {'op': 'watermark', 'value': self.until}
+
+    def deletions(self):
+        owners = Q(owner__isnull=True)
+        if self.user.is_authenticated:
+            owners |= Q(owner=self.user)
+        tombstones = Tombstone.objects.filter(owners, self.window('deleted_at')).values('id', 'kind', 'object_id', 'deleted_at')
+        for tombstone in batched(tombstones, self.batch_size, time_field='deleted_at'):
+            yield {'op': 'delete', 'type': tombstone['kind'], 'id': tombstone['object_id']}
+
+    def lines(self):
+        for change in self.changes():
+            yield json.dumps(change, cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class Tombstone(models.Model):
+    """
+    A deleted row, kept so offline clients can drop it on their next sync.
+    Rows owned by a single user (enrollments, lesson progress) carry that
+    user in `owner`; catalog rows have no owner.
+    """
+    kind = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
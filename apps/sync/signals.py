@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.course.models import Category, Course, Instructor, Lesson, Section
+from apps.enrolment.models import Enrollment, LessonProgress
+from apps.sync.models import Tombstone
+from core.counters import DeletionState, deleted_directly
+
+User = get_user_model()
+
+# The tombstones of a deletion and its cascade, written together by
+# `write_tombstones()` when it finishes rather than one INSERT per row.
+burials = DeletionState(lambda: {'tombstones': [], 'progress': [], 'students': {}})
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Lesson)
+def bury_catalog_row(sender, instance, origin=None, **kwargs):
+    burials.get(origin)['tombstones'].append(Tombstone(kind=sender._meta.model_name, object_id=instance.pk))
+
+
+@receiver(pre_delete, sender=Enrollment)
+def remember_enrollment_student(sender, instance, origin=None, **kwargs):
+    # Its lesson progress is deleted first and needs the owner once the enrollment is gone.
+    burials.get(origin)['students'][instance.pk] = instance.student_id
+
+
+@receiver(post_delete, sender=Enrollment)
+def bury_enrollment(sender, instance, origin=None, **kwargs):
+    burials.get(origin)['tombstones'].append(
+        Tombstone(kind='enrollment', object_id=instance.pk, owner_id=instance.student_id)
+    )
+
+
+@receiver(post_delete, sender=LessonProgress)
+def bury_lesson_progress(sender, instance, origin=None, **kwargs):
+    burials.get(origin)['progress'].append((instance.pk, instance.enrollment_id))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Instructor)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_delete, sender=LessonProgress)
+def write_tombstones(sender, instance, origin=None, **kwargs):
+    # Connected for every model whose deletion can reach a synced row.
+    if not deleted_directly(origin, sender):
+        return
+    state = burials.pop(origin)
+    students = state['students']
+    missing = {enrollment_id for _, enrollment_id in state['progress']} - set(students)
+    if missing:
+        students.update(Enrollment.objects.filter(pk__in=missing).values_list('pk', 'student_id'))
+    tombstones = state['tombstones'] + [
+        Tombstone(kind='lesson_progress', object_id=pk, owner_id=students.get(enrollment_id))
+        for pk, enrollment_id in state['progress']
+    ]
+    # A deleted user's client is gone with them; so are the tombstones they would own.
+    owners = {tombstone.owner_id for tombstone in tombstones} - {None}
+    if owners:
+        owners = set(User.objects.filter(pk__in=owners).values_list('pk', flat=True))
+        tombstones = [tombstone for tombstone in tombstones if tombstone.owner_id is None or tombstone.owner_id in owners]
+    if tombstones:
+        Tombstone.objects.bulk_create(tombstones)
+
+
+@receiver(post_save, sender=Course)
+def resync_course_children(sender, instance, created, raw=False, **kwargs):
+    # Sections and lessons of unpublished courses are not synced. When a
+    # course goes live, bump them into the current sync window; when it is
+    # withdrawn, tombstone them so clients drop them.
+    if raw or created or 'status' not in instance.tracked_changes():
+        return
+    was_published = instance.tracked_changes()['status'][0] == 'published'
+    if was_published == (instance.status == 'published'):
+        return
+    if instance.status == 'published':
+        now = timezone.now()
+        Section.objects.filter(course=instance).update(updated_at=now)
+        Lesson.objects.filter(section__course=instance).update(updated_at=now)
+        return
+    Tombstone.objects.bulk_create(
+        [Tombstone(kind='section', object_id=pk) for pk in Section.objects.filter(course=instance).values_list(
+            'pk', flat=True
+        )]
+        + [Tombstone(kind='lesson', object_id=pk) for pk in Lesson.objects.filter(
+            section__course=instance
+        ).values_list('pk', flat=True)]
+    )
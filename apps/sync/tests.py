@@ -0,0 +1,132 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.course.models import Category, Course, Instructor, Lesson, Section
+from apps.enrolment.models import Enrollment, LessonProgress
+from apps.sync.changes import batched
+from apps.sync.models import Tombstone
+
+User = get_user_model()
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(APITestCase):
+    def setUp(self):
+        self.instructor = Instructor.objects.create(
+            user=User.objects.create(username='instructor'), bio='bio',
+            profile_image='https://example.com/a.png', expertise='Python',
+        )
+        self.category = Category.objects.create(name='Programming', slug='programming', description='d', icon='i')
+        self.course, self.section, self.lessons = self.make_course('published', 'published')
+        self.draft, _, _ = self.make_course('draft', 'draft')
+        self.student = User.objects.create(username='student')
+        self.other = User.objects.create(username='other')
+        self.enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        self.other_enrollment = Enrollment.objects.create(student=self.other, course=self.course)
+        self.client.force_authenticate(self.student)
+
+    def make_course(self, slug, status):
+        course = Course.objects.create(
+            title='Complete Django course', slug=slug, description='d' * 60, instructor=self.instructor,
+            category=self.category, thumbnail='https://example.com/t.png', price=Decimal('49.99'),
+            level='beginner', status=status, duration_hours=Decimal('10'), requirements='None',
+            what_you_learn='Django',
+        )
+        section = Section.objects.create(course=course, title='Section', order=0)
+        lessons = [
+            Lesson.objects.create(section=section, title=f'Lesson {order}', content='c',
+                                  video_url='https://example.com/v', duration_minutes=5, order=order)
+            for order in range(2)
+        ]
+        return course, section, lessons
+
+    def sync(self, since=None):
+        response = self.client.get('/sync/', {'since': since.isoformat()} if since else {})
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(lines[-1]['op'], 'watermark')
+        return lines[:-1], datetime_of(lines[-1]['value'])
+
+    def test_full_sync_resets_and_is_scoped_to_the_user(self):
+        changes, _ = self.sync()
+        self.assertEqual(changes[0], {'op': 'reset'})
+        upserts = {(change['type'], change['data']['id']) for change in changes if change['op'] == 'upsert'}
+        self.assertEqual(upserts, {
+            ('course', self.course.pk), ('section', self.section.pk),
+            *(('lesson', lesson.pk) for lesson in self.lessons), ('enrollment', self.enrollment.pk),
+        })
+        self.assertIn({'op': 'delete', 'type': 'course', 'id': self.draft.pk}, changes)
+
+    def test_incremental_sync_sends_the_window_and_owned_tombstones(self):
+        _, watermark = self.sync()
+        changed, removed = self.lessons
+        removed_id = removed.pk
+        changed.title = 'Renamed'
+        changed.save()
+        removed.delete()
+        self.other_enrollment.delete()
+
+        changes, _ = self.sync(watermark)
+        self.assertEqual(
+            [(change['op'], change['type']) for change in changes],
+            [('upsert', 'course'), ('upsert', 'lesson'), ('delete', 'lesson')],
+        )
+        self.assertEqual(changes[1]['data']['title'], 'Renamed')
+        self.assertEqual(changes[2]['id'], removed_id)
+
+    def test_unpublishing_a_course_tombstones_its_children(self):
+        _, watermark = self.sync()
+        self.course.status = 'draft'
+        self.course.save()
+
+        changes, _ = self.sync(watermark)
+        deletes = {(change['type'], change['id']) for change in changes if change['op'] == 'delete'}
+        self.assertEqual(deletes, {
+            ('course', self.course.pk), ('section', self.section.pk), *(('lesson', lesson.pk) for lesson in self.lessons),
+        })
+
+    def test_stale_watermark_starts_over_and_old_tombstones_are_pruned(self):
+        retention = timedelta(days=30)
+        old = Tombstone.objects.create(kind='lesson', object_id=1, deleted_at=timezone.now() - retention * 2)
+        changes, _ = self.sync(timezone.now() - retention * 2)
+        self.assertEqual(changes[0], {'op': 'reset'})
+
+        call_command('prune_sync_tombstones', stdout=StringIO())
+        self.assertFalse(Tombstone.objects.filter(pk=old.pk).exists())
+
+    def test_keyset_batches_break_timestamp_ties_by_id(self):
+        Lesson.objects.update(updated_at=timezone.now())
+        rows = Lesson.objects.values('id', 'updated_at')
+        with self.assertNumQueries(3):
+            ids = [row['id'] for row in batched(rows, 2)]
+        self.assertEqual(ids, sorted(Lesson.objects.values_list('pk', flat=True)))
+
+    def test_cascades_write_tombstones_in_one_insert(self):
+        LessonProgress.objects.create(enrollment=self.enrollment, lesson=self.lessons[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.course.delete()
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "sync_tombstone"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Tombstone.objects.filter(owner=self.student).count(), 2)
+        self.assertEqual(Tombstone.objects.filter(owner__isnull=True).count(), 4)
+
+        Enrollment.objects.create(student=self.student, course=self.draft)
+        student_id = self.student.pk
+        self.student.delete()
+        self.assertFalse(Tombstone.objects.filter(owner_id=student_id).exists())
+
+
+def datetime_of(value):
+    from django.utils.dateparse import parse_datetime
+
+    return parse_datetime(value)
@@ -0,0 +1,25 @@
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+
+from apps.sync.changes import ChangeFeed
+
+
+class SyncAPIView(APIView):
+    """
+    Stream the catalog and the user's enrollment changes since `since` as
+    newline-delimited JSON. The last line carries the watermark to send on
+    the next sync; omit `since` for a full sync.
+    """
+
+    def get(self, request):
+        since = request.GET.get('since')
+        if since:
+            since = parse_datetime(since)
+            if since is None:
+                raise ValidationError({'since': 'Watermark must be an ISO 8601 datetime.'})
+        feed = ChangeFeed(request.user, since or None)
+        response = StreamingHttpResponse(feed.lines(), content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-store'
+        return response
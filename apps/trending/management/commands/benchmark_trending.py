@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.blogs.models import Comment, Post
+from apps.trending.models import TrendingClock, TrendingPost
+from apps.trending.ranking import update_trending
+from apps.trending.views import TrendingPostsAPIView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure what an update_trending run costs as the number of new events grows, and what serving the '
+        'feed costs afterwards. Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--minutes', type=int, default=60, help='Spread the events over this many minutes.')
+
+    def handle(self, *args, **options):
+        for volume in options['events']:
+            with transaction.atomic():
+                self.run(volume, options['posts'], options['minutes'])
+                transaction.set_rollback(True)
+
+    def run(self, volume, posts, minutes):
+        now = timezone.now()
+        start = now - timedelta(minutes=minutes)
+        author = User.objects.create(username='trending-benchmark')
+        Post.objects.bulk_create([
+            Post(author=author, title=f'Benchmark {index}', slug=f'trending-benchmark-{index}', content='-',
+                 status=Post.STATUS_PUBLISHED, published_at=start)
+            for index in range(posts)
+        ])
+        post_ids = list(Post.objects.filter(author=author).values_list('pk', flat=True))
+        comments = Comment.objects.bulk_create(
+            [Comment(post_id=post_ids[index % len(post_ids)], user=author, content='-') for index in range(volume)],
+            batch_size=1000,
+        )
+        # auto_now_add stamped every comment with the current time; spread
+        # them over the window one minute slice at a time.
+        ids = sorted(comment.pk for comment in comments)
+        per_minute = -(-len(ids) // minutes)
+        for minute in range(minutes):
+            chunk = ids[minute * per_minute:(minute + 1) * per_minute]
+            if chunk:
+                Comment.objects.filter(pk__range=(chunk[0], chunk[-1])).update(
+                    created_at=start + timedelta(minutes=minute, seconds=30)
+                )
+        TrendingClock.objects.update_or_create(pk=1, defaults={'epoch': start, 'watermark': start - timedelta(seconds=1)})
+        TrendingPost.objects.all().delete()
+
+        began = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            stats = update_trending(now=now + timedelta(minutes=1))
+        elapsed = time.perf_counter() - began
+
+        view = TrendingPostsAPIView()
+        began = time.perf_counter()
+        with CaptureQueriesContext(connection) as feed_queries:
+            rows = list(TrendingPost.objects.filter(post__status='published').select_related(
+                *view.related
+            ).order_by('-score')[:view.default_limit])
+        feed_elapsed = time.perf_counter() - began
+
+        self.stdout.write(
+            f'{volume:>8} events over {minutes} min on {posts} posts: '
+            f'update {elapsed * 1000:.1f} ms, {len(queries)} queries, {stats["posts"]["scored"]} rows rescored; '
+            f'feed of {len(rows)} {feed_elapsed * 1000:.1f} ms, {len(feed_queries)} query'
+        )
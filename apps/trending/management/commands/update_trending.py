@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.trending.ranking import update_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold likes, comments, views, enrollments and reviews recorded since the last run into the trending '
+        'rankings. Run it periodically, e.g. every minute from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Discard the rankings and rescore the last TRENDING_WINDOW_DAYS of events.',
+        )
+
+    def handle(self, *args, **options):
+        stats = update_trending(rebuild=options['rebuild'])
+        if not stats:
+            self.stdout.write('Nothing to do')
+        for name, counts in stats.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {counts["events"]} event(s), {counts["scored"]} rescored, {counts["pruned"]} pruned'
+            ))
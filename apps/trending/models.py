@@ -0,0 +1,49 @@
+from django.db import models
+from django.utils import timezone
+
+from apps.blogs.models import Post
+from apps.course.models import Course
+
+
+class TrendingClock(models.Model):
+    """
+    The single row of ranking state. Stored scores are relative to `epoch`;
+    `watermark` is the end of the event window the last run consumed.
+    """
+    epoch = models.DateTimeField(default=timezone.now)
+    watermark = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def load(cls):
+        clock, _ = cls.objects.get_or_create(pk=1)
+        return clock
+
+
+class TrendingPost(models.Model):
+    """
+    `score` is the sum of `weight * exp(rate * (event time - epoch))` over
+    the post's events, so decaying every score to the present is a common
+    factor and never changes the order. `pending_views` are views written
+    to `Post.views` since the last run.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField(default=0)
+    pending_views = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score']),
+        ]
+
+
+class TrendingCourse(models.Model):
+    """Like `TrendingPost`, for enrollments and reviews."""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score']),
+        ]
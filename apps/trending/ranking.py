@@ -0,0 +1,177 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+
+from apps.blogs.models import Comment, Post, PostLike
+from apps.course.models import Course
+from apps.enrolment.models import Enrollment
+from apps.reviews.models import CourseReview
+from apps.trending.models import TrendingClock, TrendingCourse, TrendingPost
+
+# Scores grow as exp(rate * (t - epoch)); past this exponent they are
+# rebased onto a newer epoch, long before a float could overflow.
+REBASE_EXPONENT = 32
+CHUNK_SIZE = 500
+
+
+def decay_rate():
+    """Decay constant per second for TRENDING_HALF_LIFE_HOURS."""
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def decay_factor(epoch, now=None):
+    """Multiply a stored score by this to get its value decayed to `now`."""
+    return math.exp(-decay_rate() * ((now or timezone.now()) - epoch).total_seconds())
+
+
+class EventSource:
+    """
+    Timestamped rows of `model` that count towards the object in `key`,
+    weighted by TRENDING_WEIGHTS[name].
+    """
+
+    def __init__(self, name, model, key, timestamp, **filters):
+        self.name = name
+        self.model = model
+        self.key = key
+        self.timestamp = timestamp
+        self.filters = filters
+
+    def buckets(self, since, until):
+        """(object id, minute, events) for events in `(since, until]`."""
+        return self.model.objects.filter(
+            **self.filters, **{self.timestamp + '__gt': since, self.timestamp + '__lte': until}
+        ).order_by().annotate(minute=TruncMinute(self.timestamp)).values(self.key, 'minute').annotate(
+            events=Count('pk')
+        ).values_list(self.key, 'minute', 'events')
+
+
+class Ranking:
+    def __init__(self, name, model, target, sources):
+        self.name = name
+        self.model = model
+        self.target = target
+        self.sources = sources
+
+    def collect(self, since, until, epoch, rate):
+        increments = defaultdict(float)
+        events = 0
+        for source in self.sources:
+            weight = settings.TRENDING_WEIGHTS[source.name]
+            for object_id, minute, count in source.buckets(since, until).iterator(chunk_size=2000):
+                increments[object_id] += weight * count * math.exp(rate * (minute - epoch).total_seconds())
+                events += count
+        return increments, events
+
+    def apply(self, increments):
+        pk_name = self.model._meta.pk.name
+        ids = sorted(increments)
+        for start in range(0, len(ids), CHUNK_SIZE):
+            chunk = ids[start:start + CHUNK_SIZE]
+            scores = dict(self.model.objects.filter(pk__in=chunk).values_list('pk', 'score'))
+            # Skip objects deleted since their events were recorded.
+            live = scores.keys() | set(
+                self.target.objects.filter(pk__in=[pk for pk in chunk if pk not in scores]).values_list('pk', flat=True)
+            )
+            self.model.objects.bulk_create(
+                [self.model(pk=pk, score=scores.get(pk, 0) + increments[pk]) for pk in chunk if pk in live],
+                update_conflicts=True,
+                unique_fields=[pk_name],
+                update_fields=['score', 'updated_at'],
+            )
+
+    def prune(self, until, epoch, rate):
+        """Drop rows whose decayed score fell below TRENDING_MIN_SCORE."""
+        threshold = settings.TRENDING_MIN_SCORE * math.exp(rate * (until - epoch).total_seconds())
+        deleted, _ = self.stale(self.model.objects.filter(score__lt=threshold)).delete()
+        return deleted
+
+    def stale(self, rows):
+        return rows
+
+    def update(self, since, until, epoch, rate):
+        increments, events = self.collect(since, until, epoch, rate)
+        self.apply(increments)
+        return {'events': events, 'scored': len(increments), 'pruned': self.prune(until, epoch, rate)}
+
+
+class PostRanking(Ranking):
+    """Views have no timestamps; they count from the flush that wrote them."""
+
+    def update(self, since, until, epoch, rate):
+        views = list(self.model.objects.filter(pending_views__gt=0).values_list('pk', 'pending_views'))
+        increments, events = self.collect(since, until, epoch, rate)
+        weight = settings.TRENDING_WEIGHTS['post_view'] * math.exp(rate * (until - epoch).total_seconds())
+        for pk, count in views:
+            increments[pk] += weight * count
+            events += count
+        self.apply(increments)
+        # Views flushed while this run was reading stay pending for the next one.
+        for start in range(0, len(views), CHUNK_SIZE):
+            chunk = views[start:start + CHUNK_SIZE]
+            taken = Case(
+                *(When(pk=pk, then=Value(count)) for pk, count in chunk),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            self.model.objects.filter(pk__in=[pk for pk, _ in chunk]).update(pending_views=F('pending_views') - taken)
+        return {'events': events, 'scored': len(increments), 'pruned': self.prune(until, epoch, rate)}
+
+    def stale(self, rows):
+        return rows.filter(pending_views=0)
+
+
+RANKINGS = [
+    PostRanking('posts', TrendingPost, Post, [
+        EventSource('post_like', PostLike, 'post_id', 'created_at'),
+        EventSource('post_comment', Comment, 'post_id', 'created_at', is_public=True),
+    ]),
+    Ranking('courses', TrendingCourse, Course, [
+        EventSource('course_enrollment', Enrollment, 'course_id', 'enrolled_at'),
+        EventSource('course_review', CourseReview, 'course_id', 'created_at'),
+    ]),
+]
+
+
+def update_trending(now=None, rebuild=False):
+    """
+    Fold the events recorded since the last run into the trending scores.
+
+    Events are read up to TRENDING_SETTLE_SECONDS ago, so rows committed
+    late by slow transactions are not skipped; the first run, and a
+    `rebuild`, start TRENDING_WINDOW_DAYS back. A rebuild discards views
+    still pending, since they cannot be placed in time. Returns per-ranking
+    stats.
+    """
+    now = now or timezone.now()
+    until = now - timedelta(seconds=settings.TRENDING_SETTLE_SECONDS)
+    rate = decay_rate()
+    stats = {}
+    with transaction.atomic():
+        clock, _ = TrendingClock.objects.select_for_update().get_or_create(pk=1)
+        if rebuild:
+            for ranking in RANKINGS:
+                ranking.model.objects.all().delete()
+            clock.epoch, clock.watermark = until, None
+        since = clock.watermark or until - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+        if until <= since:
+            return stats
+
+        exponent = rate * (until - clock.epoch).total_seconds()
+        if exponent > REBASE_EXPONENT:
+            factor = math.exp(-exponent)
+            for ranking in RANKINGS:
+                ranking.model.objects.update(score=F('score') * factor)
+            clock.epoch = until
+
+        for ranking in RANKINGS:
+            stats[ranking.name] = ranking.update(since, until, clock.epoch, rate)
+        clock.watermark = until
+        clock.save()
+    return stats
@@ -0,0 +1,45 @@
+from rest_framework import serializers
+
+from apps.trending.models import TrendingCourse, TrendingPost
+
+
+class TrendingPostSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='post_id')
+    title = serializers.CharField(source='post.title')
+    slug = serializers.CharField(source='post.slug')
+    excerpt = serializers.CharField(source='post.excerpt')
+    author = serializers.CharField(source='post.author.username')
+    published_at = serializers.DateTimeField(source='post.published_at')
+    views = serializers.IntegerField(source='post.views')
+    likes_count = serializers.IntegerField(source='post.likes_count')
+    comments_count = serializers.IntegerField(source='post.comments_count')
+    score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TrendingPost
+        fields = [
+            'id', 'title', 'slug', 'excerpt', 'author', 'published_at', 'views', 'likes_count', 'comments_count',
+            'score',
+        ]
+
+    def get_score(self, obj):
+        return round(obj.score * self.context['decay'], 3)
+
+
+class TrendingCourseSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='course_id')
+    title = serializers.CharField(source='course.title')
+    slug = serializers.CharField(source='course.slug')
+    thumbnail = serializers.URLField(source='course.thumbnail')
+    price = serializers.DecimalField(source='course.price', max_digits=10, decimal_places=2)
+    level = serializers.CharField(source='course.level')
+    average_rating = serializers.FloatField(source='course.average_rating')
+    students_count = serializers.IntegerField(source='course.students_count')
+    score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TrendingCourse
+        fields = ['id', 'title', 'slug', 'thumbnail', 'price', 'level', 'average_rating', 'students_count', 'score']
+
+    def get_score(self, obj):
+        return round(obj.score * self.context['decay'], 3)
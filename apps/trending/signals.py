@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.dispatch import receiver
+
+from apps.blogs.buffers import post_views_written
+from apps.blogs.models import Post
+from apps.trending.models import TrendingPost
+from apps.trending.ranking import CHUNK_SIZE
+
+
+@receiver(post_views_written)
+def queue_post_views(sender, views, **kwargs):
+    items = sorted(views.items())
+    for start in range(0, len(items), CHUNK_SIZE):
+        chunk = dict(items[start:start + CHUNK_SIZE])
+        with transaction.atomic():
+            TrendingPost.objects.bulk_create(
+                [TrendingPost(post_id=pk) for pk in Post.objects.filter(pk__in=chunk).values_list('pk', flat=True)],
+                ignore_conflicts=True,
+            )
+            increments = Case(
+                *(When(pk=pk, then=Value(count)) for pk, count in chunk.items()),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            TrendingPost.objects.filter(pk__in=chunk).update(pending_views=F('pending_views') + increments)
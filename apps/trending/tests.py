@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.blogs.buffers import post_views
+from apps.blogs.models import Comment, Post, PostLike
+from apps.trending.models import TrendingClock, TrendingPost
+from apps.trending.ranking import decay_factor, update_trending
+
+User = get_user_model()
+
+
+class TrendingPostsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.readers = [User.objects.create(username=f'reader-{index}') for index in range(3)]
+        self.old, self.new, self.draft = [
+            Post.objects.create(author=self.author, title=title, content='-', status=status)
+            for title, status in (('Old', 'published'), ('New', 'published'), ('Draft', 'draft'))
+        ]
+
+    def stamp(self, queryset, when):
+        queryset.update(created_at=when)
+
+    def test_recent_events_outrank_older_ones(self):
+        now = timezone.now()
+        for reader in self.readers:
+            PostLike.objects.create(post=self.old, user=reader)
+        self.stamp(PostLike.objects.filter(post=self.old), now - timedelta(days=3))
+        PostLike.objects.create(post=self.new, user=self.readers[0])
+        Comment.objects.create(post=self.draft, user=self.readers[0], content='-')
+        with self.captureOnCommitCallbacks(execute=True):
+            update_trending(now=now + timedelta(seconds=10))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/trending/posts/')
+        self.assertEqual([row['id'] for row in response.data], [self.new.pk, self.old.pk])
+        self.assertAlmostEqual(response.data[1]['score'], 3 * 4 / 8, places=1)
+
+    def test_runs_are_incremental(self):
+        PostLike.objects.create(post=self.old, user=self.readers[0])
+        update_trending(now=timezone.now() + timedelta(seconds=10))
+        score = TrendingPost.objects.get(pk=self.old.pk).score
+        update_trending(now=timezone.now() + timedelta(seconds=20))
+        self.assertEqual(TrendingPost.objects.get(pk=self.old.pk).score, score)
+
+        post_views.add(self.old.pk, 5)
+        post_views.flush()
+        self.assertEqual(TrendingPost.objects.get(pk=self.old.pk).pending_views, 5)
+        update_trending(now=timezone.now() + timedelta(seconds=30))
+        trending = TrendingPost.objects.get(pk=self.old.pk)
+        self.assertEqual(trending.pending_views, 0)
+        self.assertGreater(trending.score, score)
+
+    def test_scores_follow_a_rebase_by_another_process(self):
+        PostLike.objects.create(post=self.old, user=self.readers[0])
+        update_trending(now=timezone.now() + timedelta(seconds=10))
+        score = self.client.get('/trending/posts/').data[0]['score']
+
+        # A rebase onto a later epoch scales the stored scores down to match.
+        clock = TrendingClock.load()
+        shift = timedelta(days=2)
+        TrendingPost.objects.update(score=F('score') * decay_factor(clock.epoch, clock.epoch + shift))
+        TrendingClock.objects.filter(pk=clock.pk).update(epoch=clock.epoch + shift)
+        self.assertAlmostEqual(self.client.get('/trending/posts/').data[0]['score'], score, places=3)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from apps.trending import views
+
+app_name = 'trending'
+
+urlpatterns = [
+    path('posts/', views.TrendingPostsAPIView.as_view(), name='posts'),
+    path('courses/', views.TrendingCoursesAPIView.as_view(), name='courses'),
+]
@@ -0,0 +1,54 @@
+from django.db.models import Subquery
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.trending.models import TrendingClock, TrendingCourse, TrendingPost
+from apps.trending.ranking import decay_factor
+from apps.trending.serializers import TrendingCourseSerializer, TrendingPostSerializer
+
+
+class TrendingAPIView(APIView):
+    """
+    The top of a precomputed ranking, read in one query down the score
+    index. Scores are refreshed by `manage.py update_trending`; the epoch
+    they are relative to comes with them, so a rebase by another process
+    is never decayed with an old one.
+    """
+    model = None
+    serializer_class = None
+    related = ()
+    status_field = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.GET['limit'])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request):
+        rows = list(self.model.objects.filter(**{self.status_field: 'published'}).select_related(
+            *self.related
+        ).annotate(
+            epoch=Subquery(TrendingClock.objects.filter(pk=1).values('epoch')[:1]),
+        ).order_by('-score')[:self.get_limit(request)])
+        decay = decay_factor(rows[0].epoch) if rows else 1.0
+        serializer = self.serializer_class(rows, many=True, context={'decay': decay})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class TrendingPostsAPIView(TrendingAPIView):
+    model = TrendingPost
+    serializer_class = TrendingPostSerializer
+    related = ('post__author',)
+    status_field = 'post__status'
+
+
+class TrendingCoursesAPIView(TrendingAPIView):
+    model = TrendingCourse
+    serializer_class = TrendingCourseSerializer
+    related = ('course',)
+    status_field = 'course__status'
@@ -0,0 +1,123 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Aggregate writes in process memory and apply them in batches.
+
+    `add(key, value)` merges `value` into the pending entry for `key`; a
+    background thread hands the pending entries to `write()` every
+    `interval` seconds, or sooner once `threshold` distinct keys are
+    pending. The buffer is also flushed at interpreter exit, so a graceful
+    worker shutdown loses nothing; a hard kill loses at most one interval.
+    If `write()` fails the batch is merged back and retried on the next
+    flush.
+
+    Subclasses set `name` and implement `write(batch)`; override `merge()`
+    for anything other than summing.
+    """
+    name = None
+
+    def __init__(self, interval=None, threshold=None):
+        self.interval = interval if interval is not None else settings.WRITE_BEHIND_FLUSH_INTERVAL
+        self.threshold = threshold if threshold is not None else settings.WRITE_BEHIND_FLUSH_THRESHOLD
+        self._reset()
+        atexit.register(self.stop)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._pending = {}
+        self._thread = None
+
+    def merge(self, current, value):
+        return current + value
+
+    def write(self, batch):
+        raise NotImplementedError
+
+    def add(self, key, value=1):
+        if self._pid != os.getpid():
+            # Forked worker: the parent's thread and pending writes are not ours.
+            self._reset()
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = self.merge(self._pending[key], value)
+            else:
+                self._pending[key] = value
+            pending = len(self._pending)
+            if self._thread is None:
+                self._start()
+        metrics.gauge(f'write_behind.{self.name}.pending', pending)
+        if pending >= self.threshold:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def size(self):
+        """Number of keys waiting to be flushed."""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write out everything pending; returns the number of keys written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            metrics.gauge(f'write_behind.{self.name}.pending', 0)
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.write(batch)
+            except Exception:
+                logger.exception('Flushing %s write-behind buffer failed; %d keys requeued', self.name, len(batch))
+                metrics.incr(f'write_behind.{self.name}.errors')
+                with self._lock:
+                    for key, value in batch.items():
+                        if key in self._pending:
+                            self._pending[key] = self.merge(value, self._pending[key])
+                        else:
+                            self._pending[key] = value
+                return 0
+            metrics.observe(f'write_behind.{self.name}.flush', time.perf_counter() - started)
+            metrics.incr(f'write_behind.{self.name}.flushed_keys', len(batch))
+            return len(batch)
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=f'write-behind-{self.name}', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            finally:
+                connection.close()
@@ -0,0 +1,155 @@
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.metrics import metrics
+
+
+class ResponseCache:
+    """
+    Serialized API representations keyed by object. Entries live in the
+    `responses` cache alias, whose backend decides eviction (LRU culling for
+    locmem, culling for the file backend, maxmemory policy for Redis) and
+    are dropped by signal handlers when the underlying rows change.
+
+    Entries are stored as `{'value', 'expires', 'delta'}` envelopes: they
+    go stale after RESPONSE_CACHE_TIMEOUT but stay in the backend for a
+    further RESPONSE_CACHE_STALE_TIMEOUT so `get_or_compute` can keep
+    serving them while a single worker rebuilds the value.
+    """
+    single_flight = True
+    xfetch_beta = 1.0
+
+    def __init__(self, name, alias='responses', timeout=None):
+        self.name = name
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def key(self, identifier):
+        return f'{self.name}:{identifier}'
+
+    def lock_key(self, key):
+        return f'{key}:lock'
+
+    def get(self, identifier):
+        entry = self.backend.get(self.key(identifier))
+        metrics.incr(f'response_cache.{self.name}.{"miss" if entry is None else "hit"}')
+        return None if entry is None else entry['value']
+
+    def set(self, identifier, value, delta=0.0):
+        timeout = self.timeout if self.timeout is not None else settings.RESPONSE_CACHE_TIMEOUT
+        entry = {'value': value, 'expires': time.time() + timeout, 'delta': delta}
+        self.backend.set(self.key(identifier), entry, timeout + settings.RESPONSE_CACHE_STALE_TIMEOUT)
+        metrics.incr(f'response_cache.{self.name}.set')
+
+    def invalidate(self, *identifiers):
+        """Drop entries once the current transaction commits."""
+        keys = [self.key(identifier) for identifier in identifiers if identifier is not None]
+        if not keys:
+            return
+
+        def delete():
+            self.backend.delete_many(keys)
+            metrics.incr(f'response_cache.{self.name}.invalidate', len(keys))
+
+        transaction.on_commit(delete)
+
+    def get_or_compute(self, identifier, compute):
+        """
+        Return the cached value for `identifier`, calling `compute()` to build
+        it when needed. `compute` may return None (e.g. the object does not
+        exist); None is passed through and not cached.
+
+        Only the worker holding the rebuild lock calls `compute`. On a stale
+        entry the others keep serving the old value; on a miss they poll for
+        the winner's result for up to RESPONSE_CACHE_LOCK_WAIT seconds before
+        computing it themselves. Fresh entries are also rebuilt early with a
+        probability that grows as they near expiry (XFetch), so hot keys are
+        usually refreshed before they ever go stale.
+        """
+        if not self.single_flight:
+            value = self.get(identifier)
+            if value is None:
+                value = self.compute(identifier, compute)
+            return value
+
+        key = self.key(identifier)
+        entry = self.backend.get(key)
+        if entry is not None:
+            if not self.should_refresh(entry):
+                metrics.incr(f'response_cache.{self.name}.hit')
+                return entry['value']
+            token = self.acquire(key)
+            if token is None:
+                metrics.incr(f'response_cache.{self.name}.stale')
+                return entry['value']
+            metrics.incr(f'response_cache.{self.name}.refresh')
+            try:
+                return self.compute(identifier, compute)
+            finally:
+                self.release(key, token)
+
+        metrics.incr(f'response_cache.{self.name}.miss')
+        token = self.acquire(key)
+        if token is not None:
+            try:
+                return self.compute(identifier, compute)
+            finally:
+                self.release(key, token)
+
+        entry = self.wait(key)
+        if entry is not None:
+            metrics.incr(f'response_cache.{self.name}.wait')
+            return entry['value']
+        metrics.incr(f'response_cache.{self.name}.wait_timeout')
+        return self.compute(identifier, compute)
+
+    def compute(self, identifier, compute):
+        started = time.perf_counter()
+        value = compute()
+        delta = time.perf_counter() - started
+        metrics.observe(f'response_cache.{self.name}.compute', delta)
+        if value is not None:
+            self.set(identifier, value, delta)
+        return value
+
+    def should_refresh(self, entry):
+        # XFetch: expire early by delta * beta * -ln(u), u uniform in (0, 1].
+        jitter = entry['delta'] * self.xfetch_beta * -math.log(1.0 - random.random())
+        return time.time() + jitter >= entry['expires']
+
+    def acquire(self, key):
+        token = uuid.uuid4().hex
+        if self.backend.add(self.lock_key(key), token, settings.RESPONSE_CACHE_LOCK_TIMEOUT):
+            return token
+        return None
+
+    def release(self, key, token):
+        if self.backend.get(self.lock_key(key)) == token:
+            self.backend.delete(self.lock_key(key))
+
+    def wait(self, key):
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            entry = self.backend.get(key)
+            if entry is not None:
+                return entry
+            if self.backend.get(self.lock_key(key)) is None:
+                return None
+        return None
+
+
+course_detail_cache = ResponseCache('course-detail')
+post_detail_cache = ResponseCache('post-detail')
+profile_cache = ResponseCache('profile')
+instructor_cache = ResponseCache('instructor')
@@ -0,0 +1,60 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Subquery
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def conditional(validators, vary=()):
+    """
+    View decorator adding ETag/Last-Modified validators to safe requests.
+
+    `validators(request, *args, **kwargs)` returns `(state, last_modified)`,
+    or None to skip conditional handling, e.g. when the object does not
+    exist. `state` is a tuple of plain values that changes whenever the
+    representation does (typically one aggregate query over timestamps,
+    a row count and the denormalized counters); the ETag is a digest of it,
+    so If-None-Match is answered with a 304 before the view runs.
+
+    `last_modified` must move with every change to the representation, so
+    it is read from timestamps that counter updates and related rows bump
+    as well; it may be None when there is nothing to date.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            result = validators(request, *args, **kwargs)
+            if result is None:
+                return view(request, *args, **kwargs)
+
+            state, last_modified = result
+            etag = quote_etag(hashlib.md5(repr(state).encode('utf-8')).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                if timestamp is not None:
+                    response.headers.setdefault('Last-Modified', http_date(timestamp))
+                if vary:
+                    patch_vary_headers(response, vary)
+            return response
+        return wrapper
+    return decorator
+
+
+def latest(queryset, field):
+    """
+    Scalar subquery of the newest `field` in `queryset`, for validators
+    that date a list by whole tables: rows that leave the list still bump
+    their own timestamp there.
+    """
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1])
+
+
+def newest(*timestamps):
+    return max(filter(None, timestamps), default=None)
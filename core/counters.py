@@ -0,0 +1,78 @@
+import threading
+
+from django.db import models, transaction
+
+
+class CounterSourceMixin:
+    """
+    For models whose writes feed denormalized counters. Saves run in a
+    transaction together with the post_save handlers that adjust the
+    counters, and the values of `tracked_fields` as last loaded or saved are
+    kept in `_tracked_values` so handlers can apply deltas on update.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked_values = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.tracked_fields and value is not models.DEFERRED
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._tracked_values = {name: getattr(self, name) for name in self.tracked_fields}
+
+    def tracked_changes(self):
+        """Return `{field: (old, new)}` for tracked fields changed since load."""
+        loaded = getattr(self, '_tracked_values', {})
+        return {
+            name: (loaded[name], getattr(self, name))
+            for name in self.tracked_fields
+            if name in loaded and loaded[name] != getattr(self, name)
+        }
+
+
+def deleted_directly(origin, *model_classes):
+    """
+    Whether a post_delete `origin` is one of `model_classes` or a queryset
+    of one, rather than a row whose deletion cascaded to the instance.
+    """
+    return getattr(origin, 'model', type(origin)) in model_classes
+
+
+class DeletionState:
+    """
+    Bookkeeping that pre_delete and post_delete handlers share over one
+    deletion and its cascade, keyed by the deletion's `origin`. Handlers
+    collect into `get(origin)`; a post_delete handler for the models a
+    deletion can start from takes it with `pop(origin)` once
+    `deleted_directly()` says the origin itself has gone, which Django does
+    after everything it cascaded to.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._local = threading.local()
+
+    def _states(self):
+        return self._local.__dict__.setdefault('states', {})
+
+    def get(self, origin):
+        if origin is None:
+            # Saves carry no origin; give them a throwaway state.
+            return self.factory()
+        states = self._states()
+        entry = states.get(id(origin))
+        if entry is None or entry[0] is not origin:
+            entry = states[id(origin)] = (origin, self.factory())
+        return entry[1]
+
+    def pop(self, origin):
+        entry = self._states().pop(id(origin), None)
+        if entry is None or entry[0] is not origin:
+            return self.factory()
+        return entry[1]
@@ -0,0 +1,52 @@
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """
+    In-process counters, gauges and timing summaries. Each worker process
+    keeps its own numbers; `snapshot()` is what the metrics endpoint serves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._gauges = {}
+        self._timings = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self._timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+            timing['last'] = seconds
+
+    def snapshot(self):
+        with self._lock:
+            timings = {
+                name: {**timing, 'avg': timing['total'] / timing['count'] if timing['count'] else 0.0}
+                for name, timing in self._timings.items()
+            }
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timings': timings,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,139 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on an (ordering field, id) pair.
+
+    Every page is fetched with a `WHERE (field, id) > (value, id) LIMIT n`
+    style predicate instead of an OFFSET, so deep pages cost the same as the
+    first one as long as an index covers the ordering. Only the orderings
+    listed in `ordering_fields` are accepted from the client; they must be
+    non-nullable and should be backed by an index ending in `id`.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_param = 'ordering'
+    ordering_fields = ()
+    default_ordering = '-id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.field = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+        self.model_field = queryset.model._meta.get_field(self.field)
+
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            reverse = cursor['r']
+            queryset = queryset.filter(self.get_position_filter(cursor, reverse))
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (has_more if reverse else cursor is not None) and bool(results)
+        if cursor is not None and not results:
+            self.has_next = self.has_previous = False
+        return results
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                return self.page_size
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_param)
+        if not ordering:
+            return self.default_ordering
+        if ordering not in self.ordering_fields:
+            raise ValidationError({
+                self.ordering_param: 'Ordering must be one of {}'.format(', '.join(self.ordering_fields))
+            })
+        return ordering
+
+    def get_order_by(self, reverse):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if self.field == 'id':
+            return [prefix + 'id']
+        return [prefix + self.field, prefix + 'id']
+
+    def get_position_filter(self, cursor, reverse):
+        descending = self.descending != reverse
+        lookup = 'lt' if descending else 'gt'
+        if self.field == 'id':
+            return Q(**{'id__' + lookup: cursor['id']})
+        value = self.model_field.to_python(cursor['v'])
+        return Q(**{self.field + '__' + lookup: value}) | Q(**{self.field: value, 'id__' + lookup: cursor['id']})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if cursor.get('o') != self.ordering:
+                raise ValueError
+            return {'v': cursor['v'], 'id': int(cursor['id']), 'r': bool(cursor['r'])}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        value = self.model_field.value_to_string(instance) if self.field != 'id' else None
+        cursor = {'o': self.ordering, 'v': value, 'id': instance.pk, 'r': reverse}
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -46,6 +47,10 @@ INSTALLED_APPS = [
     'apps.enrolment',
     'apps.reviews',
     'apps.blogs',
+    'apps.search',
+    'apps.sync',
+    'apps.trending',
+    'apps.recommendations',
 ]
 
 MIDDLEWARE = [
@@ -89,6 +94,50 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# CACHE_BACKEND selects locmem (default), file or redis. The `responses`
+# alias holds cached API representations; locmem culls least recently used
+# entries past MAX_ENTRIES, Redis relies on its maxmemory-policy.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+
+def cache_config(location, max_entries):
+    if CACHE_BACKEND == 'redis':
+        return {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+            'KEY_PREFIX': location,
+        }
+    if CACHE_BACKEND == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'var' / 'cache' / location,
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        }
+    return {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': location,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
+    }
+
+
+CACHES = {
+    'default': cache_config('default', 10000),
+    'responses': cache_config('responses', 5000),
+}
+
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+# How long a stale entry may still be served while one worker rebuilds it,
+# how long that worker may hold the rebuild lock, and how long other
+# workers wait for it on a cold miss.
+RESPONSE_CACHE_STALE_TIMEOUT = 60
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_LOCK_WAIT = 2
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -156,3 +205,45 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'blogs.User'
 
+CATALOG_FACETS_TIMEOUT = 60
+
+CURRICULUM_CACHE_TIMEOUT = 60 * 60 * 24
+
+SYNC_BATCH_SIZE = 500
+SYNC_SETTLE_SECONDS = 2
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+WRITE_BEHIND_FLUSH_INTERVAL = 5
+WRITE_BEHIND_FLUSH_THRESHOLD = 1000
+
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_WINDOW_DAYS = 7
+TRENDING_SETTLE_SECONDS = 5
+TRENDING_MIN_SCORE = 0.1
+TRENDING_WEIGHTS = {
+    'post_view': 1,
+    'post_like': 4,
+    'post_comment': 6,
+    'course_enrollment': 5,
+    'course_review': 3,
+}
+
+RECOMMENDATIONS_SIMILAR_COURSES = 20
+RECOMMENDATIONS_PER_STUDENT = 10
+RECOMMENDATIONS_SHRINK = 10
+RECOMMENDATIONS_SETTLE_SECONDS = 5
+
+RELATED_CONTENT_SIZE = 10
+RELATED_CONTENT_FEATURES = 2 ** 18
+RELATED_CONTENT_TERMS = 64
+RELATED_CONTENT_MAX_DF = 0.5
+RELATED_CONTENT_MIN_SCORE = 0.05
+RELATED_CONTENT_TAG_WEIGHT = 3
+RELATED_CONTENT_SETTLE_SECONDS = 5
+
+LESSON_PROGRESS_HEARTBEAT_BATCH = 100
+LESSON_PROGRESS_MAX_PENDING = 100000
+
+PROGRESS_RECOMPUTE_BATCH_SIZE = 1000
+CERTIFICATE_BATCH_SIZE = 500
+CERTIFICATE_URL_TEMPLATE = os.environ.get('CERTIFICATE_URL_TEMPLATE', 'http://localhost:8000/certificates/{number}/')
@@ -0,0 +1,73 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.buffers import WriteBehindBuffer
+
+
+class RecordingBuffer(WriteBehindBuffer):
+    """Keeps written batches in memory; `failures` writes raise before one succeeds."""
+    name = 'recording'
+
+    def __init__(self, failures=0, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.batches = []
+        self.written = threading.Event()
+
+    def write(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('database unavailable')
+        self.batches.append(batch)
+        self.written.set()
+
+
+class WriteBehindBufferTests(SimpleTestCase):
+    def make_buffer(self, **kwargs):
+        kwargs.setdefault('interval', 60)
+        kwargs.setdefault('threshold', 1000)
+        buffer = RecordingBuffer(**kwargs)
+        self.addCleanup(buffer.stop)
+        return buffer
+
+    def test_values_merge_by_adding(self):
+        buffer = self.make_buffer()
+        buffer.add('a')
+        buffer.add('a', 2)
+        buffer.add('b')
+        self.assertEqual(buffer.pending(), {'a': 3, 'b': 1})
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.batches, [{'a': 3, 'b': 1}])
+        self.assertEqual(buffer.size(), 0)
+
+    def test_failed_write_is_requeued_and_merged(self):
+        buffer = self.make_buffer(failures=1)
+        buffer.add('a', 2)
+        with self.assertLogs('core.buffers', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending(), {'a': 2})
+
+        buffer.add('a', 3)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(buffer.batches, [{'a': 5}])
+
+    def test_reaching_the_threshold_flushes_in_the_background(self):
+        buffer = self.make_buffer(threshold=2)
+        with mock.patch('core.buffers.connection'):
+            buffer.add('a')
+            self.assertFalse(buffer.written.wait(0.2))
+            buffer.add('b')
+            self.assertTrue(buffer.written.wait(5))
+        self.assertEqual(buffer.batches, [{'a': 1, 'b': 1}])
+
+    def test_stop_flushes_and_runs_at_exit(self):
+        with mock.patch('core.buffers.atexit.register') as register:
+            buffer = self.make_buffer()
+        register.assert_called_once_with(buffer.stop)
+
+        buffer.add('a')
+        buffer.stop()
+        self.assertEqual(buffer.batches, [{'a': 1}])
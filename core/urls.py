@@ -23,15 +23,22 @@ from rest_framework_simplejwt.views import (
 )
 
 from apps.blogs.views import RegisterAPIView, LogoutAPIView, ProfileAPIView
+from core.views import MetricsAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('courses/', include('apps.course.urls', namespace='courses')),
+    path('enrollments/', include('apps.enrolment.urls', namespace='enrolment')),
     path('reviews/', include('apps.reviews.urls', namespace='reviews')),
     path('blogs/', include('apps.blogs.urls', namespace='blogs')),
+    path('search/', include('apps.search.urls', namespace='search')),
+    path('sync/', include('apps.sync.urls', namespace='sync')),
+    path('trending/', include('apps.trending.urls', namespace='trending')),
+    path('recommendations/', include('apps.recommendations.urls', namespace='recommendations')),
     path('register/', RegisterAPIView.as_view(), name='register'),
     path('logout/', LogoutAPIView.as_view(), name='logout'),
     path('profile/<str:username>/', ProfileAPIView.as_view(), name='profile'),
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
 ]
 
 urlpatterns += [